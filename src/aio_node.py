@@ -0,0 +1,436 @@
+import asyncio
+import time
+import grpc
+import gossip_pb2
+import gossip_pb2_grpc
+from channel_pool import peer_target
+from node import Node
+from payloads import verify
+
+
+class AioChannelPool:
+    """
+    grpc.aio counterpart of ChannelPool: one channel/stub per peer IP,
+    opened lazily and replaced when it goes into TRANSIENT_FAILURE.
+    Must only be used from the event loop thread.
+    """
+
+    def __init__(self, port='5050'):
+        self.port = port
+        # peer_ip -> (channel, stub)
+        self._entries = {}
+
+    def get_stub(self, peer_ip):
+        entry = self._entries.get(peer_ip)
+        if entry is not None and entry[0].get_state() not in (grpc.ChannelConnectivity.TRANSIENT_FAILURE,
+                                                              grpc.ChannelConnectivity.SHUTDOWN):
+            return entry[1]
+        if entry is not None:
+            self.evict(peer_ip)
+        channel = grpc.aio.insecure_channel(peer_target(peer_ip, self.port))
+        stub = gossip_pb2_grpc.GossipServiceStub(channel)
+        self._entries[peer_ip] = (channel, stub)
+        return stub
+
+    def evict(self, peer_ip):
+        entry = self._entries.pop(peer_ip, None)
+        if entry is not None:
+            asyncio.ensure_future(entry[0].close())
+
+    def retain(self, peer_ips):
+        keep = set(peer_ips)
+        for peer_ip in [ip for ip in self._entries if ip not in keep]:
+            self.evict(peer_ip)
+
+    async def close(self):
+        entries, self._entries = self._entries, {}
+        for channel, _ in entries.values():
+            await channel.close()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class AioNode(Node):
+    """
+    asyncio implementation of the gossip node (NODE_MODE=aio).
+    Receives are handled on the event loop, the fan-out is a set of
+    concurrent aio calls bounded by FANOUT_CONCURRENCY, and events are
+    handed to the background EventLogger, so a slow log pipe never holds
+    up an ack. StreamMessages is served, but the fan-out itself
+    always uses unary calls (they are already concurrent here).
+    """
+
+    def __init__(self, service_name, **kwargs):
+        super().__init__(service_name, **kwargs)
+        # self.receipt_channels keeps the blocking ChannelPool: receipts are sent from the reporter thread
+        self.channel_pool = AioChannelPool(self.port)
+        # Events are always written off the loop here
+        if self.event_logger is None:
+            self.event_logger = self._create_event_logger()
+        self.loop = None
+        self.fanout_semaphore = None
+        # Forwarding tasks of the push modes (kept referenced until done)
+        self._tasks = set()
+
+    def _create_pools(self):
+        # Fan-outs, forwards and fetches are tasks on the event loop, so no thread pools or peer streams
+        pass
+
+    def _on_neighbours_changed(self, neighbours):
+        # Called from the watch thread; aio channels may only be touched on the loop
+        self.receipt_channels.retain([peer_ip for _, peer_ip in neighbours])
+        self.breakers.retain([peer_ip for _, peer_ip in neighbours])
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.channel_pool.retain, [peer_ip for _, peer_ip in neighbours])
+
+    async def SendMessage(self, request, context):
+        """
+        Receiving message from other nodes
+        and distribute it to others (multi rounds gossip)
+        """
+        received = self._now()
+        result = None
+        if self._fetches_payload(request):
+            event_type = 'fetching'
+        else:
+            await self._prepare_inline_payload(request)
+            event_type = self._accept(request)
+            if event_type == 'initiate':
+                result = await self._initiate(request)
+            elif event_type == 'received':
+                self._forward(request)
+        ack = self._stamp(self._acknowledge(event_type, request.message, result), received)
+        self.metrics.receive_to_ack.labels(event_type).observe(ack.processing_ns / 1e9)
+        return ack
+
+    async def StreamMessages(self, request_iterator, context):
+        """
+        Receiving batches of messages over one long-lived stream per peer,
+        answering every GossipBatch with a single AckBatch
+        """
+        async for batch in request_iterator:
+            counts = {'initiate': 0, 'duplicate': 0, 'received': 0}
+            for request in batch.messages:
+                if self._fetches_payload(request):
+                    counts['received'] += 1
+                    continue
+                await self._prepare_inline_payload(request)
+                event_type = self._accept(request)
+                counts[event_type] += 1
+                if event_type == 'initiate':
+                    await self._initiate(request)
+                elif event_type == 'received':
+                    self._forward(request)
+            yield gossip_pb2.AckBatch(accepted=counts['received'], duplicates=counts['duplicate'],
+                                      initiated=counts['initiate'])
+
+    async def PullMessages(self, request, context):
+        """Epidemic pull: hands out the active messages the caller does not know yet"""
+        received = self._now()
+        return self._stamp(self._pull_response(request), received)
+
+    async def Trigger(self, request, context):
+        """
+        Test control (automate.py): makes request.target initiate the message
+        and, if asked, waits until every node is idle
+        """
+        start = time.perf_counter()
+        target = request.target or self.host
+        result = gossip_pb2.TriggerResult(target=target, message=request.message)
+        try:
+            # Generating and hashing a multi-MB payload would stall the loop
+            message = await self.loop.run_in_executor(None, self._trigger_message, request, target)
+            ack = await self.channel_pool.get_stub(target).SendMessage(message)
+            self._trigger_acknowledged(result, ack)
+        except grpc.aio.AioRpcError as e:
+            self.metrics.rpc_error('SendMessage', e.code())
+            result.details = f"Failed to trigger '{request.message}' on {target}: {e.code().name}"
+            if e.code() == grpc.StatusCode.UNAVAILABLE:
+                self.channel_pool.evict(target)
+        result.ack_ms = (time.perf_counter() - start) * 1e3
+
+        if result.initiated and request.quiesce_timeout_ms > 0:
+            deadline = start + request.quiesce_timeout_ms / 1e3
+            status_request = gossip_pb2.StatusRequest(message=request.message)
+            # Adaptive poll interval: 1 ms doubling up to 50 ms
+            interval = 0.001
+            while not self._check_quiescence(result, await self._poll_status(status_request), request.settle_ms,
+                                             start):
+                if time.perf_counter() + interval > deadline:
+                    break
+                await asyncio.sleep(interval)
+                interval = min(interval * 2, 0.05)
+        if result.initiated and self.config.receipts_enabled:
+            tracker, convergence_request = self._convergence_request(result, request, start)
+            result.convergence.CopyFrom(await self._get_convergence(tracker, convergence_request))
+        return result
+
+    async def Status(self, request, context):
+        """Test control: in-flight work of this node"""
+        return self._status(request)
+
+    async def ReportReceipts(self, request, context):
+        """Convergence reporting: first receipts sent by the receivers of the messages tracked here"""
+        received = self._now()
+        return self._stamp(gossip_pb2.ReceiptAck(accepted=self._record_receipts(request.receipts)), received)
+
+    async def GetConvergence(self, request, context):
+        """Convergence time, coverage and stragglers of a message tracked by this node"""
+        # Waiting for the receipts blocks, keep it off the loop
+        report = await self.loop.run_in_executor(None, self.convergence.report, request.message,
+                                                 request.wait_ms / 1e3)
+        return gossip_pb2.ConvergenceReport(**report)
+
+    async def FetchPayload(self, request, context):
+        """Streams a payload body by content hash, in PAYLOAD_CHUNK_BYTES chunks"""
+        entry = self.payloads.get(request.hash)
+        if entry is None:
+            await context.abort(grpc.StatusCode.NOT_FOUND, f"{self.host} has no payload {request.hash}")
+        for chunk in self._payload_chunks(*entry):
+            yield chunk
+
+    async def _get_convergence(self, tracker, request):
+        if tracker == self.host:
+            return await self.GetConvergence(request, None)
+        try:
+            return await self.channel_pool.get_stub(tracker).GetConvergence(request,
+                                                                            timeout=request.wait_ms / 1e3 + 5.0)
+        except grpc.aio.AioRpcError as e:
+            self.metrics.rpc_error('GetConvergence', e.code())
+            self._write_event({'event': 'convergence_failed', 'message': request.message, 'peer': tracker,
+                               'code': e.code().name})
+            return gossip_pb2.ConvergenceReport(message=request.message)
+
+    async def _initiate(self, request):
+        self._activity(1)
+        try:
+            return await self.gossip_message(request.message, request.sender_id)
+        finally:
+            self._activity(-1)
+
+    async def _poll_status(self, request):
+        peers = [peer_ip for _, peer_ip in self.get_neighbours()]
+        return [self._status(request)] + list(await asyncio.gather(
+            *(self._peer_status(peer_ip, request) for peer_ip in peers)))
+
+    async def _peer_status(self, peer_ip, request):
+        try:
+            return await self.channel_pool.get_stub(peer_ip).Status(request, timeout=1.0)
+        except grpc.aio.AioRpcError as e:
+            self.metrics.rpc_error('Status', e.code())
+            if e.code() == grpc.StatusCode.UNAVAILABLE:
+                self.channel_pool.evict(peer_ip)
+            return None
+
+    async def warm_up(self):
+        start = time.perf_counter()
+        deadline = start + self.config.warmup_timeout
+        await self.loop.run_in_executor(None, self.neighbours.wait_synced, self.config.warmup_timeout)
+        self._warm_serialization()
+        request = gossip_pb2.StatusRequest()
+        warmed = set()
+        interval = 0.05
+        while True:
+            peers, pending = self._warmup_pending(warmed)
+            statuses = await asyncio.gather(*(self._peer_status(peer_ip, request) for peer_ip in pending))
+            warmed.update(peer_ip for peer_ip, status in zip(pending, statuses) if status is not None)
+            remaining = deadline - time.perf_counter()
+            if self._warmup_complete(peers, warmed) or remaining <= 0 or self.stopping.is_set():
+                break
+            await asyncio.sleep(min(interval, remaining))
+            interval = min(interval * 2, 1.0)
+        self._warmed_up(peers, warmed, start)
+
+    def _forward(self, request):
+        if self._forwards(request):
+            self._activity(1)
+            task = asyncio.create_task(self.gossip_message(request.message, request.sender_id, request.hops + 1,
+                                                           request.origin))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            task.add_done_callback(lambda _: self._activity(-1))
+
+    def _start_fetch(self, request):
+        self._activity(1)
+        task = asyncio.create_task(self._fetch_payload(request))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        task.add_done_callback(lambda _: self._activity(-1))
+
+    async def _prepare_inline_payload(self, request):
+        """
+        Hashes, compresses or verifies an inline body in the default executor
+        and stores it, so _accept only binds it on the event loop. A body that
+        fails verification is dropped from the request (logged once).
+        """
+        if not request.payload or (request.payload_hash and self.payloads.has(request.payload_hash)):
+            return
+        stored = await self.loop.run_in_executor(None, self._prepare_payload, request)
+        if stored is None:
+            request.ClearField('payload')
+        else:
+            self.payloads.put(*stored)
+            request.payload_hash = stored[0]
+
+    async def _fetch_payload(self, request):
+        start = time.perf_counter()
+        chunks = []
+        encoding, size = '', request.payload_size
+        try:
+            async for chunk in self.channel_pool.get_stub(request.sender_id).FetchPayload(
+                    gossip_pb2.PayloadRequest(hash=request.payload_hash, sender_id=self.host),
+                    timeout=self.config.payload_timeout):
+                chunks.append(chunk.data)
+                encoding, size = chunk.encoding, chunk.size
+            data = b''.join(chunks)
+            # Hashing a large body would stall every handler on the loop
+            await self.loop.run_in_executor(None, verify, data, encoding, request.payload_hash)
+        except grpc.aio.AioRpcError as e:
+            self.metrics.rpc_error('FetchPayload', e.code())
+            if e.code() == grpc.StatusCode.UNAVAILABLE:
+                self.channel_pool.evict(request.sender_id)
+            self._payload_fetched(request, start, error=e.code().name)
+            return
+        except ValueError as e:
+            self._payload_fetched(request, start, error=str(e))
+            return
+        self._payload_fetched(request, start, data, encoding, size, len(chunks))
+
+    async def _pull_loop(self):
+        while not self.stopping.is_set():
+            await asyncio.sleep(self.config.round_interval)
+            peers, request = self._next_pull()
+            batches = await asyncio.gather(*(self._pull_from(peer_ip, request) for peer_ip in peers),
+                                           return_exceptions=True)
+            if self.stopping.is_set():
+                return
+            for peer_ip, batch in zip(peers, batches):
+                if isinstance(batch, grpc.aio.AioRpcError):
+                    self.metrics.rpc_error('PullMessages', batch.code())
+                    self._write_event({'event': 'pull_failed', 'peer': peer_ip, 'code': batch.code().name})
+                    if batch.code() == grpc.StatusCode.UNAVAILABLE:
+                        self.channel_pool.evict(peer_ip)
+                elif not isinstance(batch, BaseException):
+                    for message in batch.messages:
+                        await self._prepare_inline_payload(message)
+                    self._apply_pull(batch, request.round)
+
+    async def _pull_from(self, peer_ip, request):
+        sent = self._now()
+        batch = await self.channel_pool.get_stub(peer_ip).PullMessages(request, timeout=self.config.fanout_timeout)
+        self._clock_sample(peer_ip, sent, batch)
+        return batch
+
+    async def gossip_message(self, message, sender_ip, hops=1, origin=None):
+        """Sends the message to every selected neighbour (except the sender) concurrently."""
+        peers = self._fanout_peers(sender_ip)
+        origin = origin or self.host
+
+        fanout_start = time.time_ns()
+        outcomes = await asyncio.gather(*(self._send_to_peer(peer_ip, message, hops, origin) for peer_ip in peers))
+        return self._fanout_result(message, peers, outcomes, fanout_start, hops)
+
+    async def _send_to_peer(self, peer_ip, message, hops=1, origin=''):
+        start = time.perf_counter()
+        if not self._breaker_allows(peer_ip, message):
+            outcome = 'skipped'
+        else:
+            attempt = 0
+            while True:
+                outcome, code = await self._send_once(peer_ip, message, hops, origin)
+                delay = self._retry_delay(peer_ip, message, attempt, code)
+                if delay is None or self.stopping.is_set():
+                    break
+                # Backoff outside the fan-out slot so other peers are not held up
+                await asyncio.sleep(delay)
+                attempt += 1
+            self._breaker_record(peer_ip, message, outcome == 'succeeded')
+        self.metrics.peer_send.labels(outcome).observe(time.perf_counter() - start)
+        return peer_ip, outcome
+
+    async def _send_once(self, peer_ip, message, hops, origin):
+        async with self.fanout_semaphore:
+            # Record the send timestamp once this peer's slot is acquired
+            clock_offset_ms, clock_rtt_ms = self.clock.piggyback(peer_ip)
+            sent = self._now()
+            try:
+                stub = self.channel_pool.get_stub(peer_ip)
+                ack = await stub.SendMessage(gossip_pb2.GossipMessage(
+                    message=message,
+                    sender_id=self.host,
+                    timestamp=sent[0],
+                    hops=hops,
+                    origin=origin,
+                    clock_offset_ms=clock_offset_ms,
+                    clock_rtt_ms=clock_rtt_ms,
+                    **self._payload_fields(message),
+                ), timeout=self.config.fanout_timeout)
+                self._clock_sample(peer_ip, sent, ack)
+                return 'succeeded', None
+            except grpc.aio.AioRpcError as e:
+                self.metrics.rpc_error('SendMessage', e.code())
+                self._write_event({'event': 'send_failed', 'message': message, 'peer': peer_ip,
+                                   'code': e.code().name, 'details': e.details()})
+                if e.code() == grpc.StatusCode.DEADLINE_EXCEEDED:
+                    return 'timed_out', e.code()
+                if e.code() == grpc.StatusCode.UNAVAILABLE:
+                    self.channel_pool.evict(peer_ip)
+                return 'failed', e.code()
+
+    def _fanout_peers(self, sender_ip):
+        self.get_neighbours()
+        return self._select_targets(sender_ip)
+
+    async def _monitor_loop(self, interval=0.05):
+        """Handlers queue on the event loop here: its scheduling lag is recorded as their queue wait."""
+        queue_wait = self.metrics.queue_wait.labels('event_loop')
+        while not self.stopping.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            queue_wait.observe(max(0.0, time.perf_counter() - start - interval))
+
+    async def start(self):
+        """Starts the aio server and background tasks on the running loop; returns the server."""
+        self.loop = asyncio.get_running_loop()
+        self.fanout_semaphore = asyncio.Semaphore(self.config.fanout_concurrency)
+
+        self.neighbours.start()
+        if self.config.gossip_mode in ('pull', 'push-pull'):
+            self._tasks.add(asyncio.create_task(self._pull_loop()))
+        self._tasks.add(asyncio.create_task(self._monitor_loop()))
+        # Tasks on the loop (handlers, forwards, background loops)
+        self.metrics.pool_busy.labels('event_loop').set_function(lambda: len(asyncio.all_tasks(self.loop)))
+        server = grpc.aio.server(maximum_concurrent_rpcs=self.config.max_concurrent_rpcs,
+                                 options=[('grpc.max_receive_message_length', self.config.max_message_bytes)])
+        gossip_pb2_grpc.add_GossipServiceServicer_to_server(self, server)
+        self._serve_metrics()
+        server.add_insecure_port(f'{self.bind_address}:{self.port}')
+        print(f"{self.hostname}({self.host}) listening on port {self.port} (aio)", flush=True)
+        await server.start()
+        if self.config.warmup_enabled:
+            self._tasks.add(asyncio.create_task(self.warm_up()))
+        else:
+            self.ready.set()
+        return server
+
+    async def serve(self):
+        server = await self.start()
+        try:
+            await server.wait_for_termination()
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        """Ends the background tasks and the neighbour watch, closes the peer channels and flushes."""
+        self.stopping.set()
+        self.neighbours.stop()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.channel_pool.close()
+        self.shutdown()
+
+    def start_server(self):
+        """ Initiating server """
+        asyncio.run(self.serve())
@@ -0,0 +1,192 @@
+import argparse
+import hashlib
+import os
+import sys
+import time
+from concurrent import futures
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Columns of the exported test CSVs needed for the statistics ('detail' is never read)
+EVENT_COLUMNS = ['sender_id', 'receiver_id', 'message', 'event_type', 'received_timestamp', 'propagation_time']
+_DTYPES = {'sender_id': 'category', 'receiver_id': 'category', 'message': 'category', 'event_type': 'category',
+           'received_timestamp': 'Int64', 'propagation_time': 'float64'}
+_CATEGORICAL = [column for column, dtype in _DTYPES.items() if dtype == 'category']
+# Bumped whenever the cached frame changes shape
+CACHE_VERSION = 2
+# Statistics per node count, as in the notebooks
+SUMMARY_STATS = ['count', 'mean', 'min', 'median', 'max', 'std']
+
+
+def file_digest(path, block_size=1 << 20):
+    """Content hash of a file, the key of its cached events."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def scenario_name(path):
+    """Scenario of a test CSV: its file name without the extension ('test-zonal-10X')."""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def read_events(path, chunksize=100_000):
+    """
+    Reads a test CSV in chunks of `chunksize` rows into one frame with
+    categorical node, message and event type columns. Only the
+    EVENT_COLUMNS are parsed, so the free-text 'detail' is never held in
+    memory.
+    """
+    chunks = []
+    for chunk in pd.read_csv(path, usecols=lambda column: column in _DTYPES, dtype=_DTYPES, chunksize=chunksize):
+        chunks.append(chunk)
+    if not chunks:
+        return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in _DTYPES.items()})
+    if len(chunks) == 1:
+        return chunks[0].reset_index(drop=True)
+    # Every chunk has its own categories; union them so the result stays categorical
+    events = pd.concat([chunk.drop(columns=_CATEGORICAL) for chunk in chunks], ignore_index=True)
+    for column in _CATEGORICAL:
+        events[column] = union_categoricals([chunk[column] for chunk in chunks])
+    return events[[column for column in EVENT_COLUMNS if column in events]]
+
+
+def load_events(path, cache_dir=None, chunksize=100_000):
+    """
+    Parsed events of a test CSV. With a cache_dir the frame is stored as
+    Parquet keyed by the file's content hash, so a file is only parsed
+    again when it changes. Returns (events, cache hit).
+    """
+    if cache_dir is None:
+        return read_events(path, chunksize), False
+    cache_path = os.path.join(cache_dir, f"{scenario_name(path)}-{file_digest(path)}-v{CACHE_VERSION}.parquet")
+    if os.path.exists(cache_path):
+        return pd.read_parquet(cache_path), True
+    events = read_events(path, chunksize)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write to a temporary name first so parallel runs never read a partial file
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    events.to_parquet(temp_path, index=False)
+    os.replace(temp_path, cache_path)
+    return events, False
+
+
+def message_stats(events, filter_convergence=True):
+    """
+    Per-message propagation statistics: the time from the initiate event
+    to the last received event (ms), the number of receivers and the mean
+    per-hop latency, with the node count parsed from the message ID.
+    filter_convergence drops the '-0' warm-up messages.
+    """
+    messages = events['message'].cat.categories
+    # Parsed once per distinct message instead of once per row
+    node_counts = messages.str.extract(r'cubaan(\d+)-', expand=False)
+    warmup = messages.str.endswith('-0')
+
+    initiate = events[events['event_type'] == 'initiate'].groupby('message', observed=True)['received_timestamp']
+    received = events[events['event_type'] == 'received'].groupby('message', observed=True)
+    stats = pd.DataFrame({
+        'initiated': initiate.first(),
+        'last_received': received['received_timestamp'].max(),
+        'receivers': received['receiver_id'].nunique(),
+        'mean_hop_ms': received['propagation_time'].mean(),
+    })
+    # Nanosecond timestamps exceed float64 precision: subtract as integers, then convert
+    stats['propagation_time_ms'] = (stats['last_received'] - stats['initiated']).astype('float64') / 1e6
+    stats = stats.dropna(subset=['propagation_time_ms'])
+
+    index = messages.get_indexer(stats.index)
+    stats['num_nodes'] = pd.to_numeric(node_counts[index], errors='coerce').astype('Int64')
+    if filter_convergence:
+        stats = stats[~warmup[index]]
+    stats.index = stats.index.astype(str)
+    stats.index.name = 'message'
+    return stats[['num_nodes', 'propagation_time_ms', 'receivers', 'mean_hop_ms']]
+
+
+def summarize(stats):
+    """Propagation time statistics per node count (ms, 2 decimals), like the notebooks' result tables."""
+    summary = stats.groupby('num_nodes')['propagation_time_ms'].agg(SUMMARY_STATS)
+    return summary.round(2).reset_index()
+
+
+def analyse_file(path, cache_dir=None, filter_convergence=True, chunksize=100_000):
+    """Loads one scenario CSV and returns {'scenario', 'path', 'cached', 'seconds', 'messages', 'summary'}."""
+    start = time.perf_counter()
+    events, cached = load_events(path, cache_dir, chunksize)
+    stats = message_stats(events, filter_convergence)
+    return {
+        'scenario': scenario_name(path),
+        'path': path,
+        'cached': cached,
+        'seconds': time.perf_counter() - start,
+        'messages': stats,
+        'summary': summarize(stats),
+    }
+
+
+def analyse(paths, cache_dir=None, filter_convergence=True, processes=None, chunksize=100_000):
+    """
+    Analyses every scenario CSV, spread over `processes` worker processes
+    (default: one per CPU, at most one per file). Returns the results of
+    analyse_file in the order of `paths`.
+    """
+    processes = min(processes or os.cpu_count() or 1, len(paths))
+    if processes <= 1:
+        return [analyse_file(path, cache_dir, filter_convergence, chunksize) for path in paths]
+    with futures.ProcessPoolExecutor(max_workers=processes) as pool:
+        return list(pool.map(analyse_file, paths, [cache_dir] * len(paths), [filter_convergence] * len(paths),
+                             [chunksize] * len(paths)))
+
+
+def compare(results, stat='mean'):
+    """One column of `stat` per scenario, indexed by node count (the notebooks' comparison table)."""
+    columns = {result['scenario']: result['summary'].set_index('num_nodes')[stat] for result in results}
+    return pd.DataFrame(columns).sort_index().reset_index()
+
+
+def default_cache_dir(path):
+    return os.path.join(os.path.dirname(os.path.abspath(path)), '.analysis_cache')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Propagation statistics of the exported test CSVs.")
+    parser.add_argument('paths', nargs='+', help="Test CSVs, one scenario each (e.g. memory/test-*-10X.csv)")
+    parser.add_argument('--stat', choices=SUMMARY_STATS, default='mean',
+                        help="Statistic compared across scenarios (default: mean)")
+    parser.add_argument('--include_convergence', action='store_true',
+                        help="Keep the '-0' warm-up messages")
+    parser.add_argument('--processes', type=int, default=None,
+                        help="Worker processes (default: one per CPU, at most one per file)")
+    parser.add_argument('--chunksize', type=int, default=100_000, help="Rows parsed per chunk")
+    parser.add_argument('--cache_dir', default=None,
+                        help="Where parsed events are cached (default: .analysis_cache next to the first CSV)")
+    parser.add_argument('--no_cache', action='store_true', help="Always parse the CSVs")
+    parser.add_argument('--summary', default=None, help="CSV file for the per-scenario, per-node-count statistics")
+    parser.add_argument('--messages', default=None, help="CSV file for the per-message statistics")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    cache_dir = None
+    if not args.no_cache:
+        cache_dir = args.cache_dir or default_cache_dir(args.paths[0])
+    results = analyse(args.paths, cache_dir, not args.include_convergence, args.processes, args.chunksize)
+
+    for result in results:
+        source = 'cache' if result['cached'] else 'csv'
+        print(f"\n{result['scenario']} ({len(result['messages'])} messages, {source}, "
+              f"{result['seconds'] * 1e3:.0f} ms)")
+        print(result['summary'].to_string(index=False))
+    if len(results) > 1:
+        print(f"\n{args.stat} propagation time (ms) per scenario")
+        print(compare(results, args.stat).to_string(index=False))
+    print(f"\nAnalysed {len(results)} files in {time.perf_counter() - start:.2f} s", file=sys.stderr)
+
+    if args.summary:
+        pd.concat([result['summary'].assign(scenario=result['scenario']) for result in results]).to_csv(
+            args.summary, index=False)
+    if args.messages:
+        pd.concat([result['messages'].assign(scenario=result['scenario']) for result in results]).to_csv(
+            args.messages)
@@ -1,21 +1,50 @@
 import argparse
+import itertools
 import json
+import math
+import statistics
 import subprocess
 import sys
+import threading
 import traceback
 import time
 import uuid
-import select
 import random
+import grpc
+from concurrent import futures
 from datetime import datetime, timedelta, timezone
+import gossip_pb2
+from controller import GossipController, PortForward
+from payloads import parse_size
+from pod_tracker import PodTracker
+
+# Every release runs the chart's single Deployment
+DEPLOYMENT_NAME = 'gossip-deployment'
 
 
 class Test:
-    def __init__(self, num_tests, helm_args):
+    def __init__(self, num_tests, helm_args, pods=None, controller=None, quiesce_timeout=60.0, settle_ms=100,
+                 min_tests=10, target_rel_ci=0.0, payload_size=0, namespace='default', label_selector='app=bcgossip'):
         # Getting test details
         self.num_tests = num_tests
         self.helm_args = helm_args  # Store Helm arguments as a dictionary
-        self.gossip_delay = float(helm_args.get('gossipDelay', 5.0))  # Default 2s
+        # Optional fixed delay before each test; the quiescence check after each trigger replaces it
+        self.gossip_delay = float(helm_args.get('gossipDelay', 0.0))
+        # Watch-based view of the gossip pods of one release (a FakePodApi-backed tracker works offline)
+        self.pods = pods or PodTracker(namespace=namespace, label_selector=label_selector).start()
+        # Trigger RPC client; without one, a port-forward to a gateway pod is opened on first use
+        self.controller = controller
+        self.port_forward = None
+        self.quiesce_timeout = quiesce_timeout
+        self.settle_ms = settle_ms
+        # Size (bytes) of the random payload every test message carries (0 = none)
+        self.payload_size = payload_size
+        # Adaptive stopping: with target_rel_ci > 0, num_tests is a maximum and the run stops once the 95%
+        # confidence interval of the mean convergence time is within target_rel_ci of the mean
+        self.min_tests = min_tests
+        self.target_rel_ci = target_rel_ci
+        # Convergence time (ms) of every measured test (the warm-up test 0 is left out)
+        self.convergence_times = []
         print(f"self.num_tests = {self.num_tests}", flush=True)
         print(f'self.helm_args = {self.helm_args}', flush=True)
 
@@ -60,75 +89,51 @@ class Test:
 
     def wait_for_pods_to_be_ready(self, namespace='default', expected_pods=0, timeout=1000):
         """
-        Waits for all pods in the specified namespace to be ready.
+        Waits until expected_pods gossip pods are running and ready.
+        Reacts to pod watch events instead of polling kubectl.
         """
         print(f"Checking for pods in namespace {namespace}...", flush=True)
-        start_time = time.time()
-        get_pods_cmd = f"kubectl get pods -n {namespace} --no-headers | grep Running | wc -l"
-
-        while time.time() - start_time < timeout:
-            try:
-                result = subprocess.run(get_pods_cmd, shell=True,
-                                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-                running_pods = int(result.stdout.strip())
-                if running_pods >= expected_pods:
-                    print(f"All {expected_pods} pods are up and running in namespace {namespace}.", flush=True)
-                    return True
-                else:
-                    print(f" {running_pods} pods are up for now in namespace {namespace}. Waiting...", flush=True)
-            except subprocess.CalledProcessError as e:
-                print(f"Error checking for pods: {e.stderr}", flush=True)
-                return False
-            time.sleep(1)
-        print(f"Timeout waiting for pods to terminate in namespace {namespace}.", flush=True)
+
+        def progress(pods):
+            total, ready, terminating = pods.counts()
+            print(f" {ready} pods are up for now in namespace {namespace}. Waiting...", flush=True)
+
+        if self.pods.wait_for(lambda pods: pods.counts()[1] >= expected_pods, timeout, progress):
+            print(f"All {expected_pods} pods are up and running in namespace {namespace}.", flush=True)
+            return True
+        print(f"Timeout waiting for pods to be ready in namespace {namespace}.", flush=True)
         return False
 
     def wait_for_pods_to_be_down(self, namespace='default', timeout=1000):
         """
-        Waits for all pods in the specified namespace to be down.
+        Waits until no gossip pods (running or terminating) are left.
         """
         print(f"Checking for pods in namespace {namespace}...", flush=True)
-        start_time = time.time()
-        get_pods_cmd = f"kubectl get pods -n {namespace} --no-headers | grep Terminating | wc -l"
-
-        while time.time() - start_time < timeout:
-            try:
-                result = subprocess.run(get_pods_cmd, shell=True,
-                                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-                if "No resources found" in result.stderr:
-                    print(f"No pods found in namespace {namespace}.", flush=True)
-                    return True
-                else:
-                    print(f"Pods still exist in namespace {namespace}. Waiting...", flush=True)
-            except subprocess.CalledProcessError as e:
-                print(f"Error checking for pods: {e.stderr}", flush=True)
-                return False
-            time.sleep(1)
+
+        def progress(pods):
+            total, ready, terminating = pods.counts()
+            print(f"{total} pods still exist ({terminating} terminating) in namespace {namespace}. Waiting...",
+                  flush=True)
+
+        if self.pods.wait_for(lambda pods: pods.counts()[0] == 0, timeout, progress):
+            print(f"No pods found in namespace {namespace}.", flush=True)
+            return True
         print(f"Timeout waiting for pods to terminate in namespace {namespace}.", flush=True)
         return False
 
     def get_num_nodes(self, namespace='default'):
         """
-        Dynamically determines the number of nodes (pods) by counting running pods.
+        Number of nodes (ready gossip pods) from the watch cache.
         """
-        get_pods_cmd = f"kubectl get pods -n {namespace} --no-headers | grep Running | wc -l"
-        try:
-            result = subprocess.run(get_pods_cmd, shell=True,
-                                     stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            num_nodes = int(result.stdout.strip())
-            print(f"Number of running pods (num_nodes): {num_nodes}", flush=True)
-            return num_nodes
-        except subprocess.CalledProcessError as e:
-            print(f"Error getting number of pods: {e.stderr}", flush=True)
-            return 0
+        num_nodes = len(self.pods.ready_pods())
+        print(f"Number of running pods (num_nodes): {num_nodes}", flush=True)
+        return num_nodes
 
     def select_random_pod(self):
         """
-        Select a random pod from the list of running pods.
+        Select a random pod from the ready gossip pods.
         """
-        command = "kubectl get pods --no-headers | grep Running | awk '{print $1}'"
-        stdout, stderr = self.run_command(command, suppress_output=True)
-        pod_list = stdout.split()
+        pod_list = self.pods.ready_pods()
         if not pod_list:
             raise Exception("No running pods found.")
         return random.choice(pod_list)
@@ -140,62 +145,125 @@ class Test:
         malaysia_time = utc_time + malaysia_offset
         return malaysia_time
 
-    def access_pod_and_initiate_gossip(self, pod_name, replicas, unique_id, iteration):
+    def get_controller(self):
+        """
+        Returns the Trigger RPC client, opening a port-forward to a ready
+        gateway pod if needed. The gateway starts gossip on the selected pod
+        inside the cluster, so one connection serves the whole run.
         """
-        Access the pod's shell, initiate gossip, and handle the response.
+        if self.controller is None:
+            gateway = self.select_random_pod()
+            self.port_forward = PortForward(gateway, namespace=self.pods.namespace)
+            self.controller = GossipController(self.port_forward.address)
+            print(f"Gateway pod {gateway} forwarded to {self.port_forward.address}", flush=True)
+        return self.controller
+
+    def reset_controller(self):
+        """Drops the controller (e.g. the gateway pod went away); the next trigger reconnects."""
+        if self.port_forward is not None:
+            self.controller.close()
+            self.port_forward.close()
+            self.controller = None
+            self.port_forward = None
+
+    def close(self):
+        self.reset_controller()
+        self.pods.stop()
+
+    def convergence_stats(self):
+        """Mean, standard deviation and relative 95% CI half-width of the measured convergence times."""
+        samples = self.convergence_times
+        stats = {'event': 'convergence_stats', 'tests': len(samples)}
+        if len(samples) >= 2:
+            mean = statistics.fmean(samples)
+            stdev = statistics.stdev(samples)
+            stats.update(mean_ms=mean, stdev_ms=stdev,
+                         rel_ci=1.96 * stdev / math.sqrt(len(samples)) / mean if mean > 0 else math.inf)
+        return stats
+
+    def converged(self):
+        """Adaptive stop: enough tests were run and the convergence time varies little enough."""
+        if self.target_rel_ci <= 0 or len(self.convergence_times) < max(2, self.min_tests):
+            return False
+        stats = self.convergence_stats()
+        print(json.dumps(stats), flush=True)
+        return stats['rel_ci'] <= self.target_rel_ci
+
+    def run_iterations(self, replicas, unique_id, first_iteration=1):
+        """
+        Runs the test iterations on the ready pods (tests first_iteration up to
+        num_tests, or until converged()); returns the number of tests run.
         """
+        tests = 0
+        for nt in range(first_iteration, self.num_tests + 1):
+            pod_name = self.select_random_pod()
+            print(f"Selected pod: {pod_name}", flush=True)
+            if self.access_pod_and_initiate_gossip(pod_name, replicas, unique_id, nt):
+                print(f"Test {nt} complete.", flush=True)
+            else:
+                print(f"Test {nt} failed.", flush=True)
+            tests += 1
+            if self.converged():
+                print(f"Convergence time is stable after {nt} tests, stopping early.", flush=True)
+                break
+        print(json.dumps(self.convergence_stats()), flush=True)
+        return tests
 
-        time.sleep(self.gossip_delay)  # Use configurable delay
+    def access_pod_and_initiate_gossip(self, pod_name, replicas, unique_id, iteration):
+        """
+        Initiate gossip on the pod through the Trigger RPC and wait until
+        every node is idle again (adaptive quiescence check).
+        """
+        if self.gossip_delay > 0:
+            time.sleep(self.gossip_delay)
 
+        message = f'{unique_id}-cubaan{replicas}-{iteration}'
         try:
             start_time = self._get_malaysian_time().strftime('%Y/%m/%d %H:%M:%S')
-            message = f'{unique_id}-cubaan{replicas}-{iteration}'
             start_log = {
                 'event': 'gossip_start',
                 'pod_name': pod_name,
                 'message': message,
                 'start_time': start_time,
+                'payload_size': self.payload_size,
                 'details': f"Gossip propagation started for message: {message}"
             }
             print(json.dumps(start_log), flush=True)
 
-            session = subprocess.Popen(['kubectl', 'exec', '-it', pod_name, '--request-timeout=3000',
-                                       '--', 'sh'], stdin=subprocess.PIPE,
-                                      stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-
-            session.stdin.write(f'python3 start.py --message {message}\n')
-            session.stdin.flush()
-
-            end_time = time.time() + 3000
-            while time.time() < end_time:
-                reads = [session.stdout.fileno()]
-                ready = select.select(reads, [], [], 5)[0]
-                if ready:
-                    output = session.stdout.readline()
-                    print(output, flush=True)
-                    if 'Received acknowledgment:' in output:
-                        end_time_log = self._get_malaysian_time().strftime('%Y/%m/%d %H:%M:%S')
-                        end_log = {
-                            'event': 'gossip_end',
-                            'pod_name': pod_name,
-                            'message': message,
-                            'end_time': end_time_log,
-                            'details': f"Gossip propagation completed for message: {message}"
-                        }
-                        print(json.dumps(end_log), flush=True)
-                        break
-                if session.poll() is not None:
-                    print("Session ended before completion.", flush=True)
-                    break
-            else:
-                print("Timeout waiting for gossip to complete.", flush=True)
+            pod_ip = self.pods.pods().get(pod_name, {}).get('ip')
+            if not pod_ip:
+                raise Exception(f"Pod {pod_name} has no IP.")
+            result = self.get_controller().trigger(pod_ip, message, self.quiesce_timeout, self.settle_ms,
+                                                   self.payload_size)
+            print(json.dumps({'event': 'gossip_result', 'pod_name': pod_name, **result}), flush=True)
+            if not result['initiated']:
+                print(f"Gossip was not initiated: {result['details']}", flush=True)
                 return False
-
-            session.stdin.write('exit\n')
-            session.stdin.flush()
+            if not result['quiescent']:
+                print(f"Nodes still busy after {self.quiesce_timeout}s for message: {message}", flush=True)
+            convergence = result['convergence']
+            if convergence['known']:
+                if iteration > 0:
+                    self.convergence_times.append(convergence['convergence_ms'])
+                if not convergence['complete']:
+                    print(f"{len(convergence['stragglers'])} stragglers for message {message}: "
+                          f"{convergence['stragglers']}", flush=True)
+
+            end_time_log = self._get_malaysian_time().strftime('%Y/%m/%d %H:%M:%S')
+            end_log = {
+                'event': 'gossip_end',
+                'pod_name': pod_name,
+                'message': message,
+                'end_time': end_time_log,
+                'details': f"Gossip propagation completed for message: {message}"
+            }
+            print(json.dumps(end_log), flush=True)
             return True
 
         except Exception as e:
+            if isinstance(e, grpc.RpcError):
+                # The gateway may be gone; reconnect through another pod next time
+                self.reset_controller()
             error_log = {
                 'event': 'gossip_error',
                 'pod_name': pod_name,
@@ -208,11 +276,260 @@ class Test:
             return False
 
 
+def parse_sweep(specs):
+    """
+    Sweep matrix from --sweep arguments ('totalNodes=10,50,100',
+    'testType=default,bandwidth'): the cartesian product of the values as a
+    list of {key: value} dicts, one per scenario.
+    """
+    keys, choices = [], []
+    for spec in specs:
+        key, values = spec.split('=', 1)
+        keys.append(key)
+        choices.append(values.split(','))
+    return [dict(zip(keys, combination)) for combination in itertools.product(*choices)]
+
+
+class KubeCluster:
+    """
+    helm/kubectl backend of the SweepScheduler: installs, scales and
+    removes one release per namespace, and watches its pods.
+    """
+
+    def __init__(self, chart='./chartsim'):
+        self.chart = chart
+
+    def install(self, release, namespace, values):
+        command = ['helm', 'install', release, self.chart, '--namespace', namespace, '--create-namespace']
+        for key, value in values.items():
+            command.extend(['--set', f'{key}={value}'])
+        self._run(command)
+
+    def scale(self, release, namespace, replicas):
+        # totalNodes sets both the replica count and the pods' NODES. The changed env rolls every pod, so each
+        # sweep point restarts and re-warms the whole release (counted in the scenario's deploy_ms); --wait
+        # returns once the new pods are ready
+        self._run(['helm', 'upgrade', release, self.chart, '--namespace', namespace, '--reuse-values',
+                   '--set', f'totalNodes={replicas}', '--wait'])
+
+    def uninstall(self, release, namespace):
+        self._run(['helm', 'uninstall', release, '--namespace', namespace])
+
+    def delete_namespace(self, namespace):
+        self._run(['kubectl', 'delete', 'namespace', namespace, '--wait=false'])
+
+    def tracker(self, namespace, label_selector):
+        return PodTracker(namespace=namespace, label_selector=label_selector).start()
+
+    def controller(self, namespace):
+        # None: the Test opens a port-forward to one of the release's pods
+        return None
+
+    @staticmethod
+    def _run(command):
+        print(f"Running: {' '.join(command)}", flush=True)
+        try:
+            return subprocess.run(command, check=True, text=True, capture_output=True).stdout
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"{' '.join(command)} failed: {e.stderr.strip()}") from e
+
+
+class PodBudget:
+    """Cluster capacity budget of a sweep: at most max_pods gossip pods across the running releases (0 = no limit)."""
+
+    def __init__(self, max_pods=0):
+        self.max_pods = max_pods
+        self.in_use = 0
+        self._changed = threading.Condition()
+
+    def fits(self, pods):
+        return not self.max_pods or pods <= self.max_pods
+
+    def acquire(self, pods):
+        """Blocks until `pods` more pods fit in the budget, then reserves them."""
+        with self._changed:
+            while self.max_pods and self.in_use + pods > self.max_pods:
+                self._changed.wait()
+            self.in_use += pods
+
+    def release(self, pods):
+        with self._changed:
+            self.in_use -= pods
+            self._changed.notify_all()
+
+
+class SweepScheduler:
+    """
+    Runs a sweep matrix of scenarios (Helm values, each with totalNodes) as
+    concurrent Helm releases. Every release gets its own namespace, and its
+    pods are selected by their release label. Scenarios that only differ in
+    totalNodes share a release (a lane). The lane is installed once at its
+    smallest size and scaled up between scenarios instead of being
+    reinstalled. At most max_releases lanes run at once, largest first. A
+    lane only starts once its largest size fits in the pod budget, and it
+    keeps those pods reserved until its pods are gone. run() returns the
+    results index: one entry per scenario, in the order of the matrix.
+    """
+
+    def __init__(self, cluster, scenarios, num_tests, max_releases=2, max_pods=0, sweep_id=None, release='cnsim',
+                 first_iteration=1, ready_timeout=1000, test_options=None):
+        self.cluster = cluster
+        self.scenarios = scenarios
+        self.num_tests = num_tests
+        self.max_releases = max(1, max_releases)
+        self.budget = PodBudget(max_pods)
+        self.sweep_id = sweep_id or str(uuid.uuid4())[:4]
+        self.release = release
+        self.first_iteration = first_iteration
+        self.ready_timeout = ready_timeout
+        # Test keyword arguments (quiesce_timeout, settle_ms, min_tests, target_rel_ci, payload_size)
+        self.test_options = test_options or {}
+
+    def lanes(self):
+        """[(scenario index, values)] per lane, smallest totalNodes first."""
+        lanes = {}
+        for index, values in enumerate(self.scenarios):
+            key = tuple(sorted((k, v) for k, v in values.items() if k != 'totalNodes'))
+            lanes.setdefault(key, []).append((index, values))
+        return [sorted(lane, key=lambda scenario: int(scenario[1]['totalNodes'])) for lane in lanes.values()]
+
+    def run(self):
+        lanes = sorted(self.lanes(), key=lambda lane: -int(lane[-1][1]['totalNodes']))
+        results = []
+        with futures.ThreadPoolExecutor(max_workers=self.max_releases, thread_name_prefix='release') as pool:
+            for entries in pool.map(self._run_lane, range(len(lanes)), lanes):
+                results.extend(entries)
+        return sorted(results, key=lambda entry: entry['scenario'])
+
+    def _run_lane(self, number, lane):
+        namespace = f"{self.release}-{self.sweep_id}-{number}"
+        entries = [self._entry(index, values, number, namespace) for index, values in lane]
+        peak = int(lane[-1][1]['totalNodes'])
+        if not self.budget.fits(peak):
+            for entry in entries:
+                entry.update(status='skipped', error=f"needs {peak} pods, the budget is {self.budget.max_pods}")
+                self._report(entry)
+            return entries
+
+        self.budget.acquire(peak)
+        tracker = None
+        try:
+            for entry, (_, values) in zip(entries, lane):
+                try:
+                    # Install or scale, up to every pod ready: a scale rolls all pods (see KubeCluster.scale)
+                    deploy_start = time.perf_counter()
+                    if tracker is None:
+                        self.cluster.install(self.release, namespace, values)
+                        entry['deploy'] = 'install'
+                        tracker = self.cluster.tracker(namespace, f"app=bcgossip,release={self.release}")
+                    else:
+                        self.cluster.scale(self.release, namespace, entry['replicas'])
+                        entry['deploy'] = 'scale'
+                    self._run_scenario(entry, values, tracker, namespace, deploy_start)
+                except Exception as e:
+                    traceback.print_exc()
+                    entry.update(status='failed', error=str(e))
+                self._report(entry)
+        finally:
+            if tracker is not None:
+                self._remove(namespace, tracker)
+            self.budget.release(peak)
+        return entries
+
+    def _run_scenario(self, entry, values, tracker, namespace, deploy_start):
+        test = Test(self.num_tests, values, pods=tracker, controller=self.cluster.controller(namespace),
+                    **self.test_options)
+        try:
+            if not test.wait_for_pods_to_be_ready(namespace=namespace, expected_pods=entry['replicas'],
+                                                  timeout=self.ready_timeout):
+                raise RuntimeError(f"{entry['replicas']} pods not ready after {self.ready_timeout}s")
+            entry['deploy_ms'] = (time.perf_counter() - deploy_start) * 1e3
+            entry['unique_id'] = str(uuid.uuid4())[:4]
+            entry['message_prefix'] = f"{entry['unique_id']}-cubaan{entry['replicas']}-"
+            entry['started'] = test._get_malaysian_time().strftime('%Y/%m/%d %H:%M:%S')
+            entry['tests'] = test.run_iterations(entry['replicas'], entry['unique_id'], self.first_iteration)
+            entry['finished'] = test._get_malaysian_time().strftime('%Y/%m/%d %H:%M:%S')
+            entry['convergence'] = test.convergence_stats()
+            entry['status'] = 'completed'
+        finally:
+            test.reset_controller()
+
+    def _remove(self, namespace, tracker):
+        try:
+            self.cluster.uninstall(self.release, namespace)
+            if not tracker.wait_for(lambda pods: pods.counts()[0] == 0, self.ready_timeout):
+                print(f"Timeout waiting for the pods in {namespace} to terminate.", flush=True)
+        except Exception:
+            traceback.print_exc()
+        finally:
+            tracker.stop()
+        try:
+            self.cluster.delete_namespace(namespace)
+        except Exception:
+            traceback.print_exc()
+
+    def _entry(self, index, values, lane, namespace):
+        return {
+            'event': 'sweep_result',
+            'sweep_id': self.sweep_id,
+            'scenario': index,
+            'lane': lane,
+            'release': self.release,
+            'namespace': namespace,
+            'values': dict(values),
+            'replicas': int(values['totalNodes']),
+            'deploy': None,
+            'deploy_ms': None,
+            'status': 'pending',
+            'unique_id': None,
+            'message_prefix': None,
+            'tests': 0,
+            'started': None,
+            'finished': None,
+            'convergence': None,
+            'error': None,
+        }
+
+    @staticmethod
+    def _report(entry):
+        print(json.dumps(entry), flush=True)
+
+
+def write_index(path, sweep_id, entries):
+    """Writes the consolidated results index of a sweep (JSON)."""
+    with open(path, 'w') as f:
+        json.dump({'sweep_id': sweep_id, 'scenarios': entries}, f, indent=2)
+    print(f"Wrote the results index of sweep {sweep_id} ({len(entries)} scenarios) to {path}", flush=True)
+
+
 if __name__ == '__main__':
     # Parse arguments
     parser = argparse.ArgumentParser(description="Usage: python automate.py --num_tests <number_of_tests> --set key1=value1 key2=value2 ...")
-    parser.add_argument('--num_tests', required=True, type=int, help="Total number of tests to do")
+    parser.add_argument('--num_tests', required=True, type=int,
+                        help="Total number of tests to do (the maximum with --target_rel_ci)")
     parser.add_argument('--set', action='append', help="Helm --set arguments in key=value format", default=[])
+    parser.add_argument('--quiesce_timeout', type=float, default=60.0,
+                        help="Max seconds to wait for every node to go idle after each test")
+    parser.add_argument('--settle_ms', type=int, default=100,
+                        help="How long every node must have been idle before the next test starts")
+    parser.add_argument('--target_rel_ci', type=float, default=0.0,
+                        help="Stop early once the 95%% CI of the mean convergence time is within this fraction "
+                             "of the mean (e.g. 0.05; 0 = always run --num_tests)")
+    parser.add_argument('--min_tests', type=int, default=10,
+                        help="Tests to run before --target_rel_ci may stop the run")
+    parser.add_argument('--warmup_round', action='store_true',
+                        help="Also run the discarded '-0' iteration (for nodes started with warmup.enabled=off)")
+    parser.add_argument('--payload_size', type=parse_size, default=0,
+                        help="Random payload carried by every test message, e.g. 100K or 10M (default: none)")
+    parser.add_argument('--sweep', action='append', default=[],
+                        help="Sweep matrix axis in key=v1,v2 format (e.g. totalNodes=10,50,100); every combination "
+                             "runs as a scenario, several Helm releases at once")
+    parser.add_argument('--max_releases', type=int, default=2, help="Releases a sweep runs concurrently")
+    parser.add_argument('--max_pods', type=int, default=0,
+                        help="Capacity budget: max gossip pods across the running releases (0 = no limit)")
+    parser.add_argument('--index', default=None, help="Results index of the sweep (default: sweep-<id>.json)")
+    parser.add_argument('--fake', action='store_true',
+                        help="Run the sweep against an in-memory cluster instead of helm/kubectl (dry run)")
     args = parser.parse_args()
 
     # Convert --set arguments into a dictionary
@@ -220,6 +537,32 @@ if __name__ == '__main__':
     for s in args.set:
         key, value = s.split('=', 1)
         helm_args[key] = value
+    # The adaptive stop needs the convergence reports, which are off by default
+    if args.target_rel_ci > 0:
+        helm_args.setdefault('receipts.enabled', 'on')
+
+    if args.sweep:
+        scenarios = [{**helm_args, **values} for values in parse_sweep(args.sweep)]
+        for values in scenarios:
+            values.setdefault('totalNodes', '10')
+            if not values['totalNodes'].isdigit():
+                print(f"Error: totalNodes must be a valid integer, got {values['totalNodes']}.", flush=True)
+                sys.exit(1)
+        if args.fake:
+            from fake_cluster import FakeCluster
+            cluster = FakeCluster()
+        else:
+            cluster = KubeCluster()
+        scheduler = SweepScheduler(cluster, scenarios, args.num_tests,
+                                   max_releases=args.max_releases, max_pods=args.max_pods,
+                                   first_iteration=0 if args.warmup_round else 1,
+                                   test_options={'quiesce_timeout': args.quiesce_timeout, 'settle_ms': args.settle_ms,
+                                                 'min_tests': args.min_tests, 'target_rel_ci': args.target_rel_ci,
+                                                 'payload_size': args.payload_size})
+        print(f"Sweep {scheduler.sweep_id}: {len(scenarios)} scenarios in {len(scheduler.lanes())} releases", flush=True)
+        entries = scheduler.run()
+        write_index(args.index or f"sweep-{scheduler.sweep_id}.json", scheduler.sweep_id, entries)
+        sys.exit(0 if all(entry['status'] == 'completed' for entry in entries) else 1)
 
     # Ensure totalNodes is provided or set a default value
     if 'totalNodes' not in helm_args:
@@ -234,7 +577,8 @@ if __name__ == '__main__':
 
     print(f"totalNodes confirmed: {total_nodes}", flush=True)
 
-    test = Test(args.num_tests, helm_args)  # Pass the Helm arguments to Test
+    test = Test(args.num_tests, helm_args, quiesce_timeout=args.quiesce_timeout, settle_ms=args.settle_ms,
+                min_tests=args.min_tests, target_rel_ci=args.target_rel_ci, payload_size=args.payload_size)  # Pass the Helm arguments to Test
 
     # Helm name is fixed
     helmname = 'cnsim'
@@ -253,14 +597,9 @@ if __name__ == '__main__':
         if test.wait_for_pods_to_be_ready(namespace='default', expected_pods=int(total_nodes), timeout=1000):
             unique_id = str(uuid.uuid4())[:4]
 
-            # Test iteration starts here
-            for nt in range(0, test.num_tests + 1):
-                pod_name = test.select_random_pod()
-                print(f"Selected pod: {pod_name}", flush=True)
-                if test.access_pod_and_initiate_gossip(pod_name, int(total_nodes), unique_id, nt):
-                    print(f"Test {nt} complete.", flush=True)
-                else:
-                    print(f"Test {nt} failed.", flush=True)
+            # Test iteration starts here. The pods only turn ready after their warm-up (channels, neighbours,
+            # serialization), so every iteration is measured; --warmup_round brings back the '-0' round
+            test.run_iterations(int(total_nodes), unique_id, 0 if args.warmup_round else 1)
         else:
             print(f"Failed to prepare pods for {helmname}.", flush=True)
 
@@ -270,4 +609,5 @@ if __name__ == '__main__':
         if test.wait_for_pods_to_be_down(namespace='default', timeout=1000):
             print(f"Helm {helmname} uninstallation is complete...", flush=True)
     else:
-        print(f"No file was found for args={args}")
\ No newline at end of file
+        print(f"No file was found for args={args}")
+    test.close()
\ No newline at end of file
@@ -0,0 +1,316 @@
+import argparse
+import contextlib
+import itertools
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+import grpc
+import gossip_pb2
+import gossip_pb2_grpc
+from harness import LocalCluster
+
+# Metrics compared against a baseline, and whether higher values are better
+COMPARED = [
+    ('throughput', True),
+    ('ack_ms.p50', False), ('ack_ms.p95', False), ('ack_ms.p99', False),
+    ('propagation_ms.p50', False), ('propagation_ms.p95', False), ('propagation_ms.p99', False),
+]
+
+
+def percentile(values, q):
+    """q-th percentile (0-100) with linear interpolation, None for no values."""
+    if not values:
+        return None
+    values = sorted(values)
+    position = (len(values) - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def latency_summary(values):
+    if not values:
+        return {'count': 0, 'mean': None, 'p50': None, 'p95': None, 'p99': None, 'max': None}
+    return {
+        'count': len(values),
+        'mean': sum(values) / len(values),
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'p99': percentile(values, 99),
+        'max': max(values),
+    }
+
+
+def make_message(prefix, index, size):
+    """Message ID padded to `size` bytes (IDs are never shorter than the prefix and index)."""
+    message = f'{prefix}-{index}-'
+    return message + 'x' * max(0, size - len(message))
+
+
+class LoadGenerator:
+    """
+    Open-loop SendMessage load: every client thread issues its share of the
+    rate on a fixed schedule with non-blocking calls, whether or not earlier
+    calls have been acknowledged. Ack latency is measured from the scheduled
+    send time, so a slow node shows up as latency instead of a lower rate.
+    Sends are skipped (counted as 'shed') while max_in_flight calls are
+    outstanding, so an overloaded cluster cannot build an unbounded backlog.
+    """
+
+    def __init__(self, addresses, rate, duration, size, concurrency=1, warmup=0.0, max_in_flight=1000,
+                 drain_timeout=30.0):
+        self.addresses = addresses
+        self.rate = rate
+        self.duration = duration
+        self.size = size
+        self.concurrency = max(1, concurrency)
+        self.warmup = warmup
+        self.max_in_flight = max_in_flight
+        self.drain_timeout = drain_timeout
+        self.prefix = f'bench{uuid.uuid4().hex[:6]}'
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._sent_all = False
+        self._drained = threading.Event()
+        self._futures = []
+        # message -> {'target', 'scheduled', 'measured', and 'ack_ms', 'error' or 'shed'}
+        self.calls = {}
+
+    def run(self):
+        channels = [grpc.insecure_channel(address) for address in self.addresses]
+        stubs = [gossip_pb2_grpc.GossipServiceStub(channel) for channel in channels]
+        total = int(self.rate * (self.warmup + self.duration))
+        start = time.perf_counter() + 0.05
+        threads = [threading.Thread(target=self._client, args=(client, stubs, total, start), daemon=True)
+                   for client in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with self._lock:
+            self._sent_all = True
+            if self._in_flight == 0:
+                self._drained.set()
+        # Wait for the outstanding acks, then give up on the rest before the channels go away
+        self._drained.wait(self.drain_timeout)
+        for future in self._futures:
+            future.cancel()
+        for channel in channels:
+            channel.close()
+        return self.calls
+
+    def _client(self, client, stubs, total, start):
+        interval = 1.0 / self.rate
+        # Client c sends messages c, c + concurrency, ... so together they keep the overall rate
+        for index in range(client, total, self.concurrency):
+            scheduled = start + index * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            target = index % len(stubs)
+            message = make_message(self.prefix, index, self.size)
+            call = {'target': self.addresses[target], 'scheduled': scheduled,
+                    'measured': index * interval >= self.warmup}
+            with self._lock:
+                self.calls[message] = call
+                if self._in_flight >= self.max_in_flight:
+                    call['shed'] = True
+                    continue
+                self._in_flight += 1
+            future = stubs[target].SendMessage.future(gossip_pb2.GossipMessage(
+                message=message,
+                sender_id=self.addresses[target],
+                timestamp=time.time_ns()
+            ))
+            self._futures.append(future)
+            future.add_done_callback(lambda f, call=call: self._done(f, call))
+
+    def _done(self, future, call):
+        done = time.perf_counter()
+        with self._lock:
+            if future.cancelled():
+                call['error'] = 'CANCELLED'
+            elif future.exception() is not None:
+                call['error'] = future.exception().code().name
+            else:
+                call['ack_ms'] = (done - call['scheduled']) * 1e3
+            self._in_flight -= 1
+            if self._sent_all and self._in_flight == 0:
+                self._drained.set()
+
+
+def propagation(events, num_nodes):
+    """Per message: time from its initiation to its last first-receipt (ms) and the nodes that got it."""
+    initiated = {}
+    received = {}
+    for event in events:
+        if event.get('event_type') == 'initiate':
+            initiated[event['message']] = event['received_timestamp']
+        elif event.get('event_type') == 'received':
+            received.setdefault(event['message'], []).append(event['received_timestamp'])
+    results = {}
+    for message, initiated_timestamp in initiated.items():
+        timestamps = received.get(message, [])
+        last = max(timestamps) if timestamps else initiated_timestamp
+        results[message] = {'propagation_ms': (last - initiated_timestamp) / 1e6,
+                            'coverage': (len(timestamps) + 1) / num_nodes}
+    return results
+
+
+def run_scenario(cluster, rate, size, concurrency, duration, warmup, settle, max_in_flight=1000):
+    """Runs one load level and returns its result dict."""
+    cluster.drain_events()
+    generator = LoadGenerator(cluster.addresses, rate, duration, size, concurrency, warmup, max_in_flight)
+    calls = generator.run()
+    time.sleep(settle)
+    spread = propagation(cluster.drain_events(), cluster.num_nodes)
+
+    measured = {message: call for message, call in calls.items() if call['measured']}
+    acks = [call['ack_ms'] for call in measured.values() if 'ack_ms' in call]
+    errors = {}
+    for call in measured.values():
+        if 'error' in call:
+            errors[call['error']] = errors.get(call['error'], 0) + 1
+    propagated = [spread[message] for message in measured if message in spread]
+    shed = sum('shed' in call for call in measured.values())
+    return {
+        'rate': rate,
+        'size': size,
+        'concurrency': concurrency,
+        'duration': duration,
+        'sent': len(measured) - shed,
+        'shed': shed,
+        'acked': len(acks),
+        'errors': errors,
+        # Acknowledged messages per second of the measured window
+        'throughput': len(acks) / duration,
+        'ack_ms': latency_summary(acks),
+        'propagation_ms': latency_summary([entry['propagation_ms'] for entry in propagated]),
+        'coverage': sum(entry['coverage'] for entry in propagated) / len(propagated) if propagated else 0.0,
+    }
+
+
+def scenario_key(scenario):
+    return scenario['rate'], scenario['size'], scenario['concurrency']
+
+
+def lookup(result, path):
+    for part in path.split('.'):
+        result = result.get(part) if isinstance(result, dict) else None
+    return result
+
+
+def compare(baseline, current, tolerance=0.1, min_delta_ms=0.5):
+    """
+    Compares the scenarios both runs have in common. Returns one dict per
+    compared metric, with 'regression' set when it got worse by more than
+    `tolerance` (relative) and, for latencies, by more than min_delta_ms.
+    """
+    baseline_scenarios = {scenario_key(scenario): scenario for scenario in baseline['scenarios']}
+    rows = []
+    for scenario in current['scenarios']:
+        reference = baseline_scenarios.get(scenario_key(scenario))
+        if reference is None:
+            continue
+        for path, higher_is_better in COMPARED:
+            old, new = lookup(reference, path), lookup(scenario, path)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else 0.0
+            worse = -change if higher_is_better else change
+            regression = worse > tolerance and (higher_is_better or new - old > min_delta_ms)
+            rows.append({'rate': scenario['rate'], 'size': scenario['size'], 'concurrency': scenario['concurrency'],
+                         'metric': path, 'baseline': old, 'current': new, 'change': change,
+                         'regression': regression})
+    return rows
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {'git_commit': commit, 'python': platform.python_version(), 'grpc': grpc.__version__,
+            'platform': platform.platform(), 'cpus': os.cpu_count()}
+
+
+def run_benchmark(num_nodes, rates, sizes, concurrencies, duration=5.0, warmup=1.0, settle=1.0, base_port=7000,
+                  node_mode='sync', processes=1, env=None, quiet=True, max_in_flight=1000):
+    """Runs every (rate, size, concurrency) combination against one local cluster; returns the report."""
+    with contextlib.redirect_stdout(open(os.devnull, 'w')) if quiet else contextlib.nullcontext():
+        cluster = LocalCluster(num_nodes, base_port=base_port, node_mode=node_mode, processes=processes, env=env,
+                               quiet=quiet)
+        try:
+            scenarios = [run_scenario(cluster, rate, size, concurrency, duration, warmup, settle, max_in_flight)
+                         for rate, size, concurrency in itertools.product(rates, sizes, concurrencies)]
+        finally:
+            cluster.stop()
+    return {
+        'benchmark': 'SendMessage',
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': environment(),
+        'cluster': {'num_nodes': num_nodes, 'node_mode': node_mode, 'processes': processes, 'env': dict(env or {}),
+                    'max_in_flight': max_in_flight},
+        'scenarios': scenarios,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Open-loop SendMessage benchmark against local nodes.")
+    parser.add_argument('--num_nodes', type=int, default=10, help="Number of local nodes")
+    parser.add_argument('--rates', type=float, nargs='+', default=[50.0], help="Messages per second to initiate")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[64], help="Message sizes in bytes")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1], help="Client threads sharing the rate")
+    parser.add_argument('--duration', type=float, default=5.0, help="Measured seconds per scenario")
+    parser.add_argument('--warmup', type=float, default=1.0, help="Unmeasured seconds before each scenario")
+    parser.add_argument('--settle', type=float, default=1.0, help="Seconds to let propagation finish")
+    parser.add_argument('--max_in_flight', type=int, default=1000,
+                        help="Outstanding calls above which sends are shed instead of queued")
+    parser.add_argument('--base_port', type=int, default=7000, help="Port of the first node (others follow)")
+    parser.add_argument('--node_mode', choices=['sync', 'aio'], default='sync', help="Node implementation")
+    parser.add_argument('--processes', type=int, default=1, help="Worker processes to spread the nodes over")
+    parser.add_argument('--set', action='append', default=[],
+                        help="Node environment overrides in KEY=VALUE format (e.g. FANOUT_CONCURRENCY=8)")
+    parser.add_argument('--output', default=None, help="JSON file for the results (default: stdout)")
+    parser.add_argument('--baseline', default=None, help="Earlier results JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help="Relative change that counts as a regression (default 0.1 = 10%%)")
+    parser.add_argument('--min_delta_ms', type=float, default=0.5,
+                        help="Latency changes below this many ms are never regressions")
+    args = parser.parse_args()
+
+    env = {}
+    for s in args.set:
+        key, value = s.split('=', 1)
+        env[key] = value
+
+    report = run_benchmark(args.num_nodes, args.rates, args.sizes, args.concurrency, duration=args.duration,
+                           warmup=args.warmup, settle=args.settle, base_port=args.base_port,
+                           node_mode=args.node_mode, processes=args.processes, env=env,
+                           max_in_flight=args.max_in_flight)
+    if args.output:
+        with open(args.output, 'w') as out:
+            json.dump(report, out, indent=2)
+        print(f"Wrote {len(report['scenarios'])} scenarios to {args.output}", flush=True)
+    else:
+        print(json.dumps(report, indent=2), flush=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('cluster') != report['cluster']:
+            print(f"Warning: the baseline ran on a different cluster setup: {baseline.get('cluster')}", flush=True)
+        rows = compare(baseline, report, args.tolerance, args.min_delta_ms)
+        for row in rows:
+            print(json.dumps(row), flush=True)
+        regressions = [row for row in rows if row['regression']]
+        print(f"{len(regressions)} regressions in {len(rows)} compared metrics", flush=True)
+        sys.exit(1 if regressions else 0)
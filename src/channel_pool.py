@@ -0,0 +1,68 @@
+import re
+import threading
+import grpc
+import gossip_pb2_grpc
+
+_IPV4_WITH_PORT = re.compile(r'^\d+\.\d+\.\d+\.\d+:\d+$')
+
+
+def peer_target(peer_ip, port):
+    """gRPC target of a peer: pod IPs use the shared port, 'ip:port' IDs (local harness) are used as-is."""
+    if _IPV4_WITH_PORT.match(peer_ip):
+        return peer_ip
+    return f"{peer_ip}:{port}"
+
+
+class ChannelPool:
+    """
+    Keeps one gRPC channel (and stub) per peer IP for the lifetime of a Node,
+    so the TCP/HTTP2 handshake is paid once per peer instead of once per message.
+    Channels are opened lazily, evicted by the caller when a call fails with
+    UNAVAILABLE (the next send reconnects) and evicted when the peer leaves
+    the neighbour list. The active health check is the Node's warm-up: it
+    calls Status on every peer through this pool before the node reports
+    ready, which connects the channels and evicts the unreachable ones.
+    """
+
+    def __init__(self, port='5050'):
+        self.port = port
+        self._lock = threading.Lock()
+        # peer_ip -> (channel, stub)
+        self._entries = {}
+
+    def get_stub(self, peer_ip):
+        """Returns a stub for the peer, connecting lazily if needed."""
+        with self._lock:
+            entry = self._entries.get(peer_ip)
+            if entry is None:
+                channel = grpc.insecure_channel(peer_target(peer_ip, self.port))
+                entry = (channel, gossip_pb2_grpc.GossipServiceStub(channel))
+                self._entries[peer_ip] = entry
+            return entry[1]
+
+    def evict(self, peer_ip):
+        """Closes and forgets the channel to a peer; the next send reconnects."""
+        with self._lock:
+            self._close_entry(peer_ip)
+
+    def retain(self, peer_ips):
+        """Evicts channels to every peer that is not in peer_ips (e.g. pods that left)."""
+        keep = set(peer_ips)
+        with self._lock:
+            for peer_ip in [ip for ip in self._entries if ip not in keep]:
+                self._close_entry(peer_ip)
+
+    def close(self):
+        with self._lock:
+            for peer_ip in list(self._entries):
+                self._close_entry(peer_ip)
+
+    def _close_entry(self, peer_ip):
+        # Caller must hold self._lock
+        entry = self._entries.pop(peer_ip, None)
+        if entry is not None:
+            entry[0].close()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,86 @@
+import random
+import threading
+import time
+import grpc
+
+# Status codes worth another attempt: the peer may answer a moment later.
+# SendMessage can be retried safely, receivers drop the copy as a duplicate.
+RETRYABLE_CODES = (grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED,
+                   grpc.StatusCode.RESOURCE_EXHAUSTED)
+
+
+def backoff_delay(attempt, base, cap, rng=random):
+    """Full-jitter exponential backoff (seconds) before retry number attempt + 1."""
+    return rng.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class PeerCircuitBreaker:
+    """
+    Per-peer circuit breaker for the fan-out. After failure_threshold
+    consecutive failed sends a peer's circuit opens and the peer is skipped
+    for reset_timeout seconds. Then a single trial send is let through
+    (half-open): success closes the circuit, failure opens it again.
+    failure_threshold=0 disables it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=10.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        # peer -> {'state': 'closed' | 'open' | 'half_open', 'failures', 'opened_at'}
+        self._peers = {}
+
+    def allow(self, peer):
+        """
+        Returns (allowed, transition): whether a send to the peer may go out,
+        and 'half_open' when this send is the trial after the reset timeout.
+        """
+        if not self.failure_threshold:
+            return True, None
+        with self._lock:
+            entry = self._peers.get(peer)
+            if entry is None or entry['state'] == 'closed':
+                return True, None
+            if entry['state'] == 'open' and self.clock() - entry['opened_at'] >= self.reset_timeout:
+                entry['state'] = 'half_open'
+                return True, 'half_open'
+            # Open, or half-open with the trial still running
+            return False, None
+
+    def record(self, peer, success):
+        """Records the outcome of a send; returns 'open' or 'closed' when the circuit changed state."""
+        if not self.failure_threshold:
+            return None
+        with self._lock:
+            entry = self._peers.setdefault(peer, {'state': 'closed', 'failures': 0, 'opened_at': 0.0})
+            if success:
+                entry['failures'] = 0
+                if entry['state'] != 'closed':
+                    entry['state'] = 'closed'
+                    return 'closed'
+                return None
+            entry['failures'] += 1
+            if entry['state'] == 'half_open' or (entry['state'] == 'closed'
+                                                 and entry['failures'] >= self.failure_threshold):
+                entry['state'] = 'open'
+                entry['opened_at'] = self.clock()
+                return 'open'
+            return None
+
+    def failures(self, peer):
+        with self._lock:
+            entry = self._peers.get(peer)
+            return entry['failures'] if entry is not None else 0
+
+    def open_peers(self):
+        """Peers whose circuit is not closed."""
+        with self._lock:
+            return sorted(peer for peer, entry in self._peers.items() if entry['state'] != 'closed')
+
+    def retain(self, peers):
+        """Forgets the peers that left the neighbour list."""
+        keep = set(peers)
+        with self._lock:
+            for peer in [peer for peer in self._peers if peer not in keep]:
+                del self._peers[peer]
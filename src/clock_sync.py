@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import deque
+
+# Uncertainty (ms) up to which a latency is rated 'good' / 'fair'; anything above is 'poor'
+GOOD_MS = 1.0
+FAIR_MS = 10.0
+
+
+def quality(uncertainty_ms):
+    """Quality indicator of a latency with the given uncertainty (None: no estimate)."""
+    if uncertainty_ms is None:
+        return 'none'
+    if uncertainty_ms <= GOOD_MS:
+        return 'good'
+    if uncertainty_ms <= FAIR_MS:
+        return 'fair'
+    return 'poor'
+
+
+class ClockOffsets:
+    """
+    Per-peer estimates of (peer clock - local clock), from NTP-style
+    timestamp exchanges piggybacked on the gossip RPCs. The caller stamps
+    t1 when sending and t4 when the reply arrives; the peer returns t2
+    (received) and t3 (replied) on its own clock, plus its processing time
+    on its monotonic clock:
+
+        offset = ((t2 - t1) + (t3 - t4)) / 2
+        rtt = (t4 - t1 on the local monotonic clock) - processing
+
+    Like NTP's clock filter, the sample with the lowest round trip among
+    the last `window` of a peer is used: its offset error is bounded by half
+    of that round trip. Samples older than max_age seconds are ignored.
+    """
+
+    def __init__(self, window=8, max_age=300.0, clock=time.monotonic):
+        self.window = max(1, int(window))
+        self.max_age = max_age
+        self.clock = clock
+        self._lock = threading.Lock()
+        # peer -> deque of (offset_ns, rtt_ns, sampled_at)
+        self._samples = {}
+
+    def add(self, peer, t1, t2, t3, t4, rtt_ns):
+        """Records one exchange (wall-clock ns timestamps, monotonic round trip in ns)."""
+        if not t2 or not t3 or rtt_ns < 0:
+            # The peer did not stamp its reply
+            return
+        offset_ns = ((t2 - t1) + (t3 - t4)) / 2
+        with self._lock:
+            samples = self._samples.get(peer)
+            if samples is None:
+                samples = self._samples[peer] = deque(maxlen=self.window)
+            samples.append((offset_ns, rtt_ns, self.clock()))
+
+    def estimate(self, peer):
+        """
+        Best current estimate for a peer as {'offset_ms', 'rtt_ms',
+        'jitter_ms', 'samples'}, or None. jitter_ms is half the spread of the
+        round trips in the window (half the round trip with a single sample).
+        """
+        now = self.clock()
+        with self._lock:
+            samples = [sample for sample in self._samples.get(peer, ()) if now - sample[2] <= self.max_age]
+        if not samples:
+            return None
+        offset_ns, rtt_ns, _ = min(samples, key=lambda sample: sample[1])
+        rtts = [sample[1] for sample in samples]
+        spread_ns = max(rtts) - min(rtts) if len(rtts) > 1 else rtt_ns
+        return {'offset_ms': offset_ns / 1e6, 'rtt_ms': rtt_ns / 1e6, 'jitter_ms': spread_ns / 2e6,
+                'samples': len(samples)}
+
+    def piggyback(self, peer):
+        """(offset_ms, rtt_ms) to send along to a peer: its clock relative to ours, (0, 0) if unknown."""
+        estimate = self.estimate(peer)
+        if estimate is None:
+            return 0.0, 0.0
+        return estimate['offset_ms'], estimate['rtt_ms']
+
+    def correct(self, peer, latency_ms, remote_offset_ms=0.0, remote_rtt_ms=0.0):
+        """
+        Latency fields for an event whose latency_ms was computed as local
+        receive time minus the peer's send timestamp. Uses the local estimate
+        for the peer, or the one the peer piggybacked (its view of our clock
+        relative to its own), whichever has the lower round trip.
+        """
+        estimate = self.estimate(peer)
+        skew_ms = rtt_ms = None
+        if estimate is not None:
+            # local - peer
+            skew_ms, rtt_ms = -estimate['offset_ms'], estimate['rtt_ms']
+        if remote_rtt_ms > 0 and (rtt_ms is None or remote_rtt_ms < rtt_ms):
+            skew_ms, rtt_ms = remote_offset_ms, remote_rtt_ms
+        if skew_ms is None:
+            return {'corrected_propagation_time': None, 'corrected_quality': 'none', 'clock_offset': None,
+                    'clock_uncertainty': None}
+        return {
+            'corrected_propagation_time': latency_ms - skew_ms,
+            'corrected_quality': quality(rtt_ms / 2),
+            'clock_offset': skew_ms,
+            'clock_uncertainty': rtt_ms / 2,
+        }
+
+    def snapshot(self):
+        """Current estimate of every peer, {peer: estimate}."""
+        with self._lock:
+            peers = list(self._samples)
+        estimates = {peer: self.estimate(peer) for peer in peers}
+        return {peer: estimate for peer, estimate in estimates.items() if estimate is not None}
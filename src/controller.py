@@ -0,0 +1,102 @@
+import re
+import select
+import subprocess
+import threading
+import time
+import grpc
+import gossip_pb2
+import gossip_pb2_grpc
+
+_FORWARDING = re.compile(r'Forwarding from 127\.0\.0\.1:(\d+)')
+
+
+def message_to_dict(message):
+    """Every field of a protobuf message as a dict (nested messages and repeated fields included)."""
+    result = {}
+    for field in message.DESCRIPTOR.fields:
+        value = getattr(message, field.name)
+        repeated = field.label == field.LABEL_REPEATED
+        if field.message_type is not None:
+            value = [message_to_dict(item) for item in value] if repeated else message_to_dict(value)
+        elif repeated:
+            value = list(value)
+        result[field.name] = value
+    return result
+
+
+class PortForward:
+    """
+    Long-lived `kubectl port-forward` to one pod's gRPC port, so the test
+    driver outside the cluster keeps a single connection into it.
+    """
+
+    def __init__(self, pod_name, namespace='default', remote_port=5050, timeout=30.0):
+        self.pod_name = pod_name
+        self.process = subprocess.Popen(['kubectl', 'port-forward', '-n', namespace, f'pod/{pod_name}',
+                                         f':{remote_port}'],
+                                        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        self.address = None
+        deadline = time.monotonic() + timeout
+        while self.address is None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self.process.poll() is not None:
+                self.close()
+                raise RuntimeError(f"Port-forward to {pod_name} failed: {self.process.stderr.read()}")
+            if select.select([self.process.stdout], [], [], remaining)[0]:
+                match = _FORWARDING.search(self.process.stdout.readline())
+                if match:
+                    self.address = f'127.0.0.1:{match.group(1)}'
+        # Keep draining kubectl's "Handling connection" lines so its pipe never fills up
+        threading.Thread(target=self.process.stdout.read, name='port-forward', daemon=True).start()
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class GossipController:
+    """
+    Starts gossip through a node's Trigger RPC over one persistent channel
+    and returns the structured result. `address` is any node reachable from
+    here: a PortForward into the cluster or a local harness node.
+    """
+
+    def __init__(self, address):
+        self.address = address
+        self.channel = grpc.insecure_channel(address)
+        self.stub = gossip_pb2_grpc.GossipServiceStub(self.channel)
+
+    def trigger(self, target, message, quiesce_timeout=60.0, settle_ms=100, payload_size=0):
+        """
+        Makes `target` initiate `message` (with a random payload of
+        payload_size bytes), then waits up to quiesce_timeout seconds for
+        every node to go idle. Returns the TriggerResult as a dict (its
+        'convergence' entry is the receipt-based ConvergenceReport).
+        """
+        result = self.stub.Trigger(gossip_pb2.TriggerRequest(
+            target=target,
+            message=message,
+            quiesce_timeout_ms=int(quiesce_timeout * 1e3),
+            settle_ms=int(settle_ms),
+            payload_size=payload_size,
+        ))
+        return message_to_dict(result)
+
+    def convergence(self, message, wait=0.0):
+        """
+        ConvergenceReport of a message tracked by this node (its initiator or
+        the aggregator) as a dict, waiting up to `wait` seconds for stragglers.
+        """
+        report = self.stub.GetConvergence(gossip_pb2.ConvergenceRequest(message=message, wait_ms=int(wait * 1e3)),
+                                          timeout=wait + 5.0)
+        return message_to_dict(report)
+
+    def close(self):
+        self.channel.close()
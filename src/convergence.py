@@ -0,0 +1,133 @@
+import threading
+from collections import OrderedDict
+
+
+class ReceiptReporter:
+    """
+    Coalesces first-receipt reports per destination (the message's
+    initiator, or an aggregator node) and hands them to send(destination,
+    receipts) from a background thread, flush_interval seconds after the
+    first pending receipt or as soon as batch_size of them are queued.
+    The receive path only appends to a list.
+    """
+
+    def __init__(self, send, flush_interval=0.05, batch_size=256):
+        self._send = send
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, int(batch_size))
+        self._cond = threading.Condition()
+        # destination -> [Receipt]
+        self._pending = {}
+        self._full = False
+        self._stopped = False
+        self._thread = None
+
+    def add(self, destination, receipt):
+        with self._cond:
+            batch = self._pending.setdefault(destination, [])
+            batch.append(receipt)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='receipts', daemon=True)
+                self._thread.start()
+            if len(batch) >= self.batch_size:
+                self._full = True
+            self._cond.notify_all()
+
+    def close(self):
+        """Sends whatever is still queued and stops the background thread."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                # Let more receipts join the batch for one flush interval, unless one fills up
+                self._cond.wait_for(lambda: self._stopped or self._full, self.flush_interval)
+                batches, self._pending, self._full = self._pending, {}, False
+                stopped = self._stopped
+            for destination, receipts in batches.items():
+                try:
+                    self._send(destination, receipts)
+                except Exception as e:
+                    print(f"Failed to report {len(receipts)} receipts to {destination}: {e}", flush=True)
+            if stopped:
+                return
+
+
+class ConvergenceTracker:
+    """
+    First receipts of the messages this node initiated (or aggregates for
+    the cluster), reported as the convergence time (latest first receipt
+    minus the initiation time), the coverage of the nodes known when the
+    message started, and the nodes that have not reported yet.
+    Timestamps come from each receiver's own clock, like the test CSVs.
+    Only the latest max_messages messages are kept.
+    """
+
+    def __init__(self, max_messages=1000):
+        self.max_messages = max(1, int(max_messages))
+        self._cond = threading.Condition()
+        # message -> {'origin', 'initiated', 'nodes', 'receipts': {receiver: received_timestamp}}
+        self._messages = OrderedDict()
+
+    def begin(self, message, origin, initiated_timestamp, nodes):
+        """Starts tracking a message initiated by `origin`; `nodes` are the nodes expected to receive it."""
+        with self._cond:
+            entry = self._entry(message)
+            entry['origin'] = origin
+            entry['initiated'] = initiated_timestamp
+            entry['nodes'] = set(nodes) | {origin}
+            entry['receipts'].setdefault(origin, initiated_timestamp)
+            self._cond.notify_all()
+
+    def record(self, message, receiver, received_timestamp):
+        """Records one receipt (they may arrive before begin() on an aggregator)."""
+        with self._cond:
+            receipts = self._entry(message)['receipts']
+            if receiver not in receipts or received_timestamp < receipts[receiver]:
+                receipts[receiver] = received_timestamp
+            self._cond.notify_all()
+
+    def report(self, message, timeout=0):
+        """
+        Convergence of the message, waiting up to `timeout` seconds for every
+        expected node to report. Keys match the ConvergenceReport fields.
+        """
+        with self._cond:
+            if timeout > 0:
+                self._cond.wait_for(lambda: self._complete(message), timeout)
+            entry = self._messages.get(message)
+            if entry is None or entry['initiated'] is None:
+                return {'message': message, 'known': False}
+            receipts = entry['receipts']
+            expected = entry['nodes'] | set(receipts)
+            stragglers = sorted(entry['nodes'] - set(receipts))
+            return {
+                'message': message,
+                'known': True,
+                'origin': entry['origin'],
+                'expected': len(expected),
+                'covered': len(receipts),
+                'coverage': len(receipts) / len(expected),
+                'convergence_ms': (max(receipts.values()) - entry['initiated']) / 1e6,
+                'complete': not stragglers,
+                'stragglers': stragglers,
+            }
+
+    def _complete(self, message):
+        entry = self._messages.get(message)
+        return entry is not None and entry['initiated'] is not None and entry['nodes'] <= entry['receipts'].keys()
+
+    def _entry(self, message):
+        # Caller must hold self._cond
+        entry = self._messages.get(message)
+        if entry is None:
+            entry = self._messages[message] = {'origin': None, 'initiated': None, 'nodes': set(), 'receipts': {}}
+            while len(self._messages) > self.max_messages:
+                self._messages.popitem(last=False)
+        return entry
@@ -0,0 +1,54 @@
+import random
+import threading
+
+# Supported values of GOSSIP_MODE
+GOSSIP_MODES = ('direct', 'push', 'pull', 'push-pull')
+
+
+def select_peers(peer_ips, fanout, rng=random):
+    """Picks up to `fanout` distinct peers uniformly at random."""
+    if fanout >= len(peer_ips):
+        return list(peer_ips)
+    return rng.sample(list(peer_ips), fanout)
+
+
+class RumorStore:
+    """
+    Messages a node is still actively spreading in the pull modes, with the
+    path length they arrived with and the node that initiated them. A rumor stays active for `ttl` gossip
+    rounds after it was first accepted, then it is only kept in the seen cache.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # message -> [hops, age in rounds, origin]
+        self._rumors = {}
+
+    def add(self, message, hops, origin=''):
+        with self._lock:
+            if message not in self._rumors:
+                self._rumors[message] = [hops, 0, origin]
+
+    def age(self):
+        """Advances every rumor by one round and drops the ones that reached the TTL."""
+        with self._lock:
+            for message in list(self._rumors):
+                entry = self._rumors[message]
+                entry[1] += 1
+                if entry[1] >= self.ttl:
+                    del self._rumors[message]
+
+    def ids(self):
+        with self._lock:
+            return list(self._rumors)
+
+    def missing_from(self, known):
+        """Returns [(message, hops, origin)] for the active rumors that are not in `known`."""
+        known = set(known)
+        with self._lock:
+            return [(message, entry[0], entry[2]) for message, entry in self._rumors.items() if message not in known]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._rumors)
@@ -0,0 +1,247 @@
+import argparse
+import base64
+import csv
+import json
+import struct
+import sys
+import event_log_pb2
+
+# Columns of the exported test CSVs (test-*-10X.csv, *-100X.csv)
+CSV_COLUMNS = ['sender_id', 'receiver_id', 'message', 'event_type', 'received_timestamp', 'propagation_time',
+               'detail']
+HOP_COLUMNS = ['round', 'path_length']
+# Clock-offset-corrected latency fields of the 'received' events
+CLOCK_COLUMNS = ['corrected_propagation_time', 'corrected_quality', 'clock_offset', 'clock_uncertainty']
+_CLOCK_VALUES = ['corrected_propagation_time', 'clock_offset', 'clock_uncertainty']
+_QUALITY_FIELDS = ['corrected_quality']
+# Topology tier of the sender (TOPOLOGY_MODE other than 'off')
+TOPOLOGY_COLUMNS = ['tier']
+
+EVENT_TYPES = {
+    'initiate': event_log_pb2.INITIATE,
+    'received': event_log_pb2.RECEIVED,
+    'duplicate': event_log_pb2.DUPLICATE,
+    'fanout': event_log_pb2.FANOUT,
+}
+EVENT_TYPE_NAMES = {code: name for name, code in EVENT_TYPES.items()}
+
+QUALITIES = {
+    'none': event_log_pb2.QUALITY_NONE,
+    'good': event_log_pb2.QUALITY_GOOD,
+    'fair': event_log_pb2.QUALITY_FAIR,
+    'poor': event_log_pb2.QUALITY_POOR,
+}
+QUALITY_NAMES = {code: name for name, code in QUALITIES.items()}
+
+TIERS = {
+    'unknown': event_log_pb2.TIER_UNKNOWN,
+    'zone': event_log_pb2.TIER_ZONE,
+    'region': event_log_pb2.TIER_REGION,
+    'remote': event_log_pb2.TIER_REMOTE,
+}
+TIER_NAMES = {code: name for name, code in TIERS.items()}
+
+# 4-byte big-endian length prefix in front of every serialized EventBatch
+_FRAME_HEADER = struct.Struct('>I')
+
+
+def encode_events(events):
+    """
+    Encodes gossip events (the dicts built by Node._log_event) into one
+    EventBatch. The 'detail' text is not kept. Returns (batch, others),
+    where `others` are the records that are not gossip events.
+    """
+    batch = event_log_pb2.EventBatch()
+    node_index = {}
+    message_index = {}
+    others = []
+
+    def intern(table, index, value):
+        if value not in index:
+            index[value] = len(table)
+            table.append(value)
+        return index[value]
+
+    for event in events:
+        event_type = EVENT_TYPES.get(event.get('event_type'))
+        if event_type is None:
+            others.append(event)
+            continue
+        if not batch.events:
+            batch.base_timestamp = int(event['received_timestamp'])
+        record = batch.events.add(
+            event_type=event_type,
+            sender=intern(batch.nodes, node_index, event['sender_id']),
+            receiver=intern(batch.nodes, node_index, event['receiver_id']),
+            message=intern(batch.messages, message_index, event['message']),
+            timestamp_delta=int(event['received_timestamp']) - batch.base_timestamp,
+        )
+        if event.get('propagation_time') is not None:
+            record.propagation_time = event['propagation_time']
+        if event.get('round') is not None:
+            record.round = event['round']
+        if event.get('path_length') is not None:
+            record.path_length = event['path_length']
+        for field in _CLOCK_VALUES:
+            if event.get(field) is not None:
+                setattr(record, field, event[field])
+        for field in _QUALITY_FIELDS:
+            if field in event:
+                setattr(record, field, QUALITIES[event[field]])
+        if 'tier' in event:
+            record.tier = TIERS[event['tier']]
+    return batch, others
+
+
+def decode_batch(data):
+    """Decodes a serialized EventBatch back into event dicts with the CSV columns."""
+    batch = event_log_pb2.EventBatch.FromString(data)
+    events = []
+    for record in batch.events:
+        event = {
+            'sender_id': batch.nodes[record.sender],
+            'receiver_id': batch.nodes[record.receiver],
+            'message': batch.messages[record.message],
+            'event_type': EVENT_TYPE_NAMES[record.event_type],
+            'received_timestamp': batch.base_timestamp + record.timestamp_delta,
+            'propagation_time': record.propagation_time if record.HasField('propagation_time') else None,
+            'detail': '',
+        }
+        if record.HasField('round'):
+            event['round'] = record.round
+        if record.HasField('path_length'):
+            event['path_length'] = record.path_length
+        if record.event_type == event_log_pb2.RECEIVED:
+            for field in _CLOCK_VALUES:
+                event[field] = getattr(record, field) if record.HasField(field) else None
+            for field in _QUALITY_FIELDS:
+                event[field] = QUALITY_NAMES[getattr(record, field)]
+        if record.HasField('tier'):
+            event['tier'] = TIER_NAMES[record.tier]
+        events.append(event)
+    return events
+
+
+class CompactStdoutSink:
+    """
+    EventLogger sink that writes each batch as a single JSON line
+    {"event_batch": "<base64 EventBatch>"}, so it still travels through
+    stdout/fluentd/BigQuery like the JSON events do.
+    """
+
+    def write(self, events):
+        batch, others = encode_events(events)
+        lines = [json.dumps(other) + '\n' for other in others]
+        if batch.events:
+            lines.append(json.dumps({'event_batch': base64.b64encode(batch.SerializeToString()).decode()}) + '\n')
+        sys.stdout.write(''.join(lines))
+        sys.stdout.flush()
+
+    def close(self):
+        sys.stdout.flush()
+
+
+class CompactFileSink:
+    """EventLogger sink that appends length-prefixed EventBatch frames to a local file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'ab')
+
+    def write(self, events):
+        batch, others = encode_events(events)
+        if others:
+            # Non-gossip records (stats, drops) are not part of the schema
+            sys.stdout.write(''.join(json.dumps(other) + '\n' for other in others))
+            sys.stdout.flush()
+        if batch.events:
+            data = batch.SerializeToString()
+            self._file.write(_FRAME_HEADER.pack(len(data)) + data)
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def read_frames(path):
+    """Yields the serialized EventBatches of a CompactFileSink file."""
+    with open(path, 'rb') as f:
+        while True:
+            header = f.read(_FRAME_HEADER.size)
+            if len(header) < _FRAME_HEADER.size:
+                return
+            (length,) = _FRAME_HEADER.unpack(header)
+            yield f.read(length)
+
+
+def read_json_lines(path):
+    """Yields the serialized EventBatches found in a JSON-lines log (other lines are skipped)."""
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line.startswith('{'):
+                continue
+            record = json.loads(line)
+            record = record.get('jsonPayload', record)
+            if 'event_batch' in record:
+                yield base64.b64decode(record['event_batch'])
+
+
+def read_csv_export(path):
+    """Yields the serialized EventBatches of a BigQuery CSV export with an event_batch column."""
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            value = row.get('event_batch') or row.get('jsonPayload.event_batch')
+            if value:
+                yield base64.b64decode(value)
+
+
+def decode_file(path, input_format=None):
+    """Decodes every event in a compact log file."""
+    if input_format is None:
+        input_format = 'frames' if path.endswith('.bin') else 'csv' if path.endswith('.csv') else 'jsonl'
+    readers = {'frames': read_frames, 'jsonl': read_json_lines, 'csv': read_csv_export}
+    events = []
+    for data in readers[input_format](path):
+        events.extend(decode_batch(data))
+    return events
+
+
+def write_csv(events, out):
+    """
+    Writes events with the same columns as the exported test CSVs and returns
+    the number of rows. Records without an event_type (seen_cache_stats,
+    warmup, ...) have no place in those columns and are skipped.
+    """
+    events = [event for event in events if 'event_type' in event]
+    columns = list(CSV_COLUMNS)
+    if any('round' in event or 'path_length' in event for event in events):
+        columns += HOP_COLUMNS
+    if any('corrected_quality' in event for event in events):
+        columns += CLOCK_COLUMNS
+    if any('tier' in event for event in events):
+        columns += TOPOLOGY_COLUMNS
+    writer = csv.DictWriter(out, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    for event in events:
+        writer.writerow(event)
+    return len(events)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Decode compact gossip event logs into the test CSV columns.")
+    parser.add_argument('input', nargs='+', help="Compact log files (.bin frames, JSON lines or BigQuery .csv)")
+    parser.add_argument('--input-format', choices=['frames', 'jsonl', 'csv'], default=None,
+                        help="Input format (default: guessed from the file extension)")
+    parser.add_argument('--output', default='-', help="CSV file to write (default: stdout)")
+    args = parser.parse_args()
+
+    events = []
+    for path in args.input:
+        events.extend(decode_file(path, args.input_format))
+    if args.output == '-':
+        write_csv(events, sys.stdout)
+    else:
+        with open(args.output, 'w', newline='') as out:
+            rows = write_csv(events, out)
+        print(f"Decoded {rows} events into {args.output}", flush=True)
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: event_log.proto
+# Protobuf Python Version: 4.25.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0f\x65vent_log.proto\x12\x06gossip\"\x97\x04\n\x0b\x45ventRecord\x12%\n\nevent_type\x18\x01 \x01(\x0e\x32\x11.gossip.EventType\x12\x0e\n\x06sender\x18\x02 \x01(\r\x12\x10\n\x08receiver\x18\x03 \x01(\r\x12\x0f\n\x07message\x18\x04 \x01(\r\x12\x17\n\x0ftimestamp_delta\x18\x05 \x01(\x12\x12\x1d\n\x10propagation_time\x18\x06 \x01(\x01H\x00\x88\x01\x01\x12\x12\n\x05round\x18\x07 \x01(\x05H\x01\x88\x01\x01\x12\x18\n\x0bpath_length\x18\x08 \x01(\x05H\x02\x88\x01\x01\x12\'\n\x1a\x63orrected_propagation_time\x18\t \x01(\x01H\x03\x88\x01\x01\x12\x31\n\x11\x63orrected_quality\x18\n \x01(\x0e\x32\x16.gossip.LatencyQuality\x12\x19\n\x0c\x63lock_offset\x18\x0b \x01(\x01H\x04\x88\x01\x01\x12\x1e\n\x11\x63lock_uncertainty\x18\x0c \x01(\x01H\x05\x88\x01\x01\x12\'\n\x04tier\x18\x0f \x01(\x0e\x32\x14.gossip.TopologyTierH\x06\x88\x01\x01\x42\x13\n\x11_propagation_timeB\x08\n\x06_roundB\x0e\n\x0c_path_lengthB\x1d\n\x1b_corrected_propagation_timeB\x0f\n\r_clock_offsetB\x14\n\x12_clock_uncertaintyB\x07\n\x05_tierJ\x04\x08\r\x10\x0eJ\x04\x08\x0e\x10\x0f\"j\n\nEventBatch\x12\x16\n\x0e\x62\x61se_timestamp\x18\x01 \x01(\x03\x12\r\n\x05nodes\x18\x02 \x03(\t\x12\x10\n\x08messages\x18\x03 \x03(\t\x12#\n\x06\x65vents\x18\x04 \x03(\x0b\x32\x13.gossip.EventRecord*B\n\tEventType\x12\x0c\n\x08INITIATE\x10\x00\x12\x0c\n\x08RECEIVED\x10\x01\x12\r\n\tDUPLICATE\x10\x02\x12\n\n\x06\x46\x41NOUT\x10\x03*X\n\x0eLatencyQuality\x12\x10\n\x0cQUALITY_NONE\x10\x00\x12\x10\n\x0cQUALITY_GOOD\x10\x01\x12\x10\n\x0cQUALITY_FAIR\x10\x02\x12\x10\n\x0cQUALITY_POOR\x10\x03*Q\n\x0cTopologyTier\x12\x10\n\x0cTIER_UNKNOWN\x10\x00\x12\r\n\tTIER_ZONE\x10\x01\x12\x0f\n\x0bTIER_REGION\x10\x02\x12\x0f\n\x0bTIER_REMOTE\x10\x03\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'event_log_pb2', _globals)
+if _descriptor._USE_C_DESCRIPTORS == False:
+  DESCRIPTOR._options = None
+  _globals['_EVENTTYPE']._serialized_start=673
+  _globals['_EVENTTYPE']._serialized_end=739
+  _globals['_LATENCYQUALITY']._serialized_start=741
+  _globals['_LATENCYQUALITY']._serialized_end=829
+  _globals['_TOPOLOGYTIER']._serialized_start=831
+  _globals['_TOPOLOGYTIER']._serialized_end=912
+  _globals['_EVENTRECORD']._serialized_start=28
+  _globals['_EVENTRECORD']._serialized_end=563
+  _globals['_EVENTBATCH']._serialized_start=565
+  _globals['_EVENTBATCH']._serialized_end=671
+# @@protoc_insertion_point(module_scope)
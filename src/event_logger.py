@@ -0,0 +1,157 @@
+import atexit
+import collections
+import json
+import sys
+import threading
+import time
+
+# What EventLogger.log does when the buffer is full
+OVERFLOW_POLICIES = ('drop_newest', 'drop_oldest', 'block')
+
+
+class StdoutSink:
+    """Writes events as JSON lines to stdout (what fluentd picks up)."""
+
+    def write(self, events):
+        sys.stdout.write(''.join(json.dumps(event) + '\n' for event in events))
+        sys.stdout.flush()
+
+    def close(self):
+        sys.stdout.flush()
+
+
+class FileSink:
+    """Appends events as JSON lines to a local file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a', buffering=1024 * 1024)
+
+    def write(self, events):
+        self._file.write(''.join(json.dumps(event) + '\n' for event in events))
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def make_sink(spec, fmt='json'):
+    """
+    spec is 'stdout' or 'file:<path>'; fmt is 'json' (one JSON line per event)
+    or 'compact' (batched EventBatch protobufs, see event_codec.py).
+    """
+    if fmt == 'compact':
+        from event_codec import CompactFileSink, CompactStdoutSink
+        stdout_sink, file_sink = CompactStdoutSink, CompactFileSink
+    elif fmt == 'json':
+        stdout_sink, file_sink = StdoutSink, FileSink
+    else:
+        raise ValueError(f"Unknown event log format '{fmt}' (expected 'json' or 'compact')")
+    if spec == 'stdout':
+        return stdout_sink()
+    if spec.startswith('file:'):
+        return file_sink(spec[len('file:'):])
+    raise ValueError(f"Unknown event log sink '{spec}' (expected 'stdout' or 'file:<path>')")
+
+
+class EventLogger:
+    """
+    Takes event records off the request path: log() only appends the record
+    to a bounded deque (no lock, no serialization), and a background thread
+    serializes and writes them to the sink in batches. When the buffer is
+    full the overflow policy drops the newest or oldest record, or blocks.
+    Everything still buffered is written on close() / interpreter exit.
+    """
+
+    def __init__(self, sink=None, max_events=10000, overflow='drop_newest', batch_size=256, flush_interval=0.05):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}, got '{overflow}'")
+        self.sink = sink or StdoutSink()
+        self.max_events = max(1, int(max_events))
+        self.overflow = overflow
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        # deque.append/popleft are atomic, so producers never take a lock
+        self._queue = collections.deque()
+        self._wakeup = threading.Event()
+        self._closed = False
+        # Only taken on the (rare) overflow path
+        self._drop_lock = threading.Lock()
+        self.dropped = 0
+        self._reported_dropped = 0
+        # Only updated by the writer thread
+        self.written = 0
+        self.write_errors = 0
+        self._thread = threading.Thread(target=self._run, name='event-logger', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, event):
+        """Queues one event; returns False if it was dropped."""
+        if len(self._queue) >= self.max_events:
+            if self.overflow == 'drop_newest':
+                self._count_drop()
+                return False
+            if self.overflow == 'drop_oldest':
+                try:
+                    self._queue.popleft()
+                    self._count_drop()
+                except IndexError:
+                    pass
+            else:
+                while len(self._queue) >= self.max_events and not self._closed:
+                    self._wakeup.set()
+                    time.sleep(0.001)
+        self._queue.append(event)
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def stats(self):
+        return {
+            'buffered': len(self._queue),
+            'written': self.written,
+            'dropped': self.dropped,
+            'write_errors': self.write_errors,
+        }
+
+    def close(self):
+        """Stops the writer after flushing whatever is still buffered."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        self.sink.close()
+
+    def _count_drop(self):
+        with self._drop_lock:
+            self.dropped += 1
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._drain()
+        self._drain()
+
+    def _drain(self):
+        while self._queue:
+            batch = []
+            while self._queue and len(batch) < self.batch_size:
+                batch.append(self._queue.popleft())
+            self._write(batch)
+        dropped = self.dropped
+        if dropped != self._reported_dropped:
+            # Make overflow visible in the log stream itself
+            self._write([{'event': 'event_logger_dropped', 'dropped': dropped - self._reported_dropped,
+                          'dropped_total': dropped}])
+            self._reported_dropped = dropped
+
+    def _write(self, batch):
+        try:
+            self.sink.write(batch)
+            self.written += len(batch)
+        except Exception as e:
+            self.write_errors += 1
+            print(f"Failed to write {len(batch)} events: {e}", file=sys.stderr, flush=True)
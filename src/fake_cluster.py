@@ -0,0 +1,109 @@
+import itertools
+import random
+import threading
+import gossip_pb2
+from controller import message_to_dict
+from pod_tracker import FakePodApi, PodTracker
+
+# Fake pods are named after the chart's Deployment, like the real ones
+DEPLOYMENT_NAME = 'gossip-deployment'
+
+
+class FakeCluster:
+    """
+    In-memory stand-in for KubeCluster to run a sweep offline: one
+    FakePodApi per namespace, pods that turn ready after ready_delay
+    seconds (also after a scale, which replaces every pod like the helm
+    upgrade does), and a controller that answers every trigger with a random
+    convergence time. `calls` records the helm/kubectl operations in order.
+    """
+
+    def __init__(self, ready_delay=0.0, convergence_ms=(5.0, 50.0), seed=None):
+        self.ready_delay = ready_delay
+        self.convergence_ms = convergence_ms
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        # namespace -> FakePodApi
+        self.apis = {}
+        # (operation, release, namespace, values or replicas)
+        self.calls = []
+        self._pod_ids = itertools.count(1)
+
+    def install(self, release, namespace, values):
+        with self._lock:
+            self.calls.append(('install', release, namespace, dict(values)))
+            if namespace in self.apis:
+                raise RuntimeError(f"Namespace {namespace} already has a release")
+            api = self.apis[namespace] = FakePodApi(namespace)
+        self._add_pods(api, release, int(values['totalNodes']))
+
+    def scale(self, release, namespace, replicas):
+        with self._lock:
+            self.calls.append(('scale', release, namespace, replicas))
+            api = self.apis[namespace]
+        # helm upgrade changes NODES in the pod template: every pod is replaced
+        pods = [pod.metadata.name for pod in api.list_source()[0]]
+        self._add_pods(api, release, replicas)
+        for name in pods:
+            api.terminate(name)
+            api.delete(name)
+
+    def uninstall(self, release, namespace):
+        with self._lock:
+            self.calls.append(('uninstall', release, namespace, None))
+            api = self.apis[namespace]
+        for pod in api.list_source()[0]:
+            api.terminate(pod.metadata.name)
+            api.delete(pod.metadata.name)
+
+    def delete_namespace(self, namespace):
+        with self._lock:
+            self.calls.append(('delete_namespace', None, namespace, None))
+            api = self.apis.pop(namespace, None)
+        if api is not None:
+            api.close()
+
+    def tracker(self, namespace, label_selector):
+        api = self.apis[namespace]
+        return PodTracker(namespace=namespace, label_selector=label_selector, list_source=api.list_source,
+                          watch_source=api.watch_source).start()
+
+    def controller(self, namespace):
+        return FakeController(self, namespace)
+
+    def sample_convergence_ms(self):
+        with self._lock:
+            return self.rng.uniform(*self.convergence_ms)
+
+    def _add_pods(self, api, release, count):
+        for _ in range(count):
+            pod_id = next(self._pod_ids)
+            name = f"{DEPLOYMENT_NAME}-{pod_id}"
+            api.add_pod(name, ip=f"10.0.{pod_id // 256}.{pod_id % 256}", ready=self.ready_delay <= 0,
+                        labels={'app': 'bcgossip', 'release': release})
+            if self.ready_delay > 0:
+                timer = threading.Timer(self.ready_delay, api.set_ready, [name])
+                timer.daemon = True
+                timer.start()
+
+
+class FakeController:
+    """GossipController stand-in of a FakeCluster release: every trigger converges on every pod."""
+
+    def __init__(self, cluster, namespace):
+        self.cluster = cluster
+        self.namespace = namespace
+
+    def trigger(self, target, message, quiesce_timeout=60.0, settle_ms=100, payload_size=0):
+        nodes = len(self.cluster.apis[self.namespace].list_source()[0])
+        convergence_ms = self.cluster.sample_convergence_ms()
+        result = gossip_pb2.TriggerResult(target=target, message=message, initiated=True, succeeded=nodes - 1,
+                                          details=f"Done propagate! {target} received: '{message}'",
+                                          quiescent=True, nodes=nodes, covered=nodes)
+        result.convergence.CopyFrom(gossip_pb2.ConvergenceReport(
+            message=message, known=True, origin=target, expected=nodes, covered=nodes, coverage=1.0,
+            convergence_ms=convergence_ms, complete=True))
+        return message_to_dict(result)
+
+    def close(self):
+        pass
@@ -14,17 +14,47 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0cgossip.proto\x12\x06gossip\"F\n\rGossipMessage\x12\x0f\n\x07message\x18\x01 \x01(\t\x12\x11\n\tsender_id\x18\x02 \x01(\t\x12\x11\n\ttimestamp\x18\x03 \x01(\x03\"!\n\x0e\x41\x63knowledgment\x12\x0f\n\x07\x64\x65tails\x18\x01 \x01(\t2M\n\rGossipService\x12<\n\x0bSendMessage\x12\x15.gossip.GossipMessage\x1a\x16.gossip.Acknowledgmentb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0cgossip.proto\x12\x06gossip\"\xea\x01\n\rGossipMessage\x12\x0f\n\x07message\x18\x01 \x01(\t\x12\x11\n\tsender_id\x18\x02 \x01(\t\x12\x11\n\ttimestamp\x18\x03 \x01(\x03\x12\x0c\n\x04hops\x18\x04 \x01(\x05\x12\x0e\n\x06origin\x18\x05 \x01(\t\x12\x17\n\x0f\x63lock_offset_ms\x18\x06 \x01(\x01\x12\x14\n\x0c\x63lock_rtt_ms\x18\x07 \x01(\x01\x12\x0f\n\x07payload\x18\x08 \x01(\x0c\x12\x14\n\x0cpayload_hash\x18\t \x01(\t\x12\x14\n\x0cpayload_size\x18\n \x01(\x03\x12\x18\n\x10payload_encoding\x18\x0b \x01(\t\"\xc6\x01\n\x0e\x41\x63knowledgment\x12\x0f\n\x07\x64\x65tails\x18\x01 \x01(\t\x12\x11\n\tinitiated\x18\x02 \x01(\x08\x12\x11\n\tsucceeded\x18\x03 \x01(\x05\x12\x0e\n\x06\x66\x61iled\x18\x04 \x01(\x05\x12\x11\n\ttimed_out\x18\x05 \x01(\x05\x12\x1a\n\x12received_timestamp\x18\x06 \x01(\x03\x12\x16\n\x0esent_timestamp\x18\x07 \x01(\x03\x12\x15\n\rprocessing_ns\x18\x08 \x01(\x03\x12\x0f\n\x07skipped\x18\t \x01(\x05\"\x81\x01\n\x0bGossipBatch\x12\'\n\x08messages\x18\x01 \x03(\x0b\x32\x15.gossip.GossipMessage\x12\x1a\n\x12received_timestamp\x18\x02 \x01(\x03\x12\x16\n\x0esent_timestamp\x18\x03 \x01(\x03\x12\x15\n\rprocessing_ns\x18\x04 \x01(\x03\"C\n\x08\x41\x63kBatch\x12\x10\n\x08\x61\x63\x63\x65pted\x18\x01 \x01(\x05\x12\x12\n\nduplicates\x18\x02 \x01(\x05\x12\x11\n\tinitiated\x18\x03 \x01(\x05\">\n\x0bPullRequest\x12\x11\n\tsender_id\x18\x01 \x01(\t\x12\r\n\x05known\x18\x02 \x03(\t\x12\r\n\x05round\x18\x03 \x01(\x05\"v\n\x0eTriggerRequest\x12\x0e\n\x06target\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x1a\n\x12quiesce_timeout_ms\x18\x03 \x01(\x05\x12\x11\n\tsettle_ms\x18\x04 \x01(\x05\x12\x14\n\x0cpayload_size\x18\x05 \x01(\x03\"\xa2\x02\n\rTriggerResult\x12\x0e\n\x06target\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x11\n\tinitiated\x18\x03 \x01(\x08\x12\x0f\n\x07\x64\x65tails\x18\x04 \x01(\t\x12\x11\n\tsucceeded\x18\x05 \x01(\x05\x12\x0e\n\x06\x66\x61iled\x18\x06 \x01(\x05\x12\x11\n\ttimed_out\x18\x07 \x01(\x05\x12\x0e\n\x06\x61\x63k_ms\x18\x08 \x01(\x01\x12\x11\n\tquiescent\x18\t \x01(\x08\x12\x12\n\nquiesce_ms\x18\n \x01(\x01\x12\r\n\x05nodes\x18\x0b \x01(\x05\x12\x0f\n\x07\x63overed\x18\x0c \x01(\x05\x12.\n\x0b\x63onvergence\x18\r \x01(\x0b\x32\x19.gossip.ConvergenceReport\x12\x0f\n\x07skipped\x18\x0e \x01(\x05\"0\n\rStatusRequest\x12\x0f\n\x07message\x18\x01 \x01(\t\x12\x0e\n\x06\x63locks\x18\x02 \x01(\x08\"\x9c\x01\n\nNodeStatus\x12\x0c\n\x04host\x18\x01 \x01(\t\x12\x11\n\tin_flight\x18\x02 \x01(\x05\x12\x15\n\ractive_rumors\x18\x03 \x01(\x05\x12\x0f\n\x07idle_ms\x18\x04 \x01(\x01\x12\x13\n\x0bhas_message\x18\x05 \x01(\x08\x12!\n\x06\x63locks\x18\x06 \x03(\x0b\x32\x11.gossip.PeerClock\x12\r\n\x05ready\x18\x07 \x01(\x08\"`\n\tPeerClock\x12\x0c\n\x04peer\x18\x01 \x01(\t\x12\x11\n\toffset_ms\x18\x02 \x01(\x01\x12\x0e\n\x06rtt_ms\x18\x03 \x01(\x01\x12\x11\n\tjitter_ms\x18\x04 \x01(\x01\x12\x0f\n\x07samples\x18\x05 \x01(\x05\"\x95\x01\n\x07Receipt\x12\x0f\n\x07message\x18\x01 \x01(\t\x12\x13\n\x0breceiver_id\x18\x02 \x01(\t\x12\x1a\n\x12received_timestamp\x18\x03 \x01(\x03\x12\x18\n\x10propagation_time\x18\x04 \x01(\x01\x12\x0c\n\x04hops\x18\x05 \x01(\x05\x12\x10\n\x08initiate\x18\x06 \x01(\x08\x12\x0e\n\x06origin\x18\x07 \x01(\t\"1\n\x0cReceiptBatch\x12!\n\x08receipts\x18\x01 \x03(\x0b\x32\x0f.gossip.Receipt\"i\n\nReceiptAck\x12\x10\n\x08\x61\x63\x63\x65pted\x18\x01 \x01(\x05\x12\x1a\n\x12received_timestamp\x18\x02 \x01(\x03\x12\x16\n\x0esent_timestamp\x18\x03 \x01(\x03\x12\x15\n\rprocessing_ns\x18\x04 \x01(\x03\"6\n\x12\x43onvergenceRequest\x12\x0f\n\x07message\x18\x01 \x01(\t\x12\x0f\n\x07wait_ms\x18\x02 \x01(\x05\"\xb6\x01\n\x11\x43onvergenceReport\x12\x0f\n\x07message\x18\x01 \x01(\t\x12\r\n\x05known\x18\x02 \x01(\x08\x12\x0e\n\x06origin\x18\x03 \x01(\t\x12\x10\n\x08\x65xpected\x18\x04 \x01(\x05\x12\x0f\n\x07\x63overed\x18\x05 \x01(\x05\x12\x10\n\x08\x63overage\x18\x06 \x01(\x01\x12\x16\n\x0e\x63onvergence_ms\x18\x07 \x01(\x01\x12\x10\n\x08\x63omplete\x18\x08 \x01(\x08\x12\x12\n\nstragglers\x18\t \x03(\t\"1\n\x0ePayloadRequest\x12\x0c\n\x04hash\x18\x01 \x01(\t\x12\x11\n\tsender_id\x18\x02 \x01(\t\"R\n\x0cPayloadChunk\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\x12\x10\n\x08\x65ncoding\x18\x02 \x01(\t\x12\x14\n\x0c\x65ncoded_size\x18\x03 \x01(\x03\x12\x0c\n\x04size\x18\x04 \x01(\x03\x32\xf8\x03\n\rGossipService\x12<\n\x0bSendMessage\x12\x15.gossip.GossipMessage\x1a\x16.gossip.Acknowledgment\x12;\n\x0eStreamMessages\x12\x13.gossip.GossipBatch\x1a\x10.gossip.AckBatch(\x01\x30\x01\x12\x38\n\x0cPullMessages\x12\x13.gossip.PullRequest\x1a\x13.gossip.GossipBatch\x12\x38\n\x07Trigger\x12\x16.gossip.TriggerRequest\x1a\x15.gossip.TriggerResult\x12\x33\n\x06Status\x12\x15.gossip.StatusRequest\x1a\x12.gossip.NodeStatus\x12:\n\x0eReportReceipts\x12\x14.gossip.ReceiptBatch\x1a\x12.gossip.ReceiptAck\x12G\n\x0eGetConvergence\x12\x1a.gossip.ConvergenceRequest\x1a\x19.gossip.ConvergenceReport\x12>\n\x0c\x46\x65tchPayload\x12\x16.gossip.PayloadRequest\x1a\x14.gossip.PayloadChunk0\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'gossip_pb2', _globals)
 if _descriptor._USE_C_DESCRIPTORS == False:
   DESCRIPTOR._options = None
-  _globals['_GOSSIPMESSAGE']._serialized_start=24
-  _globals['_GOSSIPMESSAGE']._serialized_end=94
-  _globals['_ACKNOWLEDGMENT']._serialized_start=96
-  _globals['_ACKNOWLEDGMENT']._serialized_end=129
-  _globals['_GOSSIPSERVICE']._serialized_start=131
-  _globals['_GOSSIPSERVICE']._serialized_end=208
+  _globals['_GOSSIPMESSAGE']._serialized_start=25
+  _globals['_GOSSIPMESSAGE']._serialized_end=259
+  _globals['_ACKNOWLEDGMENT']._serialized_start=262
+  _globals['_ACKNOWLEDGMENT']._serialized_end=460
+  _globals['_GOSSIPBATCH']._serialized_start=463
+  _globals['_GOSSIPBATCH']._serialized_end=592
+  _globals['_ACKBATCH']._serialized_start=594
+  _globals['_ACKBATCH']._serialized_end=661
+  _globals['_PULLREQUEST']._serialized_start=663
+  _globals['_PULLREQUEST']._serialized_end=725
+  _globals['_TRIGGERREQUEST']._serialized_start=727
+  _globals['_TRIGGERREQUEST']._serialized_end=845
+  _globals['_TRIGGERRESULT']._serialized_start=848
+  _globals['_TRIGGERRESULT']._serialized_end=1138
+  _globals['_STATUSREQUEST']._serialized_start=1140
+  _globals['_STATUSREQUEST']._serialized_end=1188
+  _globals['_NODESTATUS']._serialized_start=1191
+  _globals['_NODESTATUS']._serialized_end=1347
+  _globals['_PEERCLOCK']._serialized_start=1349
+  _globals['_PEERCLOCK']._serialized_end=1445
+  _globals['_RECEIPT']._serialized_start=1448
+  _globals['_RECEIPT']._serialized_end=1597
+  _globals['_RECEIPTBATCH']._serialized_start=1599
+  _globals['_RECEIPTBATCH']._serialized_end=1648
+  _globals['_RECEIPTACK']._serialized_start=1650
+  _globals['_RECEIPTACK']._serialized_end=1755
+  _globals['_CONVERGENCEREQUEST']._serialized_start=1757
+  _globals['_CONVERGENCEREQUEST']._serialized_end=1811
+  _globals['_CONVERGENCEREPORT']._serialized_start=1814
+  _globals['_CONVERGENCEREPORT']._serialized_end=1996
+  _globals['_PAYLOADREQUEST']._serialized_start=1998
+  _globals['_PAYLOADREQUEST']._serialized_end=2047
+  _globals['_PAYLOADCHUNK']._serialized_start=2049
+  _globals['_PAYLOADCHUNK']._serialized_end=2131
+  _globals['_GOSSIPSERVICE']._serialized_start=2134
+  _globals['_GOSSIPSERVICE']._serialized_end=2638
 # @@protoc_insertion_point(module_scope)
@@ -19,6 +19,41 @@ class GossipServiceStub(object):
                 request_serializer=gossip__pb2.GossipMessage.SerializeToString,
                 response_deserializer=gossip__pb2.Acknowledgment.FromString,
                 )
+        self.StreamMessages = channel.stream_stream(
+                '/gossip.GossipService/StreamMessages',
+                request_serializer=gossip__pb2.GossipBatch.SerializeToString,
+                response_deserializer=gossip__pb2.AckBatch.FromString,
+                )
+        self.PullMessages = channel.unary_unary(
+                '/gossip.GossipService/PullMessages',
+                request_serializer=gossip__pb2.PullRequest.SerializeToString,
+                response_deserializer=gossip__pb2.GossipBatch.FromString,
+                )
+        self.Trigger = channel.unary_unary(
+                '/gossip.GossipService/Trigger',
+                request_serializer=gossip__pb2.TriggerRequest.SerializeToString,
+                response_deserializer=gossip__pb2.TriggerResult.FromString,
+                )
+        self.Status = channel.unary_unary(
+                '/gossip.GossipService/Status',
+                request_serializer=gossip__pb2.StatusRequest.SerializeToString,
+                response_deserializer=gossip__pb2.NodeStatus.FromString,
+                )
+        self.ReportReceipts = channel.unary_unary(
+                '/gossip.GossipService/ReportReceipts',
+                request_serializer=gossip__pb2.ReceiptBatch.SerializeToString,
+                response_deserializer=gossip__pb2.ReceiptAck.FromString,
+                )
+        self.GetConvergence = channel.unary_unary(
+                '/gossip.GossipService/GetConvergence',
+                request_serializer=gossip__pb2.ConvergenceRequest.SerializeToString,
+                response_deserializer=gossip__pb2.ConvergenceReport.FromString,
+                )
+        self.FetchPayload = channel.unary_stream(
+                '/gossip.GossipService/FetchPayload',
+                request_serializer=gossip__pb2.PayloadRequest.SerializeToString,
+                response_deserializer=gossip__pb2.PayloadChunk.FromString,
+                )
 
 
 class GossipServiceServicer(object):
@@ -30,6 +65,55 @@ class GossipServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def StreamMessages(self, request_iterator, context):
+        """One long-lived stream per peer; one AckBatch is returned per GossipBatch, in order
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def PullMessages(self, request, context):
+        """Epidemic pull: returns the active messages the caller does not know yet
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Trigger(self, request, context):
+        """Test control: makes `target` initiate the message and optionally waits until the cluster is idle
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Status(self, request, context):
+        """Test control: in-flight work of this node, used for the quiescence check
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ReportReceipts(self, request, context):
+        """Receivers report their first receipts (batched) to the initiator or an aggregator
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetConvergence(self, request, context):
+        """Convergence time, coverage and stragglers of a message tracked by this node
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def FetchPayload(self, request, context):
+        """Streams the body of an announced payload in chunks (NOT_FOUND if this node does not have it)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_GossipServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -38,6 +122,41 @@ def add_GossipServiceServicer_to_server(servicer, server):
                     request_deserializer=gossip__pb2.GossipMessage.FromString,
                     response_serializer=gossip__pb2.Acknowledgment.SerializeToString,
             ),
+            'StreamMessages': grpc.stream_stream_rpc_method_handler(
+                    servicer.StreamMessages,
+                    request_deserializer=gossip__pb2.GossipBatch.FromString,
+                    response_serializer=gossip__pb2.AckBatch.SerializeToString,
+            ),
+            'PullMessages': grpc.unary_unary_rpc_method_handler(
+                    servicer.PullMessages,
+                    request_deserializer=gossip__pb2.PullRequest.FromString,
+                    response_serializer=gossip__pb2.GossipBatch.SerializeToString,
+            ),
+            'Trigger': grpc.unary_unary_rpc_method_handler(
+                    servicer.Trigger,
+                    request_deserializer=gossip__pb2.TriggerRequest.FromString,
+                    response_serializer=gossip__pb2.TriggerResult.SerializeToString,
+            ),
+            'Status': grpc.unary_unary_rpc_method_handler(
+                    servicer.Status,
+                    request_deserializer=gossip__pb2.StatusRequest.FromString,
+                    response_serializer=gossip__pb2.NodeStatus.SerializeToString,
+            ),
+            'ReportReceipts': grpc.unary_unary_rpc_method_handler(
+                    servicer.ReportReceipts,
+                    request_deserializer=gossip__pb2.ReceiptBatch.FromString,
+                    response_serializer=gossip__pb2.ReceiptAck.SerializeToString,
+            ),
+            'GetConvergence': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetConvergence,
+                    request_deserializer=gossip__pb2.ConvergenceRequest.FromString,
+                    response_serializer=gossip__pb2.ConvergenceReport.SerializeToString,
+            ),
+            'FetchPayload': grpc.unary_stream_rpc_method_handler(
+                    servicer.FetchPayload,
+                    request_deserializer=gossip__pb2.PayloadRequest.FromString,
+                    response_serializer=gossip__pb2.PayloadChunk.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'gossip.GossipService', rpc_method_handlers)
@@ -64,3 +183,122 @@ class GossipService(object):
             gossip__pb2.Acknowledgment.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def StreamMessages(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(request_iterator, target, '/gossip.GossipService/StreamMessages',
+            gossip__pb2.GossipBatch.SerializeToString,
+            gossip__pb2.AckBatch.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def PullMessages(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/gossip.GossipService/PullMessages',
+            gossip__pb2.PullRequest.SerializeToString,
+            gossip__pb2.GossipBatch.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def Trigger(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/gossip.GossipService/Trigger',
+            gossip__pb2.TriggerRequest.SerializeToString,
+            gossip__pb2.TriggerResult.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def Status(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/gossip.GossipService/Status',
+            gossip__pb2.StatusRequest.SerializeToString,
+            gossip__pb2.NodeStatus.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def ReportReceipts(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/gossip.GossipService/ReportReceipts',
+            gossip__pb2.ReceiptBatch.SerializeToString,
+            gossip__pb2.ReceiptAck.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def GetConvergence(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/gossip.GossipService/GetConvergence',
+            gossip__pb2.ConvergenceRequest.SerializeToString,
+            gossip__pb2.ConvergenceReport.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def FetchPayload(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/gossip.GossipService/FetchPayload',
+            gossip__pb2.PayloadRequest.SerializeToString,
+            gossip__pb2.PayloadChunk.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
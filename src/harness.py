@@ -0,0 +1,349 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+import grpc
+import gossip_pb2
+import gossip_pb2_grpc
+from event_codec import write_csv
+from neighbours import StaticNeighbours
+from payloads import content_hash, make_payload, parse_size
+
+
+def build_topology(addresses, topology='full', seed=None):
+    """
+    Returns {address: [neighbour addresses]}.
+    'full' connects every node to every other one (what the Kubernetes
+    deployment does); 'random:k' links each node to k random peers and
+    makes the links symmetric.
+    """
+    if topology == 'full':
+        return {address: [peer for peer in addresses if peer != address] for address in addresses}
+    if topology.startswith('random:'):
+        k = int(topology.split(':', 1)[1])
+        rng = random.Random(seed)
+        links = {address: set() for address in addresses}
+        for address in addresses:
+            others = [peer for peer in addresses if peer != address]
+            for peer in rng.sample(others, min(k, len(others))):
+                links[address].add(peer)
+                links[peer].add(address)
+        return {address: sorted(peers) for address, peers in links.items()}
+    raise ValueError(f"Unknown topology '{topology}' (expected 'full' or 'random:<k>')")
+
+
+def build_locations(addresses, zones=0, regions=1):
+    """Returns {address: (region, zone)} with the addresses spread round-robin over the zones ({} if zones is 0)."""
+    if zones <= 0:
+        return {}
+    locations = {}
+    for i, address in enumerate(addresses):
+        zone = i % zones
+        locations[address] = (f"region-{zone % max(1, regions)}", f"zone-{zone}")
+    return locations
+
+
+class EventCollector:
+    """Stands in for the EventLogger of every local node and keeps the events in memory."""
+
+    def __init__(self):
+        self.events = []
+
+    def log(self, event):
+        # list.append is atomic, handlers never wait on each other here
+        self.events.append(event)
+        return True
+
+    def drain(self):
+        events, self.events = self.events, []
+        return events
+
+    def close(self):
+        pass
+
+
+class NodeGroup:
+    """A set of Nodes served from the current process on loopback ports."""
+
+    def __init__(self, specs, node_mode='sync', locations=None):
+        # specs: [(name, address, port, [neighbour addresses])]
+        # locations: {address: (region, zone)} of every node, for TOPOLOGY_MODE
+        self.node_mode = node_mode
+        self.collector = EventCollector()
+        self.nodes = []
+        self.servers = []
+        self.loop = None
+        if node_mode == 'aio':
+            from aio_node import AioNode
+            import asyncio
+            # grpc.aio supports a single event loop per process, shared by all aio nodes
+            self.loop = asyncio.new_event_loop()
+            threading.Thread(target=self.loop.run_forever, name='harness-loop', daemon=True).start()
+        else:
+            from node import Node
+        for name, address, port, peers in specs:
+            neighbours = StaticNeighbours([(f"node-{peer.rsplit(':', 1)[1]}", peer) for peer in peers],
+                                          locations=locations)
+            node_class = AioNode if node_mode == 'aio' else Node
+            node = node_class('harness', host=address, port=str(port), hostname=name, neighbours=neighbours,
+                              bind_address='127.0.0.1')
+            if node.event_logger is not None:
+                node.event_logger.close()
+            node.event_logger = self.collector
+            if node_mode == 'aio':
+                self.servers.append(asyncio.run_coroutine_threadsafe(node.start(), self.loop).result())
+            else:
+                self.servers.append(node.start())
+            self.nodes.append(node)
+
+    def covered(self, message):
+        """Number of nodes in this group that have seen the message."""
+        return sum(message in node.seen for node in self.nodes)
+
+    def drain_events(self):
+        return self.collector.drain()
+
+    def stop(self):
+        """Stops the servers, then each node's background loops, neighbour watch and channels."""
+        if self.node_mode == 'aio':
+            import asyncio
+            for server, node in zip(self.servers, self.nodes):
+                asyncio.run_coroutine_threadsafe(server.stop(None), self.loop).result()
+                asyncio.run_coroutine_threadsafe(node.stop(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        else:
+            for server, node in zip(self.servers, self.nodes):
+                server.stop(None)
+                node.stop()
+
+
+def _group_worker(conn, specs, node_mode, env, quiet, locations):
+    """Runs a NodeGroup in a child process and answers commands from the parent."""
+    os.environ.update(env)
+    if quiet:
+        sys.stdout = open(os.devnull, 'w')
+    group = NodeGroup(specs, node_mode, locations)
+    conn.send('ready')
+    while True:
+        command, arg = conn.recv()
+        if command == 'covered':
+            conn.send(group.covered(arg))
+        elif command == 'events':
+            conn.send(group.drain_events())
+        elif command == 'stop':
+            group.stop()
+            conn.send('stopped')
+            return
+
+
+class RemoteGroup:
+    """NodeGroup proxy for a group running in a worker process."""
+
+    def __init__(self, specs, node_mode, env, quiet, locations=None):
+        self.conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_group_worker,
+                                               args=(child, specs, node_mode, env, quiet, locations), daemon=True)
+        self.process.start()
+
+    def wait_ready(self):
+        return self.conn.recv() == 'ready'
+
+    def _call(self, command, arg=None):
+        self.conn.send((command, arg))
+        return self.conn.recv()
+
+    def covered(self, message):
+        return self._call('covered', message)
+
+    def drain_events(self):
+        return self._call('events')
+
+    def stop(self):
+        self._call('stop')
+        self.process.join(timeout=10)
+
+
+class LocalCluster:
+    """
+    N gossip nodes on 127.0.0.1 ports, wired with a static or generated
+    neighbour list instead of the Kubernetes API, and driven through the
+    real SendMessage path. Nodes run in this process, or are split across
+    worker processes when processes > 1. With zones > 0 the nodes are
+    spread round-robin over that many zones (and the zones over `regions`
+    regions), as the node labels would place them for TOPOLOGY_MODE.
+    """
+
+    def __init__(self, num_nodes, base_port=7000, node_mode='sync', topology='full', processes=1, seed=None,
+                 env=None, quiet=False, zones=0, regions=1):
+        self.num_nodes = num_nodes
+        self.env = dict(env or {})
+        self.quiet = quiet
+        ports = [base_port + i for i in range(num_nodes)]
+        self.addresses = [f"127.0.0.1:{port}" for port in ports]
+        links = build_topology(self.addresses, topology, seed)
+        specs = [(f"node-{port}", address, port, links[address]) for address, port in zip(self.addresses, ports)]
+        self.locations = build_locations(self.addresses, zones, regions)
+
+        if processes <= 1:
+            os.environ.update(self.env)
+            self.groups = [NodeGroup(specs, node_mode, self.locations)]
+        else:
+            chunks = [specs[i::processes] for i in range(processes)]
+            self.groups = [RemoteGroup(chunk, node_mode, self.env, quiet, self.locations) for chunk in chunks if chunk]
+            for group in self.groups:
+                group.wait_ready()
+        self._channels = {}
+        self.wait_ready()
+
+    def wait_ready(self, timeout=30.0):
+        """Waits until every node finished its warm-up (Status.ready); returns whether they all did."""
+        deadline = time.monotonic() + timeout
+        pending = list(self.addresses)
+        while pending:
+            pending = [address for address in pending if not self._ready(address)]
+            if not pending or time.monotonic() > deadline:
+                break
+            time.sleep(0.05)
+        return not pending
+
+    def _ready(self, address):
+        try:
+            return self._stub(address).Status(gossip_pb2.StatusRequest(), timeout=1.0).ready
+        except grpc.RpcError:
+            return False
+
+    def _stub(self, address):
+        channel = self._channels.get(address)
+        if channel is None:
+            channel = self._channels[address] = grpc.insecure_channel(address)
+        return gossip_pb2_grpc.GossipServiceStub(channel)
+
+    def initiate(self, message, index=None, payload_size=0):
+        """Starts gossip on one node exactly like start.py does; returns (address, ack details)."""
+        address = self.addresses[random.randrange(self.num_nodes) if index is None else index]
+        stub = self._stub(address)
+        request = gossip_pb2.GossipMessage(
+            message=message,
+            sender_id=address,
+            timestamp=time.time_ns()
+        )
+        if payload_size > 0:
+            request.payload = make_payload(payload_size)
+            request.payload_hash = content_hash(request.payload)
+            request.payload_size = payload_size
+        response = stub.SendMessage(request)
+        return address, response.details
+
+    def covered(self, message):
+        return sum(group.covered(message) for group in self.groups)
+
+    def wait_for_coverage(self, message, timeout=30.0, settle=0.5, poll=0.01):
+        """
+        Waits until every node has seen the message, or coverage has not
+        changed for `settle` seconds (epidemic modes may never reach 100%).
+        Returns the number of nodes covered.
+        """
+        deadline = time.monotonic() + timeout
+        last, last_change = -1, time.monotonic()
+        while time.monotonic() < deadline:
+            covered = self.covered(message)
+            if covered >= self.num_nodes:
+                return covered
+            if covered != last:
+                last, last_change = covered, time.monotonic()
+            elif time.monotonic() - last_change >= settle:
+                return covered
+            time.sleep(poll)
+        return self.covered(message)
+
+    def drain_events(self):
+        events = []
+        for group in self.groups:
+            events.extend(group.drain_events())
+        return events
+
+    def stop(self):
+        for channel in self._channels.values():
+            channel.close()
+        for group in self.groups:
+            group.stop()
+
+
+def run_tests(cluster, num_tests, unique_id=None, timeout=30.0, settle=0.5, payload_size=0, warmup_round=False):
+    """
+    Runs gossip iterations like automate.py and returns one summary dict per
+    iteration; warmup_round adds the discarded '-0' iteration first.
+    """
+    unique_id = unique_id or str(uuid.uuid4())[:4]
+    results = []
+    for nt in range(0 if warmup_round else 1, num_tests + 1):
+        message = f'{unique_id}-cubaan{cluster.num_nodes}-{nt}'
+        start = time.perf_counter()
+        address, details = cluster.initiate(message, payload_size=payload_size)
+        ack_time = time.perf_counter() - start
+        covered = cluster.wait_for_coverage(message, timeout=timeout, settle=settle)
+        results.append({
+            'message': message,
+            'initiator': address,
+            'ack_ms': round(ack_time * 1e3, 3),
+            'covered': covered,
+            'coverage': covered / cluster.num_nodes,
+            'details': details,
+        })
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run N gossip nodes locally (no Kubernetes) and record their events.")
+    parser.add_argument('--num_nodes', type=int, default=10, help="Number of local nodes")
+    parser.add_argument('--num_tests', type=int, default=10, help="Total number of tests to do")
+    parser.add_argument('--base_port', type=int, default=7000, help="Port of the first node (others follow)")
+    parser.add_argument('--node_mode', choices=['sync', 'aio'], default='sync', help="Node implementation")
+    parser.add_argument('--topology', default='full', help="'full' or 'random:<k>' neighbour lists")
+    parser.add_argument('--processes', type=int, default=1, help="Worker processes to spread the nodes over")
+    parser.add_argument('--seed', type=int, default=None, help="Seed for the generated topology")
+    parser.add_argument('--zones', type=int, default=0,
+                        help="Spread the nodes over this many zones (node locations for TOPOLOGY_MODE)")
+    parser.add_argument('--regions', type=int, default=1, help="Spread the zones over this many regions")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Max seconds to wait for each message")
+    parser.add_argument('--settle', type=float, default=0.5,
+                        help="Stop waiting when coverage has not changed for this many seconds")
+    parser.add_argument('--set', action='append', default=[],
+                        help="Node environment overrides in KEY=VALUE format (e.g. GOSSIP_MODE=push)")
+    parser.add_argument('--payload_size', type=parse_size, default=0,
+                        help="Random payload carried by every test message, e.g. 100K or 10M (default: none)")
+    parser.add_argument('--warmup_round', action='store_true',
+                        help="Also run the '-0' warm-up iteration (nodes started with WARMUP=off)")
+    parser.add_argument('--output', default=None, help="CSV file for the events (same columns as the test CSVs)")
+    parser.add_argument('--quiet', action='store_true', help="Silence the nodes' own stdout")
+    args = parser.parse_args()
+
+    env = {}
+    for s in args.set:
+        key, value = s.split('=', 1)
+        env[key] = value
+
+    with contextlib.redirect_stdout(open(os.devnull, 'w')) if args.quiet else contextlib.nullcontext():
+        cluster = LocalCluster(args.num_nodes, base_port=args.base_port, node_mode=args.node_mode,
+                               topology=args.topology, processes=args.processes, seed=args.seed, env=env,
+                               quiet=args.quiet, zones=args.zones, regions=args.regions)
+        try:
+            results = run_tests(cluster, args.num_tests, timeout=args.timeout, settle=args.settle,
+                                payload_size=args.payload_size, warmup_round=args.warmup_round)
+            time.sleep(0.2)
+            events = cluster.drain_events()
+        finally:
+            cluster.stop()
+
+    for result in results:
+        print(json.dumps(result), flush=True)
+    if args.output:
+        with open(args.output, 'w', newline='') as out:
+            rows = write_csv(events, out)
+        print(f"Wrote {rows} events to {args.output}", flush=True)
@@ -0,0 +1,305 @@
+import bisect
+import threading
+import time
+from concurrent import futures
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Latency buckets in seconds: 50 us doubling up to ~6.5 s
+LATENCY_BUCKETS = [0.00005 * 2 ** i for i in range(18)]
+
+
+class _Shards:
+    """
+    Per-thread lists of numbers summed at scrape time. Every thread only
+    writes its own list, so updates take no lock (one is only taken the
+    first time a thread touches the metric).
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+
+    def get(self):
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = [0] * self.size
+            with self._lock:
+                self._shards.append(values)
+            return values
+
+    def totals(self):
+        with self._lock:
+            shards = list(self._shards)
+        return [sum(column) for column in zip(*shards)] if shards else [0] * self.size
+
+
+class _Metric:
+    """A metric family; labels(*values) returns (and caches) the child for one label set."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+        if not self.labelnames:
+            self._children[()] = self._child()
+
+    def labels(self, *values):
+        values = tuple(str(value) for value in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._child())
+        return child
+
+    def _child(self):
+        raise NotImplementedError
+
+    def _label_text(self, values, extra=None):
+        pairs = list(zip(self.labelnames, values)) + ([extra] if extra else [])
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self._shards = _Shards(1)
+
+    def inc(self, amount=1):
+        self._shards.get()[0] += amount
+
+    def value(self):
+        return self._shards.totals()[0]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._children[()].inc(amount)
+
+    def _render_child(self, values, child):
+        return [f'{self.name}{self._label_text(values)} {child.value()}']
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # One slot per bucket, one for +Inf, then the sum
+        self._shards = _Shards(len(buckets) + 2)
+
+    def observe(self, value):
+        values = self._shards.get()
+        values[bisect.bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+
+    def snapshot(self):
+        """Returns (cumulative bucket counts incl. +Inf, count, sum)."""
+        totals = self._shards.totals()
+        cumulative = []
+        running = 0
+        for count in totals[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, running, totals[-1]
+
+
+class Histogram(_Metric):
+    """Pre-bucketed histogram: observe() is a bisect and two additions on the calling thread's shard."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = sorted(buckets)
+        super().__init__(name, documentation, labelnames)
+
+    def _child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._children[()].observe(value)
+
+    def _render_child(self, values, child):
+        cumulative, count, total = child.snapshot()
+        lines = []
+        for bound, running in zip(self.buckets + ['+Inf'], cumulative):
+            le = bound if bound == '+Inf' else f'{bound:.6g}'
+            lines.append(f'{self.name}_bucket{self._label_text(values, ("le", le))} {running}')
+        lines.append(f'{self.name}_count{self._label_text(values)} {count}')
+        lines.append(f'{self.name}_sum{self._label_text(values)} {total}')
+        return lines
+
+
+class _GaugeChild:
+    def __init__(self):
+        self._function = None
+
+    def set_function(self, function):
+        """The gauge reads function() at scrape time."""
+        self._function = function
+
+    def value(self):
+        return self._function() if self._function is not None else 0
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def _child(self):
+        return _GaugeChild()
+
+    def set_function(self, function):
+        self._children[()].set_function(function)
+
+    def _render_child(self, values, child):
+        return [f'{self.name}{self._label_text(values)} {child.value()}']
+
+
+class MetricsRegistry:
+    """The metrics of one node, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port, host='', ready=None):
+        """
+        Serves GET /metrics from a daemon thread; returns the HTTP server.
+        With a ready() callable, GET /ready answers 200 once it returns True
+        and 503 before (readiness probe).
+        """
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path == '/ready' and ready is not None:
+                    if ready():
+                        self._reply(200, b'ready\n', 'text/plain')
+                    else:
+                        self.send_error(503, 'Warming up')
+                    return
+                if path not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                self._reply(200, registry.render().encode(), 'text/plain; version=0.0.4')
+
+            def _reply(self, code, body, content_type):
+                self.send_response(code)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Scrapes would flood the pod log
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+        return server
+
+
+class InstrumentedExecutor(futures.ThreadPoolExecutor):
+    """
+    ThreadPoolExecutor that records how long each task waited in the queue
+    before a worker picked it up, and how many workers are busy.
+    """
+
+    def __init__(self, max_workers, queue_wait, thread_name_prefix=''):
+        super().__init__(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self.queue_wait = queue_wait
+        # Each worker counts itself in its own shard
+        self._busy = _Shards(1)
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(self._timed, time.perf_counter(), fn, args, kwargs)
+
+    def _timed(self, queued, fn, args, kwargs):
+        self.queue_wait.observe(time.perf_counter() - queued)
+        busy = self._busy.get()
+        busy[0] += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            busy[0] -= 1
+
+    def busy(self):
+        return self._busy.totals()[0]
+
+    def queued(self):
+        return self._work_queue.qsize()
+
+
+class NodeMetrics:
+    """
+    The metrics a gossip node keeps: latency histograms of the receive and
+    send paths, duplicate, RPC error, retry and circuit breaker counters,
+    and thread pool gauges.
+    """
+
+    def __init__(self):
+        self.registry = MetricsRegistry()
+        register = self.registry.register
+        self.receive_to_ack = register(Histogram(
+            'gossip_receive_to_ack_seconds', 'Time from a SendMessage arriving to its ack being returned.',
+            ['event_type']))
+        self.peer_send = register(Histogram(
+            'gossip_peer_send_seconds', 'Duration of one SendMessage to one peer.', ['outcome']))
+        self.fanout = register(Histogram(
+            'gossip_fanout_seconds', 'Total time of one fan-out to all selected peers.'))
+        self.queue_wait = register(Histogram(
+            'gossip_queue_wait_seconds', 'Time work waited for a free worker (server: handler queue wait).',
+            ['pool']))
+        self.duplicates = register(Counter(
+            'gossip_duplicates_total', 'Messages ignored because they had already been seen.'))
+        self.rpc_errors = register(Counter(
+            'gossip_rpc_errors_total', 'Failed outgoing RPCs.', ['rpc', 'code']))
+        self.retries = register(Counter(
+            'gossip_send_retries_total', 'SendMessage attempts repeated after a retryable failure.', ['code']))
+        self.breaker_transitions = register(Counter(
+            'gossip_circuit_transitions_total', 'Per-peer circuit breaker state changes.', ['state']))
+        self.tier_sends = register(Counter(
+            'gossip_peer_sends_total', 'Messages sent to peers, by topology tier of the peer.', ['tier']))
+        self.payload_bytes = register(Counter(
+            'gossip_payload_bytes_total', 'Encoded payload bytes fetched from and served to peers.', ['direction']))
+        self.pool_busy = register(Gauge('gossip_pool_busy_workers', 'Workers running a task.', ['pool']))
+        self.pool_queued = register(Gauge('gossip_pool_queued_tasks', 'Tasks waiting for a worker.', ['pool']))
+        self.pool_size = register(Gauge('gossip_pool_max_workers', 'Size of the pool.', ['pool']))
+
+    def executor(self, pool, max_workers, thread_name_prefix=''):
+        """An InstrumentedExecutor whose queue wait and occupancy are exported under pool=<pool>."""
+        executor = InstrumentedExecutor(max_workers, self.queue_wait.labels(pool), thread_name_prefix)
+        self.pool_busy.labels(pool).set_function(executor.busy)
+        self.pool_queued.labels(pool).set_function(executor.queued)
+        self.pool_size.labels(pool).set_function(lambda: max_workers)
+        return executor
+
+    def rpc_error(self, rpc, code):
+        self.rpc_errors.labels(rpc, code.name if hasattr(code, 'name') else code).inc()
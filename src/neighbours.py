@@ -0,0 +1,208 @@
+import threading
+from kubernetes import client, config, watch
+
+
+class StaticNeighbours:
+    """Fixed neighbour list with the NeighbourRegistry interface (local runs, no Kubernetes)."""
+
+    def __init__(self, neighbours, on_change=None, locations=None):
+        # [(name, address)]
+        self._neighbours = list(neighbours)
+        # address -> (region, zone), this node's own address included
+        self._locations = dict(locations or {})
+        self.on_change = on_change
+        self.synced = threading.Event()
+        self.synced.set()
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def wait_synced(self, timeout=None):
+        return True
+
+    def snapshot(self):
+        return list(self._neighbours)
+
+    def location(self, address):
+        return self._locations.get(address)
+
+
+class NeighbourRegistry:
+    """
+    Informer-style cache of the gossip pods in the namespace.
+    One list call seeds the cache, then a single watch stream applies pod
+    add/delete/IP-change events incrementally, so gossip never waits on
+    the API server. The list and watch sources can be swapped for fakes.
+    With a NodeTopology, location() also gives the (region, zone) of the
+    Kubernetes node every pod runs on.
+    """
+
+    def __init__(self, host, app_name, namespace='default', list_source=None, watch_source=None,
+                 on_change=None, retry_delay=1.0, topology=None, label_selector=None):
+        self.host = host
+        self.app_name = app_name
+        self.namespace = namespace
+        self.label_selector = label_selector or f"app={app_name}"
+        # list_source() -> (pods, resource_version)
+        # watch_source(resource_version) -> iterable of {'type': ..., 'object': pod}
+        self._list_source = list_source or self._kubernetes_list
+        self._watch_source = watch_source or self._kubernetes_watch
+        self.on_change = on_change
+        self.retry_delay = retry_delay
+        self.synced = threading.Event()
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        # pod name -> pod IP
+        self._pods = {}
+        # pod IP -> name of the Kubernetes node it runs on (this pod included)
+        self._node_names = {}
+        self.topology = topology
+        self._v1 = None
+        self._watch = None
+        self._thread = None
+
+    def start(self):
+        """Starts the background list+watch loop."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='neighbour-watch', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._watch is not None:
+            self._watch.stop()
+
+    def wait_synced(self, timeout=None):
+        """Blocks until the initial list has been applied (or timeout)."""
+        return self.synced.wait(timeout)
+
+    def snapshot(self):
+        """Returns the current neighbours as [(pod_name, pod_ip)], excluding this node."""
+        with self._lock:
+            return [(name, ip) for name, ip in self._pods.items() if ip != self.host]
+
+    def location(self, ip):
+        """(region, zone) of the node hosting the pod with this IP, or None."""
+        if self.topology is None:
+            return None
+        with self._lock:
+            node_name = self._node_names.get(ip)
+        return self.topology.location(node_name) if node_name else None
+
+    def replace(self, pods):
+        """Replaces the whole cache with the given pods (initial list / resync)."""
+        pods_by_name = {}
+        node_names = {}
+        for pod in pods:
+            name, ip = self._pod_key(pod)
+            if ip:
+                pods_by_name[name] = ip
+                node_names[ip] = self._node_name(pod)
+        with self._lock:
+            changed = pods_by_name != self._pods
+            self._pods = pods_by_name
+            self._node_names = node_names
+        self._refresh_topology()
+        if changed:
+            self._notify()
+
+    def apply_event(self, event):
+        """Applies one watch event and returns its resource version."""
+        event_type = event['type']
+        pod = event['object']
+        if event_type not in ('ADDED', 'MODIFIED', 'DELETED'):
+            # BOOKMARK and friends only move the resource version forward
+            return self._resource_version(pod)
+
+        name, ip = self._pod_key(pod)
+        with self._lock:
+            previous = self._pods.get(name)
+            if event_type == 'DELETED' or not ip:
+                self._pods.pop(name, None)
+                self._node_names.pop(previous, None)
+            else:
+                if previous is not None and previous != ip:
+                    # The pod moved to a new IP, forget the old one
+                    self._node_names.pop(previous, None)
+                self._pods[name] = ip
+                self._node_names[ip] = self._node_name(pod)
+            changed = previous != self._pods.get(name)
+        if changed:
+            self._refresh_topology()
+            self._notify()
+        return self._resource_version(pod)
+
+    def _run(self):
+        resource_version = None
+        while not self._stopped.is_set():
+            try:
+                if resource_version is None:
+                    pods, resource_version = self._list_source()
+                    self.replace(pods)
+                    self.synced.set()
+                for event in self._watch_source(resource_version):
+                    if self._stopped.is_set():
+                        return
+                    resource_version = self.apply_event(event) or resource_version
+            except client.ApiException as e:
+                if e.status == 410:
+                    # Resource version too old, relist
+                    resource_version = None
+                print(f"Neighbour watch failed: {e}", flush=True)
+                self._stopped.wait(self.retry_delay)
+            except Exception as e:
+                print(f"Neighbour watch failed: {e}", flush=True)
+                self._stopped.wait(self.retry_delay)
+
+    def _refresh_topology(self):
+        """Re-reads the node labels when a pod landed on a node that is not known yet."""
+        if self.topology is None:
+            return
+        with self._lock:
+            node_names = set(self._node_names.values())
+        if any(node_name and not self.topology.knows(node_name) for node_name in node_names):
+            try:
+                self.topology.refresh()
+            except Exception as e:
+                # Peers stay 'unknown' (flat gossip) until the next refresh succeeds
+                print(f"Node topology refresh failed: {e}", flush=True)
+
+    def _notify(self):
+        if self.on_change is not None:
+            self.on_change(self.snapshot())
+
+    @staticmethod
+    def _pod_key(pod):
+        ip = pod.status.pod_ip if pod.status is not None else None
+        # Terminating pods are no longer valid gossip targets
+        if pod.metadata.deletion_timestamp is not None:
+            ip = None
+        return pod.metadata.name, ip
+
+    @staticmethod
+    def _node_name(pod):
+        return pod.spec.node_name if pod.spec is not None else None
+
+    @staticmethod
+    def _resource_version(pod):
+        return getattr(pod.metadata, 'resource_version', None)
+
+    def _api(self):
+        if self._v1 is None:
+            # Load in-cluster config (for running inside Kubernetes)
+            config.load_incluster_config()
+            self._v1 = client.CoreV1Api()
+        return self._v1
+
+    def _kubernetes_list(self):
+        ret = self._api().list_namespaced_pod(namespace=self.namespace, label_selector=self.label_selector)
+        return ret.items, ret.metadata.resource_version
+
+    def _kubernetes_watch(self, resource_version):
+        self._watch = watch.Watch()
+        return self._watch.stream(self._api().list_namespaced_pod, namespace=self.namespace,
+                                  label_selector=self.label_selector, resource_version=resource_version,
+                                  allow_watch_bookmarks=True)
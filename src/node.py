@@ -1,4 +1,3 @@
-from kubernetes import client, config
 import grpc
 import os
 import socket
@@ -6,23 +5,97 @@ from concurrent import futures
 import gossip_pb2
 import gossip_pb2_grpc
 import json
+import signal
+import sys
+import threading
+from channel_pool import ChannelPool
+from stream_pool import StreamPool
 import time
-from kubernetes import client, config
+from neighbours import NeighbourRegistry
+from node_config import NodeConfig
+from seen_cache import SeenCache
+from epidemic import RumorStore, select_peers
+from event_logger import EventLogger, make_sink
+from convergence import ConvergenceTracker, ReceiptReporter
+from clock_sync import ClockOffsets
+from metrics import NodeMetrics
+from circuit_breaker import RETRYABLE_CODES, PeerCircuitBreaker, backoff_delay
+from topology import NodeTopology, hierarchical_targets, nearest_first, tier
+from payloads import PayloadStore, content_hash, encode, make_payload, verify
 
 # Inspired from k8sv2
 class Node(gossip_pb2_grpc.GossipServiceServicer):
 
-    def __init__(self, service_name):
-        self.hostname = socket.gethostname()
-        self.host = socket.gethostbyname(self.hostname)
-        self.port = '5050'
+    def __init__(self, service_name, host=None, port='5050', hostname=None, neighbours=None, bind_address='[::]',
+                 config=None):
+        # host/port/neighbours can be injected to run nodes outside Kubernetes (see harness.py);
+        # a host of the form 'ip:port' is used as-is as the node's address
+        self.hostname = hostname or socket.gethostname()
+        self.host = host or socket.gethostbyname(self.hostname)
+        self.port = port
+        self.bind_address = bind_address
         self.service_name = service_name
         self.app_name = 'bcgossip'
+        # Settings from the environment (see node_config.py)
+        self.config = config or NodeConfig()
         # List to keep track of IPs of neighboring nodes
         self.susceptible_nodes = []
-        # Set to keep track of messages that have been received to prevent loops
-        self.received_message = ""
+        # Bounded set of messages that have been received to prevent loops
+        self.seen = SeenCache(max_size=self.config.seen_cache_size, ttl=self.config.seen_cache_ttl)
+        # In-process latency histograms, counters and pool gauges, served over HTTP on METRICS_PORT (0 = off)
+        self.metrics = NodeMetrics()
         # self.gossip_initiated = False
+        self.breakers = PeerCircuitBreaker(failure_threshold=self.config.breaker_failures,
+                                           reset_timeout=self.config.breaker_reset)
+        # Persistent channel/stub per peer, shared by every message this node sends
+        self.channel_pool = ChannelPool(self.port)
+        # Neighbours are kept up to date by a background list+watch on the API server
+        self.neighbours = neighbours or NeighbourRegistry(
+            self.host, self.app_name, namespace=self.config.namespace, label_selector=self.config.label_selector,
+            topology=NodeTopology() if self.config.topology_mode != 'off' else None)
+        self.neighbours.on_change = self._neighbours_changed
+        self.pull_round = 0
+        self.rumors = RumorStore(self.config.gossip_ttl)
+        self.event_logger = None
+        if self.config.event_log_mode == 'async' or self.config.event_log_format == 'compact':
+            self.event_logger = self._create_event_logger()
+        # Fan-outs/forwards still running and the time of the last activity (Status RPC, quiescence check)
+        self._activity_lock = threading.Lock()
+        self.in_flight = 0
+        self.last_activity = time.monotonic()
+        # Threads the Trigger RPC polls the other nodes' Status with (created on first use)
+        self.status_pool = None
+        self.receipt_reporter = ReceiptReporter(self._send_receipts, flush_interval=self.config.receipt_flush_interval,
+                                                batch_size=self.config.receipt_batch_size)
+        self.convergence = ConvergenceTracker(max_messages=self.config.convergence_history)
+        # Receipts are sent from the reporter thread, always over a blocking channel pool
+        self.receipt_channels = self.channel_pool
+        # Per-peer clock offset/RTT table from the timestamps piggybacked on every RPC and its reply,
+        # used to log skew-corrected latencies next to the raw propagation_time
+        self.clock = ClockOffsets(window=self.config.clock_window, max_age=self.config.clock_max_age)
+        self.payloads = PayloadStore(max_bytes=self.config.payload_store_bytes)
+        # Messages whose payload is being fetched, and the running fetches by payload hash
+        self._fetch_lock = threading.Lock()
+        self._fetching = set()
+        self._payload_fetches = {}
+        self._create_pools()
+        self.ready = threading.Event()
+        # Set by stop(): the pull rounds, send retries and warm-up end instead of running on
+        self.stopping = threading.Event()
+
+    def _create_pools(self):
+        """Thread pools and peer streams of the blocking server (AioNode runs these on its event loop)."""
+        self.fanout_pool = None
+        if self.config.fanout_concurrency > 1:
+            self.fanout_pool = self.metrics.executor('fanout', self.config.fanout_concurrency,
+                                                     thread_name_prefix='fanout')
+        # Receivers forward (push) off the request path so the ack is not delayed
+        self.forward_pool = self.metrics.executor('forward', self.config.fanout_concurrency,
+                                                  thread_name_prefix='forward')
+        self.fetch_pool = self.metrics.executor('fetch', self.config.payload_fetch_workers, thread_name_prefix='fetch')
+        self.stream_pool = StreamPool(self.channel_pool, batch_size=self.config.stream_batch_size,
+                                      flush_interval=self.config.stream_flush_interval,
+                                      idle_timeout=self.config.stream_idle_timeout)
 
     # def get_neighbours(self):
     #     """Finds neighbor pods using DNS reverse lookup for minimal latency"""
@@ -69,110 +142,780 @@ class Node(gossip_pb2_grpc.GossipServiceServicer):
     #     return self.susceptible_nodes
 
     def get_neighbours(self):
-        # Clear the existing list to refresh it
-        self.susceptible_nodes = []
+        """Refreshes susceptible_nodes from the watch-backed neighbour cache (no API call)."""
+        self.susceptible_nodes = self.neighbours.snapshot()
+        return self.susceptible_nodes
+
+    def _neighbours_changed(self, neighbours):
+        # Logged here rather than on every fan-out, which reads the same cached list
+        print(f"{self.hostname}({self.host}) neighbours: {neighbours}", flush=True)
+        self._on_neighbours_changed(neighbours)
+
+    def _on_neighbours_changed(self, neighbours):
+        # Drop channels and streams to pods that are no longer neighbours
+        peer_ips = [peer_ip for _, peer_ip in neighbours]
+        self.stream_pool.retain(peer_ips)
+        self.channel_pool.retain(peer_ips)
+        self.breakers.retain(peer_ips)
 
-        # Load in-cluster config (for running inside Kubernetes)
-        config.load_incluster_config()
+    def SendMessage(self, request, context):
 
-        # Create CoreV1Api instance
-        v1 = client.CoreV1Api()
+        """
+        Receiving message from other nodes
+        and distribute it to others (multi rounds gossip)
+        """
+        received = self._now()
+        result = None
+        if self._fetches_payload(request):
+            event_type = 'fetching'
+        else:
+            event_type = self._accept(request)
+            if event_type == 'initiate':
+                result = self._initiate(request)
+            elif event_type == 'received':
+                self._forward(request)
+        ack = self._stamp(self._acknowledge(event_type, request.message, result), received)
+        self.metrics.receive_to_ack.labels(event_type).observe(ack.processing_ns / 1e9)
+        return ack
 
-        # Define the namespace and label selector
-        namespace = "default"  # Replace with your namespace if different
-        label_selector = f"app={self.app_name}"  # Use the correct label key and value
+    def StreamMessages(self, request_iterator, context):
+        """
+        Receiving batches of messages over one long-lived stream per peer,
+        answering every GossipBatch with a single AckBatch
+        """
+        for batch in request_iterator:
+            counts = {'initiate': 0, 'duplicate': 0, 'received': 0}
+            for request in batch.messages:
+                if self._fetches_payload(request):
+                    counts['received'] += 1
+                    continue
+                event_type = self._accept(request)
+                counts[event_type] += 1
+                if event_type == 'initiate':
+                    self._initiate(request)
+                elif event_type == 'received':
+                    self._forward(request)
+            yield gossip_pb2.AckBatch(accepted=counts['received'], duplicates=counts['duplicate'],
+                                      initiated=counts['initiate'])
 
-        # Debugging: Print the namespace and label selector
-        # print(f"Fetching Pods in namespace: {namespace}, with label selector: {label_selector}", flush=True)
+    def PullMessages(self, request, context):
+        """Epidemic pull: hands out the active messages the caller does not know yet"""
+        received = self._now()
+        return self._stamp(self._pull_response(request), received)
 
+    def Trigger(self, request, context):
+        """
+        Test control (automate.py): makes request.target initiate the message
+        and, if asked, waits until every node is idle
+        """
+        start = time.perf_counter()
+        target = request.target or self.host
+        result = gossip_pb2.TriggerResult(target=target, message=request.message)
         try:
-            # Fetch Pods in the specified namespace with the label selector
-            ret = v1.list_namespaced_pod(namespace=namespace, label_selector=label_selector)
+            ack = self.channel_pool.get_stub(target).SendMessage(self._trigger_message(request, target))
+            self._trigger_acknowledged(result, ack)
+        except grpc.RpcError as e:
+            self.metrics.rpc_error('SendMessage', e.code())
+            result.details = f"Failed to trigger '{request.message}' on {target}: {e.code().name}"
+            if e.code() == grpc.StatusCode.UNAVAILABLE:
+                self.channel_pool.evict(target)
+        result.ack_ms = (time.perf_counter() - start) * 1e3
 
-            # Debugging: Print the number of Pods returned
-            # print(f"Number of Pods returned: {len(ret.items)}", flush=True)
+        if result.initiated and request.quiesce_timeout_ms > 0:
+            deadline = start + request.quiesce_timeout_ms / 1e3
+            status_request = gossip_pb2.StatusRequest(message=request.message)
+            # Adaptive poll interval: 1 ms doubling up to 50 ms
+            interval = 0.001
+            while not self._check_quiescence(result, self._poll_status(status_request), request.settle_ms, start):
+                if time.perf_counter() + interval > deadline:
+                    break
+                time.sleep(interval)
+                interval = min(interval * 2, 0.05)
+        if result.initiated and self.config.receipts_enabled:
+            tracker, convergence_request = self._convergence_request(result, request, start)
+            result.convergence.CopyFrom(self._get_convergence(tracker, convergence_request))
+        return result
 
-            # Iterate through the Pods
-            for pod in ret.items:
-                # Debugging: Print Pod details
-                # print(f"Pod Name: {pod.metadata.name},
-                # Pod IP: {pod.status.pod_ip}, Labels: {pod.metadata.labels}",flush=True)
+    def Status(self, request, context):
+        """Test control: in-flight work of this node"""
+        return self._status(request)
 
-                # Skip the Pod's own IP
-                if self.host == pod.status.pod_ip:
-                    # print(f"Skipping own IP: {self.host}", flush=True)
-                    continue
-                # Add the Pod's IP and name to the list of susceptible nodes
-                self.susceptible_nodes.append((pod.metadata.name, pod.status.pod_ip))
+    def ReportReceipts(self, request, context):
+        """Convergence reporting: first receipts sent by the receivers of the messages tracked here"""
+        received = self._now()
+        return self._stamp(gossip_pb2.ReceiptAck(accepted=self._record_receipts(request.receipts)), received)
 
-            # Optional: Log the list of neighbors for debugging
-            # print(f"Susceptible nodes: {self.susceptible_nodes}", flush=True)
+    def GetConvergence(self, request, context):
+        """Convergence time, coverage and stragglers of a message tracked by this node"""
+        return gossip_pb2.ConvergenceReport(**self.convergence.report(request.message, request.wait_ms / 1e3))
 
-        except client.ApiException as e:
-            print(f"Failed to fetch Pods: {e}", flush=True)
-    def SendMessage(self, request, context):
+    def FetchPayload(self, request, context):
+        """Streams a payload body by content hash, in PAYLOAD_CHUNK_BYTES chunks"""
+        entry = self.payloads.get(request.hash)
+        if entry is None:
+            context.abort(grpc.StatusCode.NOT_FOUND, f"{self.host} has no payload {request.hash}")
+        yield from self._payload_chunks(*entry)
+
+    @staticmethod
+    def _now():
+        """(wall-clock ns, monotonic ns), taken when a request arrives or is sent."""
+        return time.time_ns(), time.monotonic_ns()
+
+    @staticmethod
+    def _stamp(response, received):
+        """Adds the receive/reply timestamps the caller estimates our clock offset from."""
+        response.received_timestamp = received[0]
+        response.processing_ns = time.monotonic_ns() - received[1]
+        response.sent_timestamp = time.time_ns()
+        return response
+
+    def _clock_sample(self, peer_ip, sent, response):
+        """Feeds one request/reply exchange with a peer to the clock table; `sent` is _now() at send time."""
+        self.clock.add(peer_ip, sent[0], response.received_timestamp, response.sent_timestamp, time.time_ns(),
+                       time.monotonic_ns() - sent[1] - response.processing_ns)
 
+    def _convergence_request(self, result, request, start):
         """
-        Receiving message from other nodes
-        and distribute it to others (multi rounds gossip)
+        Where the Trigger reads the convergence report from, and the request:
+        after a quiescence check every receipt is queued, so it only waits for
+        the last flush; otherwise it reports right away.
+        """
+        tracker = self.config.receipt_aggregator or result.target
+        wait_ms = 0
+        if request.quiesce_timeout_ms > 0:
+            remaining_ms = request.quiesce_timeout_ms - (time.perf_counter() - start) * 1e3
+            wait_ms = int(max(0.0, min(remaining_ms, 3 * self.config.receipt_flush_interval * 1e3 + 100)))
+        return tracker, gossip_pb2.ConvergenceRequest(message=result.message, wait_ms=wait_ms)
+
+    def _get_convergence(self, tracker, request):
+        if tracker == self.host:
+            return self.GetConvergence(request, None)
+        try:
+            return self.receipt_channels.get_stub(tracker).GetConvergence(request,
+                                                                           timeout=request.wait_ms / 1e3 + 5.0)
+        except grpc.RpcError as e:
+            self.metrics.rpc_error('GetConvergence', e.code())
+            print(f"Failed to get the convergence of '{request.message}' from {tracker}: {e}", flush=True)
+            return gossip_pb2.ConvergenceReport(message=request.message)
+
+    def _track_initiate(self, message, initiated_timestamp):
+        """The initiator starts tracking its message (or hands it to the aggregator)."""
+        if not self.config.receipts_enabled:
+            return
+        if self.config.receipt_aggregator and self.config.receipt_aggregator != self.host:
+            self.receipt_reporter.add(self.config.receipt_aggregator, gossip_pb2.Receipt(
+                message=message, receiver_id=self.host, received_timestamp=initiated_timestamp, initiate=True,
+                origin=self.host))
+        else:
+            self.convergence.begin(message, self.host, initiated_timestamp, self._expected_nodes())
+
+    def _report_receipt(self, request, received_timestamp, propagation_time):
+        """Queues this node's first receipt of a message for the initiator (or the aggregator)."""
+        if not self.config.receipts_enabled:
+            return
+        # Senders that predate the origin field are always the initiator (direct mail)
+        origin = request.origin or request.sender_id
+        destination = self.config.receipt_aggregator or origin
+        receipt = gossip_pb2.Receipt(message=request.message, receiver_id=self.host,
+                                     received_timestamp=received_timestamp, propagation_time=propagation_time,
+                                     hops=request.hops, origin=origin)
+        if destination == self.host:
+            self._record_receipts([receipt])
+        else:
+            self.receipt_reporter.add(destination, receipt)
+
+    def _record_receipts(self, receipts):
+        for receipt in receipts:
+            if receipt.initiate:
+                self.convergence.begin(receipt.message, receipt.origin, receipt.received_timestamp,
+                                       self._expected_nodes())
+            else:
+                self.convergence.record(receipt.message, receipt.receiver_id, receipt.received_timestamp)
+        return len(receipts)
+
+    def _expected_nodes(self):
+        """This node and its current neighbours: the nodes a message tracked here should reach."""
+        return [self.host] + [peer_ip for _, peer_ip in self.neighbours.snapshot()]
+
+    def _send_receipts(self, destination, receipts):
+        # Runs on the reporter thread
+        try:
+            sent = self._now()
+            ack = self.receipt_channels.get_stub(destination).ReportReceipts(
+                gossip_pb2.ReceiptBatch(receipts=receipts), timeout=5.0)
+            self._clock_sample(destination, sent, ack)
+        except grpc.RpcError as e:
+            self.metrics.rpc_error('ReportReceipts', e.code())
+            print(f"Failed to report {len(receipts)} receipts to {destination}: {e.code().name}", flush=True)
+            if e.code() == grpc.StatusCode.UNAVAILABLE:
+                self.receipt_channels.evict(destination)
+
+    def _accept(self, request, pull_round=None):
+        """
+        Dedupes and logs an incoming message.
+        `pull_round` is the local pull round the message arrived in (None when pushed).
+        Returns 'initiate', 'duplicate' or 'received'.
         """
         message = request.message
         sender_id = request.sender_id
         received_timestamp = time.time_ns()
+        self.last_activity = time.monotonic()
+        self._store_payload(request)
+        # Per-hop metadata, only logged by the epidemic modes
+        hop = {}
+        if self.config.gossip_mode != 'direct':
+            hop = {'round': request.hops if pull_round is None else pull_round, 'path_length': request.hops}
 
         # For initiating acknowledgment only
         if sender_id == self.host:
-            self.received_message = message
+            self.seen.add(message)
             log_message = (f"Gossip initiated by {self.hostname} ({self.host}) at "
                            f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(received_timestamp / 1e9))}")
             self._log_event(message, sender_id, received_timestamp, None,
-                            'initiate', log_message)
-            self.gossip_message(message, sender_id)
-            return gossip_pb2.Acknowledgment(details=f"Done propagate! {self.host} received: '{message}'")
+                            'initiate', log_message, **hop)
+            self._add_rumor(message, 0, self.host)
+            self._track_initiate(message, received_timestamp)
+            return 'initiate'
 
         # Check whether the message is already received ot not
         # Notify whether accept it or ignore it
-        elif self.received_message == message:
+        elif not self.seen.add(message):
+            self.metrics.duplicates.inc()
+            self._report_seen_stats()
             log_message = f"{self.host} ignoring duplicate message: {message} from {sender_id}"
-            self._log_event(message, sender_id, received_timestamp, None, 'duplicate', log_message)
-            return gossip_pb2.Acknowledgment(details=f"Duplicate message ignored by ({self.host})")
+            self._log_event(message, sender_id, received_timestamp, None, 'duplicate', log_message,
+                            tier=self._logged_tier(sender_id), **hop)
+            return 'duplicate'
         else:
-            self.received_message = message
+            self._report_seen_stats()
             propagation_time = (received_timestamp - request.timestamp) / 1e6
             log_message = (f"({self.hostname}({self.host}) received: '{message}' from {sender_id}"
                            f" in {propagation_time:.2f} ms ")
-            self._log_event(message, sender_id, received_timestamp, propagation_time, 'received', log_message)
-            # Start gossip only when the node is the gossip initiator itself
-            # therefore, only one iteration is required
-            return gossip_pb2.Acknowledgment(details=f"{self.host} received: '{message}'")
+            clock = self.clock.correct(sender_id, propagation_time, request.clock_offset_ms, request.clock_rtt_ms)
+            self._log_event(message, sender_id, received_timestamp, propagation_time, 'received', log_message,
+                            clock=clock, tier=self._logged_tier(sender_id), **hop)
+            # In direct mail only the initiator gossips (and the zone relays of the hierarchical topology),
+            # therefore only one iteration is required; the epidemic modes spread it further through
+            # _forward and the pull rounds
+            self._add_rumor(message, request.hops, request.origin)
+            self._report_receipt(request, received_timestamp, propagation_time)
+            return 'received'
+
+    def _add_rumor(self, message, hops, origin):
+        # Rumors are only served (and aged) by the pull rounds
+        if self.config.gossip_mode in ('pull', 'push-pull'):
+            self.rumors.add(message, hops, origin)
+
+    def _initiate(self, request):
+        """Runs the initiator's fan-out, counted as in-flight work."""
+        self._activity(1)
+        try:
+            return self.gossip_message(request.message, request.sender_id)
+        finally:
+            self._activity(-1)
+
+    def _activity(self, delta):
+        with self._activity_lock:
+            self.in_flight += delta
+            self.last_activity = time.monotonic()
+
+    def _status(self, request):
+        with self._activity_lock:
+            in_flight, last_activity = self.in_flight, self.last_activity
+        status = gossip_pb2.NodeStatus(
+            host=self.host,
+            in_flight=in_flight,
+            active_rumors=len(self.rumors),
+            idle_ms=(time.monotonic() - last_activity) * 1e3,
+            has_message=bool(request.message) and request.message in self.seen,
+            ready=self.ready.is_set(),
+        )
+        if request.clocks:
+            for peer, estimate in sorted(self.clock.snapshot().items()):
+                status.clocks.add(peer=peer, **estimate)
+        return status
+
+    def _poll_status(self, request):
+        """Status of every node (this one included); None for the nodes that did not answer."""
+        peers = [peer_ip for _, peer_ip in self.get_neighbours()]
+        return [self._status(request)] + self._peer_statuses(peers, request)
+
+    def _peer_statuses(self, peers, request):
+        if self.status_pool is None:
+            self.status_pool = futures.ThreadPoolExecutor(max_workers=16, thread_name_prefix='status')
+        return list(self.status_pool.map(lambda peer_ip: self._peer_status(peer_ip, request), peers))
+
+    def _peer_status(self, peer_ip, request):
+        try:
+            return self.channel_pool.get_stub(peer_ip).Status(request, timeout=1.0)
+        except grpc.RpcError as e:
+            self.metrics.rpc_error('Status', e.code())
+            if e.code() == grpc.StatusCode.UNAVAILABLE:
+                self.channel_pool.evict(peer_ip)
+            return None
+
+    @staticmethod
+    def _trigger_message(request, target):
+        """The message that makes the target initiate, with a random payload of request.payload_size bytes."""
+        message = gossip_pb2.GossipMessage(message=request.message, sender_id=target, timestamp=time.time_ns())
+        if request.payload_size > 0:
+            message.payload = make_payload(request.payload_size)
+            message.payload_hash = content_hash(message.payload)
+            message.payload_size = request.payload_size
+        return message
+
+    @staticmethod
+    def _trigger_acknowledged(result, ack):
+        result.initiated = ack.initiated
+        result.details = ack.details
+        result.succeeded = ack.succeeded
+        result.failed = ack.failed
+        result.timed_out = ack.timed_out
+        result.skipped = ack.skipped
+
+    @staticmethod
+    def _check_quiescence(result, statuses, settle_ms, start):
+        """
+        Records coverage in the TriggerResult; True (and quiesce_ms) once every
+        node that answered has nothing in flight and was idle for settle_ms.
+        """
+        answered = [status for status in statuses if status is not None]
+        result.nodes = len(answered)
+        result.covered = sum(status.has_message for status in answered)
+        if all(status.in_flight == 0 and status.active_rumors == 0 and status.idle_ms >= settle_ms
+               for status in answered):
+            result.quiescent = True
+            result.quiesce_ms = (time.perf_counter() - start) * 1e3
+            return True
+        return False
+
+    def _acknowledge(self, event_type, message, result=None):
+        """Builds the Acknowledgment for an accepted message (result is the fan-out outcome)."""
+        if event_type == 'initiate':
+            return gossip_pb2.Acknowledgment(details=f"Done propagate! {self.host} received: '{message}' "
+                                                     f"(succeeded={len(result['succeeded'])}, "
+                                                     f"failed={len(result['failed'])}, "
+                                                     f"timed_out={len(result['timed_out'])}, "
+                                                     f"skipped={len(result['skipped'])})",
+                                             initiated=True,
+                                             succeeded=len(result['succeeded']),
+                                             failed=len(result['failed']),
+                                             timed_out=len(result['timed_out']),
+                                             skipped=len(result['skipped']))
+        elif event_type == 'duplicate':
+            return gossip_pb2.Acknowledgment(details=f"Duplicate message ignored by ({self.host})")
+        elif event_type == 'fetching':
+            return gossip_pb2.Acknowledgment(details=f"{self.host} fetching the payload of '{message}'")
+        return gossip_pb2.Acknowledgment(details=f"{self.host} received: '{message}'")
+
+    def _report_seen_stats(self):
+        """Prints the dedupe counters every seen_report_every lookups."""
+        if not self.config.seen_report_every:
+            return
+        stats = self.seen.stats()
+        if (stats['hits'] + stats['misses']) % self.config.seen_report_every == 0:
+            self._write_event({'event': 'seen_cache_stats', 'receiver_id': self.host, **stats})
+
+    def _store_payload(self, request):
+        """Keeps an inline payload body (encoded as configured on the initiator) and binds it to the message."""
+        if request.payload_hash and self.payloads.has(request.payload_hash):
+            # Already stored: announced again, or verified ahead of _accept (AioNode)
+            self.payloads.bind(request.message, request.payload_hash)
+        elif request.payload:
+            stored = self._prepare_payload(request)
+            if stored is not None:
+                self.payloads.put(*stored)
+                self.payloads.bind(request.message, stored[0])
+
+    def _prepare_payload(self, request):
+        """
+        Hashes and encodes (initiator) or verifies (receivers) an inline body.
+        Returns (digest, data, encoding, size), or None if the body does not
+        match its hash.
+        """
+        data, encoding = request.payload, request.payload_encoding
+        digest = request.payload_hash or content_hash(data)
+        size = request.payload_size or len(data)
+        if request.sender_id == self.host and not encoding:
+            data, encoding = encode(data, self.config.payload_compression)
+        else:
+            try:
+                verify(data, encoding, digest)
+            except ValueError as e:
+                self._write_event({'event': 'payload_failed', 'message': request.message,
+                                   'receiver_id': self.host, 'peer': request.sender_id, 'hash': digest,
+                                   'error': str(e)})
+                return None
+        return digest, data, encoding, size
+
+    def _fetches_payload(self, request):
+        """
+        Whether a message announced without its body waits for the body to be
+        fetched from the sender before it is accepted. Only one fetch per
+        payload hash runs at a time; messages announcing a body that is
+        already stored (or being fetched) never download it again.
+        """
+        digest = request.payload_hash
+        if not digest or request.payload or request.sender_id == self.host or request.message in self.seen:
+            return False
+        if self.payloads.has(digest):
+            self._write_event({'event': 'payload_deduplicated', 'message': request.message,
+                               'receiver_id': self.host, 'peer': request.sender_id, 'hash': digest,
+                               'size': request.payload_size})
+            return False
+        with self._fetch_lock:
+            if request.message in self._fetching:
+                duplicate = True
+            else:
+                duplicate = False
+                self._fetching.add(request.message)
+                waiting = self._payload_fetches.setdefault(digest, [])
+                waiting.append(request)
+                first = len(waiting) == 1
+        if duplicate:
+            self.metrics.duplicates.inc()
+            self._log_event(request.message, request.sender_id, time.time_ns(), None, 'duplicate',
+                            f"{self.host} ignoring duplicate message: {request.message} from "
+                            f"{request.sender_id} (payload being fetched)", tier=self._logged_tier(request.sender_id))
+        elif first:
+            self._start_fetch(request)
+        return True
+
+    def _start_fetch(self, request):
+        self._activity(1)
+        future = self.fetch_pool.submit(self._fetch_payload, request)
+        future.add_done_callback(lambda _: self._activity(-1))
 
-    def gossip_message(self, message, sender_ip):
+    def _fetch_payload(self, request):
+        """Downloads the body announced by request from its sender, then accepts the waiting messages."""
+        start = time.perf_counter()
+        chunks = []
+        encoding, size = '', request.payload_size
+        try:
+            for chunk in self.channel_pool.get_stub(request.sender_id).FetchPayload(
+                    gossip_pb2.PayloadRequest(hash=request.payload_hash, sender_id=self.host),
+                    timeout=self.config.payload_timeout):
+                chunks.append(chunk.data)
+                encoding, size = chunk.encoding, chunk.size
+            data = b''.join(chunks)
+            verify(data, encoding, request.payload_hash)
+        except grpc.RpcError as e:
+            self.metrics.rpc_error('FetchPayload', e.code())
+            if e.code() == grpc.StatusCode.UNAVAILABLE:
+                self.channel_pool.evict(request.sender_id)
+            self._payload_fetched(request, start, error=e.code().name)
+            return
+        except ValueError as e:
+            self._payload_fetched(request, start, error=str(e))
+            return
+        self._payload_fetched(request, start, data, encoding, size, len(chunks))
+
+    def _payload_fetched(self, request, start, data=None, encoding='', size=0, chunks=0, error=None):
+        """Stores a fetched body and accepts (and forwards) every message that waited for it."""
+        digest = request.payload_hash
+        event = {'message': request.message, 'receiver_id': self.host, 'peer': request.sender_id, 'hash': digest,
+                 'fetch_ms': (time.perf_counter() - start) * 1e3}
+        if error is None:
+            self.payloads.put(digest, data, encoding, size)
+            self.metrics.payload_bytes.labels('fetched').inc(len(data))
+            self._write_event({'event': 'payload_fetched', **event, 'size': size, 'encoded_size': len(data),
+                               'chunks': chunks})
+        with self._fetch_lock:
+            waiting = self._payload_fetches.pop(digest, [])
+            for waiter in waiting:
+                self._fetching.discard(waiter.message)
+        if error is not None:
+            # Not marked as seen: the next announcement of these messages fetches again
+            self._write_event({'event': 'payload_failed', **event, 'error': error,
+                               'messages': [waiter.message for waiter in waiting]})
+            return
+        for waiter in waiting:
+            if self._accept(waiter) == 'received':
+                self._forward(waiter)
+
+    def _payload_chunks(self, data, encoding, size):
+        self.metrics.payload_bytes.labels('served').inc(len(data))
+        for offset in range(0, max(len(data), 1), self.config.payload_chunk):
+            yield gossip_pb2.PayloadChunk(data=data[offset:offset + self.config.payload_chunk], encoding=encoding,
+                                          encoded_size=len(data), size=size)
+
+    def _payload_fields(self, message):
+        """Payload fields of an outgoing message: the hash always, the body only up to PAYLOAD_INLINE_BYTES."""
+        described = self.payloads.describe(message)
+        if described is None:
+            return {}
+        digest, data, encoding, size = described
+        fields = {'payload_hash': digest, 'payload_size': size, 'payload_encoding': encoding}
+        if len(data) <= self.config.payload_inline:
+            fields['payload'] = data
+        return fields
+
+    def _forward(self, request):
+        """
+        Push modes: relays a newly received message to k random peers until its TTL runs out.
+        Hierarchical direct mail: a zone relay passes a message from another zone on to its zone.
+        """
+        if self._forwards(request):
+            self._activity(1)
+            future = self.forward_pool.submit(self.gossip_message, request.message, request.sender_id,
+                                              request.hops + 1, request.origin)
+            future.add_done_callback(lambda _: self._activity(-1))
+
+    def _forwards(self, request):
+        """Whether a newly received message is passed on by this node."""
+        if self.config.gossip_mode in ('push', 'push-pull'):
+            return request.hops < self.config.gossip_ttl
+        # Direct mail: only a zone relay passes on a message that crossed a zone or region boundary
+        return (self.config.gossip_mode == 'direct' and self.config.topology_mode == 'hierarchical'
+                and self._tier(request.sender_id) in ('region', 'remote'))
+
+    def _tier(self, peer_ip):
+        """Topology tier of a peer: 'zone', 'region', 'remote' or 'unknown'."""
+        return tier(self.neighbours.location(self.host), self.neighbours.location(peer_ip))
+
+    def _logged_tier(self, peer_ip):
+        # Events only carry the tier when topology-aware selection is on
+        return None if self.config.topology_mode == 'off' else self._tier(peer_ip)
+
+    def _pull_response(self, request):
+        send_timestamp = time.time_ns()
+        return gossip_pb2.GossipBatch(messages=[
+            gossip_pb2.GossipMessage(message=message, sender_id=self.host, timestamp=send_timestamp, hops=hops + 1,
+                                     origin=origin, **self._payload_fields(message))
+            for message, hops, origin in self.rumors.missing_from(request.known)
+            if hops < self.config.gossip_ttl
+        ])
+
+    def _next_pull(self):
+        """Starts a pull round: ages the rumors and returns (peers to pull from, request)."""
+        self.pull_round += 1
+        self.rumors.age()
+        self.get_neighbours()
+        peers = select_peers([peer_ip for _, peer_ip in self.susceptible_nodes], self.config.gossip_fanout)
+        request = gossip_pb2.PullRequest(sender_id=self.host, known=self.rumors.ids(), round=self.pull_round)
+        return peers, request
+
+    def _apply_pull(self, batch, pull_round):
+        for request in batch.messages:
+            if self._fetches_payload(request):
+                continue
+            if self._accept(request, pull_round) == 'received':
+                self._forward(request)
+
+    def _pull_loop(self):
+        while not self.stopping.wait(self.config.round_interval):
+            peers, request = self._next_pull()
+            for peer_ip in peers:
+                try:
+                    sent = self._now()
+                    batch = self.channel_pool.get_stub(peer_ip).PullMessages(request, timeout=self.config.fanout_timeout)
+                    # Sample first, the pulled messages are corrected with it
+                    self._clock_sample(peer_ip, sent, batch)
+                    self._apply_pull(batch, request.round)
+                except grpc.RpcError as e:
+                    if self.stopping.is_set():
+                        return
+                    self.metrics.rpc_error('PullMessages', e.code())
+                    print(f"Failed to pull from {peer_ip}: {e}", flush=True)
+                    if e.code() == grpc.StatusCode.UNAVAILABLE:
+                        self.channel_pool.evict(peer_ip)
+
+    def gossip_message(self, message, sender_ip, hops=1, origin=None):
+        """
+        Send the message to every neighbour (except the sender), or to
+        GOSSIP_FANOUT random ones in the push modes (chosen by zone and
+        region when TOPOLOGY_MODE is set).
+        Peers are contacted one at a time, through the fan-out pool when
+        FANOUT_CONCURRENCY > 1, or over batched streams when GOSSIP_TRANSPORT
+        is 'stream'. Returns the peer IPs grouped by outcome.
+        `origin` is the initiator of a relayed message (this node by default).
+        """
+        peers = self._fanout_peers(sender_ip)
+        origin = origin or self.host
+
+        fanout_start = time.time_ns()
+        if self.config.transport == 'stream':
+            outcomes = self._stream_to_peers(peers, message, hops, origin)
+        elif self.fanout_pool is None:
+            outcomes = [self._send_to_peer(peer_ip, message, hops, origin) for peer_ip in peers]
+        else:
+            outcomes = list(self.fanout_pool.map(lambda peer_ip: self._send_to_peer(peer_ip, message, hops, origin),
+                                                 peers))
+        return self._fanout_result(message, peers, outcomes, fanout_start, hops)
+
+    def _fanout_peers(self, sender_ip):
         # Refresh list of neighbors before gossiping to capture any changes
-        if len(self.susceptible_nodes) == 0:
-            self.get_neighbours()
-        print(f"self.susceptible_nodes: {self.susceptible_nodes}",flush=True)
-
-        # print(f"self.susceptible_nodes={self.susceptible_nodes}",flush=True)
-        for peer_name, peer_ip in self.susceptible_nodes:
-            # Exclude the sender from the list of nodes to forward the message to
-            if peer_ip != sender_ip:
-
-                # Record the send timestamp
-                send_timestamp = time.time_ns()
-
-                with grpc.insecure_channel(f"{peer_ip}:5050") as channel:
-                    try:
-                        stub = gossip_pb2_grpc.GossipServiceStub(channel)
-                        stub.SendMessage(gossip_pb2.GossipMessage(
-                            message=message,
-                            sender_id=self.host,
-                            timestamp=send_timestamp,
-                        ))
-                    except grpc.RpcError as e:
-                        print(f"Failed to send message: '{message}' to {peer_ip}: {e}", flush=True)
-
-    def _log_event(self, message, sender_id, received_timestamp, propagation_time, event_type, log_message):
-        """Logs the gossip event as structured JSON data."""
+        self.get_neighbours()
+
+        # Exclude the sender from the list of nodes to forward the message to
+        return self._select_targets(sender_ip)
+
+    def _select_targets(self, sender_ip):
+        if self.config.gossip_mode == 'pull':
+            # Nothing is pushed; peers fetch the message in their pull rounds
+            return []
+        peers = [peer_ip for _, peer_ip in self.susceptible_nodes if peer_ip != sender_ip]
+        fanout = None if self.config.gossip_mode == 'direct' else self.config.gossip_fanout
+        if self.config.topology_mode != 'off':
+            local = self.neighbours.location(self.host)
+            located = [(peer_ip, self.neighbours.location(peer_ip)) for peer_ip in peers]
+            if self.config.topology_mode == 'aware':
+                return nearest_first(local, located, fanout)
+            sender_tier = 'self' if sender_ip == self.host else self._tier(sender_ip)
+            return hierarchical_targets(local, located, sender_tier, fanout, avoid=self.breakers.open_peers())
+        if fanout is None:
+            return peers
+        return select_peers(peers, fanout)
+
+    def _fanout_result(self, message, peers, outcomes, fanout_start, hops=1):
+        """Groups (peer_ip, outcome) pairs by outcome and logs the fan-out."""
+        fanout_time = (time.time_ns() - fanout_start) / 1e6
+        self.metrics.fanout.observe(fanout_time / 1e3)
+
+        result = {'succeeded': [], 'failed': [], 'timed_out': [], 'skipped': []}
+        for peer_ip, outcome in outcomes:
+            result[outcome].append(peer_ip)
+
+        log_message = (f"{self.host} fan-out of '{message}' to {len(peers)} peers in {fanout_time:.2f} ms "
+                       f"(concurrency={self.config.fanout_concurrency}, succeeded={len(result['succeeded'])}, "
+                       f"failed={result['failed']}, timed_out={result['timed_out']}, skipped={result['skipped']})")
+        if self.config.topology_mode != 'off':
+            tiers = {}
+            for peer_ip in peers:
+                peer_tier = self._tier(peer_ip)
+                tiers[peer_tier] = tiers.get(peer_tier, 0) + 1
+                self.metrics.tier_sends.labels(peer_tier).inc()
+            log_message += f" tiers={tiers}"
+        hop = {} if self.config.gossip_mode == 'direct' else {'round': hops, 'path_length': hops - 1}
+        self._log_event(message, self.host, fanout_start, fanout_time, 'fanout', log_message, **hop)
+        return result
+
+    def _send_to_peer(self, peer_ip, message, hops=1, origin=''):
+        """
+        Sends the message to a single peer and returns (peer_ip, outcome).
+        Retryable failures are sent again up to fanout_retries times; a peer
+        whose circuit is open is not contacted ('skipped').
+        """
+        start = time.perf_counter()
+        if not self._breaker_allows(peer_ip, message):
+            outcome = 'skipped'
+        else:
+            attempt = 0
+            while True:
+                outcome, code = self._send_once(peer_ip, message, hops, origin)
+                delay = self._retry_delay(peer_ip, message, attempt, code)
+                if delay is None or self.stopping.wait(delay):
+                    break
+                attempt += 1
+            self._breaker_record(peer_ip, message, outcome == 'succeeded')
+        self.metrics.peer_send.labels(outcome).observe(time.perf_counter() - start)
+        return peer_ip, outcome
+
+    def _retry_delay(self, peer_ip, message, attempt, code):
+        """Backoff (seconds) before sending again after a failed attempt, or None to give up."""
+        if code not in RETRYABLE_CODES or attempt >= self.config.fanout_retries:
+            return None
+        delay = backoff_delay(attempt, self.config.fanout_backoff, self.config.fanout_backoff_max)
+        self.metrics.retries.labels(code.name).inc()
+        self._write_event({'event': 'send_retry', 'message': message, 'sender_id': self.host, 'peer': peer_ip,
+                           'attempt': attempt + 1, 'code': code.name, 'backoff_ms': delay * 1e3})
+        return delay
+
+    def _breaker_allows(self, peer_ip, message):
+        """False while the peer's circuit is open; logs the trial send of a half-open circuit."""
+        allowed, transition = self.breakers.allow(peer_ip)
+        if transition is not None:
+            self._log_circuit(peer_ip, message, transition)
+        elif not allowed:
+            self._write_event({'event': 'send_skipped', 'message': message, 'sender_id': self.host,
+                               'peer': peer_ip, 'reason': 'circuit_open'})
+        return allowed
+
+    def _breaker_record(self, peer_ip, message, success):
+        transition = self.breakers.record(peer_ip, success)
+        if transition is not None:
+            self._log_circuit(peer_ip, message, transition)
+
+    def _log_circuit(self, peer_ip, message, state):
+        self.metrics.breaker_transitions.labels(state).inc()
+        self._write_event({'event': f'circuit_{state}', 'message': message, 'sender_id': self.host, 'peer': peer_ip,
+                           'failures': self.breakers.failures(peer_ip)})
+
+    def _send_once(self, peer_ip, message, hops, origin):
+        """One SendMessage attempt; returns (outcome, status code of the failure or None)."""
+        # Record the send timestamp right before the call so it stays accurate
+        # even when the call was queued behind other peers in the pool
+        clock_offset_ms, clock_rtt_ms = self.clock.piggyback(peer_ip)
+        sent = self._now()
+
+        try:
+            stub = self.channel_pool.get_stub(peer_ip)
+            ack = stub.SendMessage(gossip_pb2.GossipMessage(
+                message=message,
+                sender_id=self.host,
+                timestamp=sent[0],
+                hops=hops,
+                origin=origin,
+                clock_offset_ms=clock_offset_ms,
+                clock_rtt_ms=clock_rtt_ms,
+                **self._payload_fields(message),
+            ), timeout=self.config.fanout_timeout)
+            self._clock_sample(peer_ip, sent, ack)
+            return 'succeeded', None
+        except grpc.RpcError as e:
+            self.metrics.rpc_error('SendMessage', e.code())
+            print(f"Failed to send message: '{message}' to {peer_ip}: {e}", flush=True)
+            if e.code() == grpc.StatusCode.DEADLINE_EXCEEDED:
+                return 'timed_out', e.code()
+            if e.code() == grpc.StatusCode.UNAVAILABLE:
+                # Reconnect lazily on the next message
+                self.channel_pool.evict(peer_ip)
+            return 'failed', e.code()
+
+    def _stream_to_peers(self, peers, message, hops=1, origin=''):
+        """Queues the message on every peer's stream, then waits for the batched acks."""
+        pending = []
+        outcomes = []
+        for peer_ip in peers:
+            if not self._breaker_allows(peer_ip, message):
+                outcomes.append((peer_ip, 'skipped'))
+                continue
+            # Batched acks carry no timestamps; the estimates come from the other RPCs
+            clock_offset_ms, clock_rtt_ms = self.clock.piggyback(peer_ip)
+            send_timestamp = time.time_ns()
+            pending.append((peer_ip, self.stream_pool.send(peer_ip, gossip_pb2.GossipMessage(
+                message=message,
+                sender_id=self.host,
+                timestamp=send_timestamp,
+                hops=hops,
+                origin=origin,
+                clock_offset_ms=clock_offset_ms,
+                clock_rtt_ms=clock_rtt_ms,
+                **self._payload_fields(message),
+            ))))
+
+        deadline = None if self.config.fanout_timeout is None else time.monotonic() + self.config.fanout_timeout
+        for peer_ip, future in pending:
+            try:
+                future.result(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+                outcomes.append((peer_ip, 'succeeded'))
+            except futures.TimeoutError:
+                outcomes.append((peer_ip, 'timed_out'))
+            except Exception as e:
+                self.metrics.rpc_error('StreamMessages', e.code() if isinstance(e, grpc.RpcError) else 'UNKNOWN')
+                print(f"Failed to send message: '{message}' to {peer_ip}: {e}", flush=True)
+                outcomes.append((peer_ip, 'failed'))
+            # Queued messages are not resent: the stream reconnects on its own
+            self._breaker_record(peer_ip, message, outcomes[-1][1] == 'succeeded')
+        return outcomes
+
+    def _log_event(self, message, sender_id, received_timestamp, propagation_time, event_type, log_message,
+                   round=None, path_length=None, clock=None, tier=None):
+        """
+        Logs the gossip event as structured JSON data.
+        `clock` holds the skew-corrected and monotonic latency fields of a received message,
+        `tier` the topology tier of the sender.
+        """
         event_data = {
             'message': message,
             'sender_id': sender_id,
@@ -182,22 +925,144 @@ class Node(gossip_pb2_grpc.GossipServiceServicer):
             'event_type': event_type,
             'detail': log_message
         }
+        # Per-hop metadata of the epidemic modes
+        if round is not None:
+            event_data['round'] = round
+        if path_length is not None:
+            event_data['path_length'] = path_length
+        if clock is not None:
+            event_data.update(clock)
+        if tier is not None:
+            event_data['tier'] = tier
 
+        self._write_event(event_data)
+
+    def _write_event(self, event_data):
+        if self.event_logger is not None:
+            self.event_logger.log(event_data)
+            return
         # Print both the log message and the JSON data to the console
         print(json.dumps(event_data), flush=True)
 
-    def start_server(self):
-        """ Initiating server """
-        server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    def _create_event_logger(self):
+        return EventLogger(sink=make_sink(self.config.event_log_sink, self.config.event_log_format),
+                           max_events=self.config.event_log_buffer, overflow=self.config.event_log_overflow,
+                           batch_size=self.config.event_log_batch, flush_interval=self.config.event_log_flush_interval)
+
+    def shutdown(self):
+        """Flushes buffered events and receipts before the process exits."""
+        self.receipt_reporter.close()
+        if self.event_logger is not None:
+            self.event_logger.close()
+
+    def stop(self):
+        """Ends the background loops and the neighbour watch, closes the peer channels and flushes."""
+        self.stopping.set()
+        self.neighbours.stop()
+        self.stream_pool.close()
+        self.channel_pool.close()
+        self.shutdown()
+
+    def warm_up(self):
+        """
+        Runs the warm-up and then marks the node ready. Peers are polled with
+        Status (1 s timeout each) until all of them answered, backing off from
+        50 ms to 1 s between rounds.
+        """
+        start = time.perf_counter()
+        deadline = start + self.config.warmup_timeout
+        self.neighbours.wait_synced(self.config.warmup_timeout)
+        self._warm_serialization()
+        request = gossip_pb2.StatusRequest()
+        warmed = set()
+        interval = 0.05
+        while True:
+            peers, pending = self._warmup_pending(warmed)
+            for peer_ip, status in zip(pending, self._peer_statuses(pending, request)):
+                if status is not None:
+                    warmed.add(peer_ip)
+            remaining = deadline - time.perf_counter()
+            if self._warmup_complete(peers, warmed) or remaining <= 0:
+                break
+            if self.stopping.wait(min(interval, remaining)):
+                break
+            interval = min(interval * 2, 1.0)
+        self._warmed_up(peers, warmed, start)
+
+    def _warmup_pending(self, warmed):
+        """(current peers, peers that have not answered a warm-up Status yet)"""
+        peers = [peer_ip for _, peer_ip in self.get_neighbours()]
+        return peers, [peer_ip for peer_ip in peers if peer_ip not in warmed]
+
+    def _warmup_complete(self, peers, warmed):
+        return len(peers) >= self.config.warmup_peers and all(peer_ip in warmed for peer_ip in peers)
+
+    def _warm_serialization(self):
+        # First use of the gossip message classes, kept off the first test's path
+        gossip_pb2.GossipMessage.FromString(gossip_pb2.GossipMessage(
+            message='warmup', sender_id=self.host, timestamp=time.time_ns()).SerializeToString())
+
+    def _warmed_up(self, peers, warmed, start):
+        """Logs the warm-up outcome (which also runs the event path once) and reports ready."""
+        missing = sorted(peer_ip for peer_ip in peers if peer_ip not in warmed)
+        self._write_event({'event': 'warmup', 'receiver_id': self.host, 'peers': len(peers),
+                           'expected_peers': self.config.warmup_peers, 'warmed': len(warmed), 'missing': missing,
+                           'complete': self._warmup_complete(peers, warmed),
+                           'warmup_ms': (time.perf_counter() - start) * 1e3})
+        self.ready.set()
+
+    def start(self):
+        """Starts the gRPC server and background loops without blocking; returns the server."""
+        self.neighbours.start()
+        if self.config.gossip_mode in ('pull', 'push-pull'):
+            threading.Thread(target=self._pull_loop, name='pull-rounds', daemon=True).start()
+        # The handler queue wait is the time an RPC waits for one of these workers
+        server = grpc.server(self.metrics.executor('server', self._server_pool_size()),
+                             options=[('grpc.max_receive_message_length', self.config.max_message_bytes)])
         gossip_pb2_grpc.add_GossipServiceServicer_to_server(self, server)
-        server.add_insecure_port(f'[::]:{self.port}')
+        self._serve_metrics()
+        server.add_insecure_port(f'{self.bind_address}:{self.port}')
         print(f"{self.hostname}({self.host}) listening on port {self.port}", flush=True)
         server.start()
-        server.wait_for_termination()
+        # Peers health-check this node while it warms up, so the server runs first
+        if self.config.warmup_enabled:
+            threading.Thread(target=self.warm_up, name='warmup', daemon=True).start()
+        else:
+            self.ready.set()
+        return server
+
+    def _server_pool_size(self):
+        if self.config.transport != 'stream':
+            return self.config.server_workers
+        # The peers: NODES - 1 in a Deployment, or the neighbours already known (static lists)
+        peers = max(self.config.nodes - 1, len(self.neighbours.snapshot()))
+        return self.config.server_workers + min(max(0, peers), self.config.stream_server_workers_max)
+
+    def _serve_metrics(self):
+        if self.config.metrics_port:
+            # Same interface as the gRPC server ('[::]' means every interface)
+            host = '' if self.bind_address == '[::]' else self.bind_address
+            self.metrics.registry.serve(self.config.metrics_port, host, ready=self.ready.is_set)
+            print(f"{self.hostname}({self.host}) serving metrics on port {self.config.metrics_port}", flush=True)
+
+    def start_server(self):
+        """ Initiating server """
+        server = self.start()
+        try:
+            server.wait_for_termination()
+        finally:
+            self.stop()
 
 def run_server():
     service_name = os.getenv('SERVICE_NAME', 'bcgossip-svc')
-    node = Node(service_name)
+    # NODE_MODE=aio runs the asyncio (grpc.aio) implementation of the same service
+    if os.getenv('NODE_MODE', 'sync') == 'aio':
+        from aio_node import AioNode
+        node = AioNode(service_name)
+    else:
+        node = Node(service_name)
+    # Turn SIGTERM (pod shutdown) into a normal exit so buffered events get flushed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     node.start_server()
 
 if __name__ == '__main__':
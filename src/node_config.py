@@ -0,0 +1,105 @@
+import os
+from epidemic import GOSSIP_MODES
+from payloads import COMPRESSIONS
+from topology import TOPOLOGY_MODES
+
+
+class NodeConfig:
+    """
+    Settings of a gossip node, read from the environment (the Helm chart
+    sets them from values.yaml). Durations given in ms are stored in
+    seconds. Raises ValueError for an unknown mode.
+    """
+
+    def __init__(self, env=None):
+        env = os.environ if env is None else env
+        # Bounded set of messages that have been received to prevent loops
+        self.seen_cache_size = int(env.get('SEEN_CACHE_SIZE', '10000'))
+        self.seen_cache_ttl = float(env.get('SEEN_CACHE_TTL', '0'))
+        # Print the seen-cache counters every N messages (0 = never)
+        self.seen_report_every = int(env.get('SEEN_CACHE_REPORT_EVERY', '100'))
+        # Latency histograms, counters and pool gauges are served over HTTP on METRICS_PORT (0 = off)
+        self.metrics_port = int(env.get('METRICS_PORT', '0'))
+        # Fan-out settings (FANOUT_CONCURRENCY=1 keeps the original one-peer-at-a-time loop)
+        self.fanout_concurrency = max(1, int(env.get('FANOUT_CONCURRENCY', '1')))
+        self.fanout_timeout = float(env.get('FANOUT_TIMEOUT', '0')) or None
+        # Retries of a send that failed with a retryable code (UNAVAILABLE, DEADLINE_EXCEEDED,
+        # RESOURCE_EXHAUSTED), after a full-jitter exponential backoff
+        self.fanout_retries = max(0, int(env.get('FANOUT_RETRIES', '0')))
+        self.fanout_backoff = float(env.get('FANOUT_BACKOFF_MS', '20')) / 1e3
+        self.fanout_backoff_max = float(env.get('FANOUT_BACKOFF_MAX_MS', '1000')) / 1e3
+        # Peers that failed BREAKER_FAILURES sends in a row are skipped for BREAKER_RESET_S seconds (0 = off)
+        self.breaker_failures = int(env.get('BREAKER_FAILURES', '5'))
+        self.breaker_reset = float(env.get('BREAKER_RESET_S', '10'))
+        # Fan-out transport: 'unary' (one SendMessage per peer) or 'stream' (batched StreamMessages per peer)
+        self.transport = env.get('GOSSIP_TRANSPORT', 'unary')
+        # A stream closes after STREAM_IDLE_MS without traffic, so it only holds the receiver's server worker
+        # for about as long as the fan-out that opened it
+        self.stream_batch_size = int(env.get('STREAM_BATCH_SIZE', '64'))
+        self.stream_flush_interval = float(env.get('STREAM_FLUSH_MS', '5')) / 1e3
+        self.stream_idle_timeout = float(env.get('STREAM_IDLE_MS', '1000')) / 1e3
+        # gRPC server worker threads (every open inbound stream holds one of them). With the stream transport
+        # every other node may hold a stream open here, so one worker per peer is added on start, up to
+        # STREAM_SERVER_WORKERS_MAX; streams beyond that wait for a worker that an idle stream has released
+        self.server_workers = int(env.get('SERVER_WORKERS', '10'))
+        self.stream_server_workers_max = int(env.get('STREAM_SERVER_WORKERS_MAX', '32'))
+        # Max number of RPCs the aio server handles at once (0 = unbounded)
+        self.max_concurrent_rpcs = int(env.get('AIO_MAX_CONCURRENT_RPCS', '0')) or None
+        # Peer selection by the zone/region labels of the Kubernetes nodes: 'off' (every peer is equal),
+        # 'aware' (nearest peers first) or 'hierarchical' (one relay per zone carries a message across zones)
+        self.topology_mode = env.get('TOPOLOGY_MODE', 'off')
+        if self.topology_mode not in TOPOLOGY_MODES:
+            raise ValueError(f"TOPOLOGY_MODE must be one of {TOPOLOGY_MODES}, got '{self.topology_mode}'")
+        # Neighbours are the pods of this release (GOSSIP_SELECTOR) in this namespace (POD_NAMESPACE)
+        self.namespace = env.get('POD_NAMESPACE', 'default')
+        self.label_selector = env.get('GOSSIP_SELECTOR')
+        # Pods in the Deployment (0 = unknown)
+        self.nodes = int(env.get('NODES', '0'))
+        # Protocol: 'direct' (initiator mails every peer, receivers never forward),
+        # or epidemic 'push', 'pull', 'push-pull' with fanout k and a TTL in hops/rounds
+        self.gossip_mode = env.get('GOSSIP_MODE', 'direct')
+        if self.gossip_mode not in GOSSIP_MODES:
+            raise ValueError(f"GOSSIP_MODE must be one of {GOSSIP_MODES}, got '{self.gossip_mode}'")
+        self.gossip_fanout = int(env.get('GOSSIP_FANOUT', '3'))
+        self.gossip_ttl = int(env.get('GOSSIP_TTL', '5'))
+        self.round_interval = float(env.get('GOSSIP_ROUND_MS', '100')) / 1e3
+        # Event logging: 'sync' prints each event inside the handler (original behaviour),
+        # 'async' hands it to a background writer so stdout backpressure stays off the request path
+        self.event_log_mode = env.get('EVENT_LOG_MODE', 'sync')
+        # 'json' (one JSON line per event) or 'compact' (batched protobuf, always written by the background logger)
+        self.event_log_format = env.get('EVENT_LOG_FORMAT', 'json')
+        self.event_log_sink = env.get('EVENT_LOG_SINK', 'stdout')
+        self.event_log_buffer = int(env.get('EVENT_LOG_BUFFER', '10000'))
+        self.event_log_overflow = env.get('EVENT_LOG_OVERFLOW', 'drop_newest')
+        self.event_log_batch = int(env.get('EVENT_LOG_BATCH', '256'))
+        self.event_log_flush_interval = float(env.get('EVENT_LOG_FLUSH_MS', '50')) / 1e3
+        # Convergence reporting: receivers send batched first-receipt reports to the initiator
+        # (or to RECEIPT_AGGREGATOR), which answers GetConvergence with time, coverage and stragglers.
+        # Off by default: the reports compete with the gossip traffic being measured
+        self.receipts_enabled = env.get('RECEIPTS', 'off') == 'on'
+        self.receipt_aggregator = env.get('RECEIPT_AGGREGATOR', '')
+        self.receipt_flush_interval = float(env.get('RECEIPT_FLUSH_MS', '50')) / 1e3
+        self.receipt_batch_size = int(env.get('RECEIPT_BATCH_SIZE', '256'))
+        self.convergence_history = int(env.get('CONVERGENCE_HISTORY', '1000'))
+        # Samples and max age (s) of the per-peer clock offset estimates
+        self.clock_window = int(env.get('CLOCK_WINDOW', '8'))
+        self.clock_max_age = float(env.get('CLOCK_MAX_AGE', '300'))
+        # Binary payloads (blocks): bodies up to PAYLOAD_INLINE_BYTES travel inside the message, larger ones are
+        # only announced by hash and fetched from the sender in PAYLOAD_CHUNK_BYTES chunks (FetchPayload), so a
+        # node never downloads a body it already has
+        self.payload_compression = env.get('PAYLOAD_COMPRESSION', 'none')
+        if self.payload_compression not in COMPRESSIONS:
+            raise ValueError(f"PAYLOAD_COMPRESSION must be one of {COMPRESSIONS}, got '{self.payload_compression}'")
+        self.payload_inline = int(env.get('PAYLOAD_INLINE_BYTES', '65536'))
+        self.payload_chunk = max(1, int(env.get('PAYLOAD_CHUNK_BYTES', '262144')))
+        self.payload_timeout = float(env.get('PAYLOAD_FETCH_TIMEOUT', '120')) or None
+        self.payload_store_bytes = int(env.get('PAYLOAD_STORE_BYTES', str(64 << 20)))
+        self.payload_fetch_workers = int(env.get('PAYLOAD_FETCH_WORKERS', '4'))
+        # Largest message the server accepts (an initiator receives whole payloads inline)
+        self.max_message_bytes = int(env.get('MAX_MESSAGE_BYTES', str(64 << 20)))
+        # Warm-up before reporting ready (readiness probe, Status.ready): waits for the neighbour list (NODES - 1
+        # peers when set) and health-checks every peer with a Status call, so the channels, DNS and API lookups
+        # are in place before the first measured message. Gives up after WARMUP_TIMEOUT seconds.
+        self.warmup_enabled = env.get('WARMUP', 'on') == 'on'
+        self.warmup_timeout = float(env.get('WARMUP_TIMEOUT', '60'))
+        self.warmup_peers = max(0, self.nodes - 1)
@@ -0,0 +1,118 @@
+import hashlib
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+# Supported values of PAYLOAD_COMPRESSION ('' on the wire means uncompressed)
+COMPRESSIONS = ('none', 'zlib')
+
+
+def content_hash(data):
+    """Content ID of a payload body (hex SHA-256 of the uncompressed bytes)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def encode(data, compression='none'):
+    """
+    Returns (encoded bytes, encoding). The compressed form is only kept
+    when it is smaller, so incompressible blocks are sent as they are.
+    """
+    if compression == 'zlib':
+        compressed = zlib.compress(data, 1)
+        if len(compressed) < len(data):
+            return compressed, 'zlib'
+    return data, ''
+
+
+def decode(data, encoding):
+    if encoding == 'zlib':
+        return zlib.decompress(data)
+    if encoding:
+        raise ValueError(f"Unknown payload encoding '{encoding}'")
+    return data
+
+
+def verify(data, encoding, digest):
+    """Raises ValueError unless the encoded body matches its content hash."""
+    actual = content_hash(decode(data, encoding))
+    if actual != digest:
+        raise ValueError(f"Payload hash mismatch: expected {digest}, got {actual}")
+
+
+def make_payload(size):
+    """Random (incompressible) bytes standing in for a block of `size` bytes."""
+    return os.urandom(size)
+
+
+def parse_size(value):
+    """Parses a byte count with an optional K/M/G suffix (binary units): '100K', '10M', '4096'."""
+    match = re.fullmatch(r'\s*(\d+)\s*([KMG]?)i?B?\s*', str(value), re.IGNORECASE)
+    if match is None:
+        raise ValueError(f"Invalid size '{value}' (expected e.g. 4096, 100K or 10M)")
+    return int(match.group(1)) * 1024 ** ' KMG'.index(match.group(2).upper() or ' ')
+
+
+class PayloadStore:
+    """
+    Payload bodies by content hash, kept encoded (as they go over the wire),
+    and the hash every message was gossiped with. Holds at most max_bytes
+    of bodies, dropping the least recently used first, and the hashes of
+    the last max_messages messages.
+    """
+
+    def __init__(self, max_bytes=64 << 20, max_messages=10000):
+        self.max_bytes = max_bytes
+        self.max_messages = max_messages
+        self._lock = threading.Lock()
+        # hash -> (encoded data, encoding, uncompressed size), least recently used first
+        self._bodies = OrderedDict()
+        self._bytes = 0
+        # message -> hash
+        self._messages = OrderedDict()
+
+    def put(self, digest, data, encoding, size):
+        with self._lock:
+            if digest in self._bodies:
+                self._bodies.move_to_end(digest)
+                return
+            self._bodies[digest] = (data, encoding, size)
+            self._bytes += len(data)
+            # Always keep the newest body, even when it alone exceeds max_bytes
+            while self._bytes > self.max_bytes and len(self._bodies) > 1:
+                _, (evicted, _, _) = self._bodies.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def get(self, digest):
+        """(encoded data, encoding, uncompressed size) of a body, or None."""
+        with self._lock:
+            entry = self._bodies.get(digest)
+            if entry is not None:
+                self._bodies.move_to_end(digest)
+            return entry
+
+    def has(self, digest):
+        with self._lock:
+            return digest in self._bodies
+
+    def bind(self, message, digest):
+        """Records that `message` carries the payload `digest`."""
+        with self._lock:
+            self._messages[message] = digest
+            self._messages.move_to_end(message)
+            while len(self._messages) > self.max_messages:
+                self._messages.popitem(last=False)
+
+    def describe(self, message):
+        """(hash, encoded data, encoding, uncompressed size) of the payload of a message, or None."""
+        with self._lock:
+            digest = self._messages.get(message)
+            entry = self._bodies.get(digest) if digest is not None else None
+        if entry is None:
+            return None
+        return (digest,) + entry
+
+    def stats(self):
+        with self._lock:
+            return {'bodies': len(self._bodies), 'bytes': self._bytes, 'messages': len(self._messages)}
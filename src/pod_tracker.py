@@ -0,0 +1,233 @@
+import itertools
+import queue
+import threading
+import time
+from types import SimpleNamespace
+from kubernetes import client, config, watch
+
+
+class PodTracker:
+    """
+    Watches the gossip pods (label selector, default app=bcgossip) for
+    automate.py. One list call seeds the cache, then a watch stream applies
+    pod events as they arrive, and waiters are woken on every change, so
+    readiness is seen immediately instead of by polling kubectl. The list
+    and watch sources can be swapped for a FakePodApi to run offline.
+    """
+
+    def __init__(self, namespace='default', label_selector='app=bcgossip', list_source=None, watch_source=None,
+                 retry_delay=1.0):
+        self.namespace = namespace
+        self.label_selector = label_selector
+        # list_source() -> (pods, resource_version)
+        # watch_source(resource_version) -> iterable of {'type': ..., 'object': pod}
+        self._list_source = list_source or self._kubernetes_list
+        self._watch_source = watch_source or self._kubernetes_watch
+        self.retry_delay = retry_delay
+        self.synced = threading.Event()
+        self._stopped = threading.Event()
+        self._changed = threading.Condition()
+        # pod name -> {'phase', 'ready', 'terminating', 'ip'}
+        self._pods = {}
+        self._v1 = None
+        self._watch = None
+        self._thread = None
+
+    def start(self):
+        """Starts the background list+watch loop."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='pod-watch', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._watch is not None:
+            self._watch.stop()
+        with self._changed:
+            self._changed.notify_all()
+
+    def pods(self):
+        """Returns a copy of the cache as {pod_name: state}."""
+        with self._changed:
+            return {name: dict(state) for name, state in self._pods.items()}
+
+    def ready_pods(self):
+        """Names of the running, ready pods that are not terminating."""
+        with self._changed:
+            return sorted(name for name, state in self._pods.items() if self._is_ready(state))
+
+    def counts(self):
+        """Returns (total, ready, terminating) pod counts."""
+        with self._changed:
+            states = list(self._pods.values())
+        return (len(states), sum(self._is_ready(state) for state in states),
+                sum(state['terminating'] for state in states))
+
+    def wait_for(self, predicate, timeout=None, on_change=None):
+        """
+        Blocks until predicate(tracker) is true, re-checking on every pod event.
+        on_change(tracker) is called after each change (progress output).
+        Returns False on timeout or stop().
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if not self.synced.wait(timeout):
+            return False
+        changed = False
+        with self._changed:
+            while not self._stopped.is_set():
+                if predicate(self):
+                    return True
+                if changed and on_change is not None:
+                    on_change(self)
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                # Wait for a change instead of polling
+                changed = self._changed.wait(remaining)
+        return False
+
+    def replace(self, pods):
+        """Replaces the whole cache with the given pods (initial list / resync)."""
+        with self._changed:
+            self._pods = dict(self._pod_state(pod) for pod in pods)
+            self._changed.notify_all()
+
+    def apply_event(self, event):
+        """Applies one watch event and returns its resource version."""
+        event_type = event['type']
+        pod = event['object']
+        if event_type in ('ADDED', 'MODIFIED', 'DELETED'):
+            name, state = self._pod_state(pod)
+            with self._changed:
+                if event_type == 'DELETED':
+                    self._pods.pop(name, None)
+                else:
+                    self._pods[name] = state
+                self._changed.notify_all()
+        return getattr(pod.metadata, 'resource_version', None)
+
+    def _run(self):
+        resource_version = None
+        while not self._stopped.is_set():
+            try:
+                if resource_version is None:
+                    pods, resource_version = self._list_source()
+                    self.replace(pods)
+                    self.synced.set()
+                for event in self._watch_source(resource_version):
+                    if self._stopped.is_set():
+                        return
+                    resource_version = self.apply_event(event) or resource_version
+            except client.ApiException as e:
+                if e.status == 410:
+                    # Resource version too old, relist
+                    resource_version = None
+                print(f"Pod watch failed: {e}", flush=True)
+                self._stopped.wait(self.retry_delay)
+            except Exception as e:
+                print(f"Pod watch failed: {e}", flush=True)
+                self._stopped.wait(self.retry_delay)
+
+    @staticmethod
+    def _is_ready(state):
+        return state['phase'] == 'Running' and state['ready'] and not state['terminating']
+
+    @staticmethod
+    def _pod_state(pod):
+        status = pod.status
+        conditions = (status.conditions if status is not None else None) or []
+        return pod.metadata.name, {
+            'phase': status.phase if status is not None else None,
+            'ready': any(c.type == 'Ready' and c.status == 'True' for c in conditions),
+            'terminating': pod.metadata.deletion_timestamp is not None,
+            'ip': status.pod_ip if status is not None else None,
+        }
+
+    def _api(self):
+        if self._v1 is None:
+            # automate.py runs outside the cluster, with the local kubeconfig
+            config.load_kube_config()
+            self._v1 = client.CoreV1Api()
+        return self._v1
+
+    def _kubernetes_list(self):
+        ret = self._api().list_namespaced_pod(namespace=self.namespace, label_selector=self.label_selector)
+        return ret.items, ret.metadata.resource_version
+
+    def _kubernetes_watch(self, resource_version):
+        self._watch = watch.Watch()
+        return self._watch.stream(self._api().list_namespaced_pod, namespace=self.namespace,
+                                  label_selector=self.label_selector, resource_version=resource_version,
+                                  allow_watch_bookmarks=True)
+
+
+class FakePodApi:
+    """
+    In-memory stand-in for the pods API: list_source/watch_source for
+    PodTracker (or NeighbourRegistry), plus helpers that create, ready and
+    delete pods the way a Deployment rollout would.
+    """
+
+    def __init__(self, namespace='default'):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._pods = {}
+        self._version = itertools.count(1)
+        self._resource_version = '0'
+        self._events = queue.Queue()
+
+    def list_source(self):
+        with self._lock:
+            return list(self._pods.values()), self._resource_version
+
+    def watch_source(self, resource_version):
+        while True:
+            event = self._events.get()
+            if event is None:
+                return
+            yield event
+
+    def close(self):
+        """Ends the current watch stream (the tracker watches again from its resource version)."""
+        self._events.put(None)
+
+    def add_pod(self, name, ip=None, ready=False, labels=None):
+        pod = SimpleNamespace(
+            metadata=SimpleNamespace(name=name, namespace=self.namespace, labels=labels or {'app': 'bcgossip'},
+                                     deletion_timestamp=None, resource_version=None),
+            status=SimpleNamespace(phase='Pending', pod_ip=ip, conditions=[]),
+        )
+        self._emit('ADDED', name, pod)
+        if ready:
+            self.set_ready(name)
+        return pod
+
+    def set_ready(self, name, ready=True):
+        with self._lock:
+            pod = self._pods[name]
+        pod.status.phase = 'Running'
+        pod.status.conditions = [SimpleNamespace(type='Ready', status='True' if ready else 'False')]
+        self._emit('MODIFIED', name, pod)
+
+    def terminate(self, name):
+        with self._lock:
+            pod = self._pods[name]
+        pod.metadata.deletion_timestamp = time.time()
+        self._emit('MODIFIED', name, pod)
+
+    def delete(self, name):
+        with self._lock:
+            pod = self._pods.get(name)
+        if pod is not None:
+            self._emit('DELETED', name, pod)
+
+    def _emit(self, event_type, name, pod):
+        with self._lock:
+            self._resource_version = str(next(self._version))
+            pod.metadata.resource_version = self._resource_version
+            if event_type == 'DELETED':
+                self._pods.pop(name, None)
+            else:
+                self._pods[name] = pod
+        self._events.put({'type': event_type, 'object': pod})
@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class SeenCache:
+    """
+    Thread-safe, memory-bounded set of message IDs a node has already seen.
+    Entries are evicted least-recently-seen first once max_size is reached,
+    and after ttl seconds without being seen again (ttl=0 disables expiry).
+    """
+
+    def __init__(self, max_size=10000, ttl=0, clock=time.monotonic):
+        self.max_size = max(1, int(max_size))
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        # message -> last time it was seen, ordered oldest first
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def add(self, message):
+        """
+        Records the message as seen. Returns True if it was new, False if it
+        is a duplicate. Check and insert are atomic, so two interleaved
+        deliveries of the same message can never both be accepted.
+        """
+        now = self.clock()
+        with self._lock:
+            self._expire(now)
+            if message in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(message)
+                self._entries[message] = now
+                return False
+            self.misses += 1
+            self._entries[message] = now
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def __contains__(self, message):
+        now = self.clock()
+        with self._lock:
+            self._expire(now)
+            return message in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def _expire(self, now):
+        # Caller must hold self._lock
+        if not self.ttl:
+            return
+        while self._entries:
+            message, seen_at = next(iter(self._entries.items()))
+            if now - seen_at < self.ttl:
+                break
+            self._entries.popitem(last=False)
+            self.expirations += 1
@@ -0,0 +1,392 @@
+import argparse
+import glob
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+import analysis
+from epidemic import GOSSIP_MODES
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Recorded GKE runs per scenario (paths relative to the repository root)
+SCENARIOS = {
+    'default': ['bandwidth/test-default-bwidth-10X.csv', 'memory/test-default-memory-10X.csv'],
+    'distribution': ['distribution/*-100X.csv'],
+    '5M': ['bandwidth/test-bwidth-5M-10X.csv'],
+    '30M': ['bandwidth/test-bwidth-30M-10X.csv'],
+    '150Mi': ['memory/test-150Mi-10X.csv'],
+    '300Mi': ['memory/test-300Mi-10X.csv'],
+    'zonal': ['geographical/test-zonal-10X.csv'],
+    'regional': ['geographical/test-regional-10X.csv'],
+}
+
+FITS = ('empirical', 'lognormal')
+
+# Upper bound on the number of floats sampled at once (trials are simulated in chunks)
+CHUNK_ELEMENTS = 4_000_000
+
+
+def load_events(paths, filter_convergence=True, cache_dir=None):
+    """Reads test CSVs (see analysis.load_events); like the notebooks, drops the '-0' (warm-up) iterations."""
+    data = pd.concat([analysis.load_events(path, cache_dir)[0] for path in paths], ignore_index=True)
+    if filter_convergence:
+        data = data[~data['message'].str.endswith('-0')]
+    return data
+
+
+def scenario_paths(scenario, data_dir=DATA_DIR):
+    paths = []
+    for pattern in SCENARIOS[scenario]:
+        paths.extend(sorted(glob.glob(os.path.join(data_dir, pattern))))
+    if not paths:
+        raise FileNotFoundError(f"No CSVs found for scenario '{scenario}' under {data_dir}")
+    return paths
+
+
+def observed_stats(data):
+    """
+    Propagation time per message exactly as the notebooks compute it,
+    max(received) - first(initiate) in ms, grouped by node count (cubaan<N>).
+    Returns {num_nodes: array of propagation times}.
+    """
+    data = data.assign(received_timestamp=data['received_timestamp'] / 1e6)
+    initiate = data[data['event_type'] == 'initiate'].groupby('message')['received_timestamp'].first()
+    received = data[data['event_type'] == 'received'].groupby('message')['received_timestamp'].max()
+    propagation_times = (received - initiate).dropna()
+    nodes = propagation_times.index.str.extract(r'cubaan(\d+)', expand=False).astype(int)
+    return {int(n): propagation_times.values[nodes == n] for n in sorted(set(nodes))}
+
+
+def summarize(values):
+    """The statistics the notebooks report (mean, median, max, var, std) plus tail percentiles."""
+    values = np.asarray(values, dtype=float)
+    if values.size == 0:
+        return {}
+    return {
+        'count': int(values.size),
+        'mean': float(values.mean()),
+        'median': float(np.median(values)),
+        'max': float(values.max()),
+        'var': float(values.var(ddof=1)) if values.size > 1 else 0.0,
+        'std': float(values.std(ddof=1)) if values.size > 1 else 0.0,
+        'p95': float(np.percentile(values, 95)),
+        'p99': float(np.percentile(values, 99)),
+    }
+
+
+def first_receipts(flat_t, nodes, arrival):
+    """
+    Applies candidate arrival times to flat_t in place (earliest wins) and
+    returns the indices of the winning candidates, one per improved node.
+    """
+    before = flat_t[nodes]
+    np.minimum.at(flat_t, nodes, arrival)
+    won = np.flatnonzero((arrival < before) & (arrival == flat_t[nodes]))
+    # Ties keep a single winner per node
+    _, keep = np.unique(nodes[won], return_index=True)
+    return won[keep]
+
+
+class Distribution:
+    """Samples a positive quantity (ms) either by resampling observations or from a fitted log-normal."""
+
+    def __init__(self, samples, fit='empirical', positive=True):
+        if fit not in FITS:
+            raise ValueError(f"fit must be one of {FITS}, got '{fit}'")
+        samples = np.asarray(samples, dtype=float)
+        samples = samples[np.isfinite(samples) & ((samples > 0) if positive else True)]
+        if samples.size == 0:
+            raise ValueError("No samples to fit")
+        self.fit = fit
+        self.samples = samples
+        logs = np.log(samples[samples > 0]) if (samples > 0).any() else np.zeros(1)
+        self.mu = float(logs.mean())
+        self.sigma = float(logs.std())
+
+    def sample(self, rng, shape):
+        if self.fit == 'lognormal':
+            return rng.lognormal(self.mu, self.sigma, shape)
+        return self.samples[rng.integers(0, self.samples.size, shape)]
+
+    def describe(self):
+        return {'n': int(self.samples.size), 'median': float(np.median(self.samples)),
+                'p99': float(np.percentile(self.samples, 99)), 'mu': self.mu, 'sigma': self.sigma}
+
+
+class HopModel:
+    """
+    Per-hop timing fitted from recorded runs:
+    - latency: propagation_time of 'received' events (sender timestamp to receive)
+    - gap: time between two consecutive sends of one sender (fan-out is sequential,
+      so this is the per-peer RPC round trip)
+    - start: time from the 'initiate' event to the first send. In the recorded
+      runs it grows linearly with N (the neighbour lookup before every fan-out),
+      so it is fitted as start_per_node * N plus a resampled residual.
+    Send times are taken from the sender's own clock (received_timestamp minus
+    propagation_time), so gaps and start delays are free of clock skew.
+    """
+
+    def __init__(self, latency, gap, start, start_per_node=0.0):
+        self.latency = latency
+        self.gap = gap
+        self.start = start
+        self.start_per_node = start_per_node
+
+    @classmethod
+    def from_events(cls, data, fit='empirical'):
+        received = data[data['event_type'] == 'received']
+        sent = received['received_timestamp'] / 1e6 - received['propagation_time']
+        sent = pd.DataFrame({'message': received['message'], 'sender_id': received['sender_id'], 'sent': sent})
+        sent = sent.sort_values(['message', 'sender_id', 'sent'])
+        gaps = sent.groupby(['message', 'sender_id'])['sent'].diff().dropna()
+
+        initiate = data[data['event_type'] == 'initiate'].groupby('message')['received_timestamp'].first() / 1e6
+        first_sent = sent.groupby('message')['sent'].min()
+        starts = (first_sent - initiate).dropna()
+        nodes = starts.index.str.extract(r'cubaan(\d+)', expand=False).astype(float)
+        start_per_node = max(0.0, float(np.polyfit(nodes, starts.values, 1)[0])) if len(set(nodes)) > 1 else 0.0
+        residuals = starts.values - start_per_node * nodes
+        return cls(Distribution(received['propagation_time'], fit), Distribution(gaps, fit),
+                   Distribution(residuals, 'empirical', positive=False), start_per_node)
+
+    @classmethod
+    def from_scenario(cls, scenario, data_dir=DATA_DIR, fit='empirical'):
+        return cls.from_events(load_events(scenario_paths(scenario, data_dir)), fit)
+
+    def send_times(self, rng, shape, setup=0.0):
+        """
+        Offsets (ms) of each of the shape[-1] sequential sends from the moment a
+        node accepted the message; `setup` is the N-dependent part of the start.
+        """
+        offsets = self.gap.sample(rng, shape)
+        if offsets.size == 0:
+            return offsets
+        offsets[..., 0] = 0.0
+        np.cumsum(offsets, axis=-1, out=offsets)
+        offsets += np.maximum(self.start.sample(rng, shape[:-1] + (1,)) + setup, 0.0)
+        return offsets
+
+    def describe(self):
+        return {'latency': self.latency.describe(), 'gap': self.gap.describe(), 'start': self.start.describe(),
+                'start_per_node': self.start_per_node}
+
+
+class Simulator:
+    """
+    Vectorized simulation of Node's propagation for many independent trials.
+    Node 0 initiates at t=0; times are first-receipt times in ms, one row per
+    trial. Every mode returns the notebook statistic per trial (last first
+    receipt minus initiation) and the fraction of nodes reached.
+
+    direct:    the initiator sends to all its neighbours one after another,
+               in pod list order; receivers accept the message and never
+               forward it (Node's direct mail).
+    push:      a receiver forwards to `fanout` random peers while hops < ttl;
+               first receipts are hop-limited shortest paths (Bellman-Ford
+               over the sampled targets, one relaxation per hop).
+    pull:      every node pulls `fanout` random peers each round_ms (random
+               phase); a peer serves a rumor for ttl rounds after accepting it.
+    push-pull: both of the above.
+    The sender is not excluded when targets are drawn, and a node forwards
+    with the hop count of its fastest path. The recorded (direct mail) runs
+    show an N-dependent delay before the initiator's fan-out; it is only
+    added to that fan-out, and setup_cost=False drops it (nodes that keep
+    their neighbour list in a watch cache do not pay it).
+    """
+
+    def __init__(self, model, num_nodes, mode='direct', fanout=3, ttl=5, round_ms=100.0, seed=None,
+                 setup_cost=True):
+        if mode not in GOSSIP_MODES:
+            raise ValueError(f"mode must be one of {GOSSIP_MODES}, got '{mode}'")
+        if num_nodes < 2:
+            raise ValueError("num_nodes must be at least 2")
+        self.model = model
+        self.num_nodes = num_nodes
+        self.mode = mode
+        self.fanout = max(1, min(fanout, num_nodes - 1))
+        self.ttl = ttl
+        self.round_ms = round_ms
+        self.rng = np.random.default_rng(seed)
+        # Only the direct-mail initiator pays the N-dependent start delay; forwards reuse the neighbour list
+        self.setup = model.start_per_node * num_nodes if setup_cost and mode == 'direct' else 0.0
+
+    def run(self, trials):
+        """Returns (propagation_times, coverage), each an array of length `trials`."""
+        per_trial = self.num_nodes * (2 * self.fanout if self.mode != 'direct' else 2)
+        chunk = max(1, CHUNK_ELEMENTS // per_trial)
+        times, coverage = [], []
+        for first in range(0, trials, chunk):
+            t = self._simulate(min(chunk, trials - first))
+            reached = np.isfinite(t)
+            times.append(np.where(reached, t, -np.inf)[:, 1:].max(axis=1))
+            coverage.append(reached.mean(axis=1))
+        return np.concatenate(times), np.concatenate(coverage)
+
+    def _simulate(self, trials):
+        t = np.full((trials, self.num_nodes), np.inf)
+        t[:, 0] = 0.0
+        if self.mode == 'direct':
+            return self._direct(t)
+        hops = np.zeros((trials, self.num_nodes), dtype=np.int32)
+        # Push targets and arrival offsets, drawn the first time a node forwards
+        self._targets = np.empty((t.size, self.fanout), dtype=np.int64)
+        self._weights = np.empty((t.size, self.fanout))
+        self._drawn = np.zeros(t.size, dtype=bool)
+        if self.mode in ('push', 'push-pull'):
+            self._push(t, hops, np.flatnonzero(np.isfinite(t)))
+        if self.mode in ('pull', 'push-pull'):
+            self._pull(t, hops)
+        return t
+
+    def _direct(self, t):
+        trials, n = t.shape
+        rng, model = self.rng, self.model
+        # The initiator sends to nodes 1..n-1 in list order
+        t[:, 1:] = model.send_times(rng, (trials, n - 1), self.setup) + model.latency.sample(rng, (trials, n - 1))
+        return t
+
+    def _edges(self, sources):
+        """Push targets (flat indices) and arrival offsets of the given flat node indices."""
+        n, k = self.num_nodes, self.fanout
+        new = sources[~self._drawn[sources]]
+        if new.size:
+            column = new % n
+            targets = self.rng.integers(0, n - 1, (new.size, k))
+            # Skip the node itself; k distinct peers are approximated by independent draws
+            targets += targets >= column[:, None]
+            self._targets[new] = targets + (new - column)[:, None]
+            self._weights[new] = (self.model.send_times(self.rng, (new.size, k))
+                                  + self.model.latency.sample(self.rng, (new.size, k)))
+            self._drawn[new] = True
+        return self._targets[sources], self._weights[sources]
+
+    def _push(self, t, hops, frontier):
+        """
+        Hop-limited relaxation from the nodes in `frontier` (flat indices):
+        every pass extends the paths that just improved by one hop. Returns
+        the latest first-receipt time it set.
+        """
+        flat_t, flat_hops = t.reshape(-1), hops.reshape(-1)
+        last = 0.0
+        while frontier.size:
+            # Only nodes that received the message with hops < ttl forward it
+            frontier = frontier[flat_hops[frontier] < self.ttl]
+            if not frontier.size:
+                break
+            targets, weights = self._edges(frontier)
+            arrival = (flat_t[frontier][:, None] + weights).ravel()
+            targets = targets.ravel()
+            path_hops = np.repeat(flat_hops[frontier] + 1, self.fanout)
+            won = first_receipts(flat_t, targets, arrival)
+            frontier = targets[won]
+            flat_hops[frontier] = path_hops[won]
+            if frontier.size:
+                last = max(last, arrival[won].max())
+        return last
+
+    def _pull(self, t, hops):
+        """
+        Pull rounds. Per trial and round, the number of pulls that hit a peer
+        able to serve the rumor is drawn from a binomial, then only those
+        pulls are materialized, so a round costs O(N + hits) instead of
+        O(N * fanout).
+        """
+        trials, n = t.shape
+        rng = self.rng
+        flat_t, flat_hops = t.reshape(-1), hops.reshape(-1)
+        phase = rng.uniform(0, self.round_ms, t.size)
+        serving = self.ttl * self.round_ms
+        # A rumor is served for ttl rounds after it was accepted; stop once every rumor expired
+        last = t[np.isfinite(t)].max()
+        # Nodes that may still need the message
+        pending = np.flatnonzero(t > self.round_ms)
+        pull_round = 1
+        while pull_round * self.round_ms <= last + serving + self.round_ms:
+            round_start = pull_round * self.round_ms
+            round_end = round_start + self.round_ms
+            pending = pending[flat_t[pending] > round_start]
+            # Nodes that have the message by their pull time have nothing to fetch
+            waiting = pending[flat_t[pending] > phase[pending] + round_start]
+            # Peers that may serve the rumor at some point of this round (checked exactly below)
+            in_window = t <= round_end
+            in_window &= t > round_start - serving
+            server_count = np.count_nonzero(in_window, axis=1)
+            waiting_count = np.bincount(waiting // n, minlength=trials)
+            hits = rng.binomial(waiting_count * self.fanout, np.minimum(server_count / (n - 1), 1.0))
+            if hits.any():
+                servers = np.flatnonzero(in_window)
+                trial = np.repeat(np.arange(trials), hits)
+                waiting_start = np.cumsum(waiting_count) - waiting_count
+                server_start = np.cumsum(server_count) - server_count
+                nodes = waiting[waiting_start[trial] + (rng.random(trial.size) * waiting_count[trial]).astype(np.int64)]
+                peer = servers[server_start[trial] + (rng.random(trial.size) * server_count[trial]).astype(np.int64)]
+                when = phase[nodes] + round_start
+                serves = ((flat_t[peer] <= when) & (when < flat_t[peer] + serving) & (flat_hops[peer] < self.ttl)
+                          & (nodes != peer))
+                nodes, peer, when = nodes[serves], peer[serves], when[serves]
+                arrival = when + self.model.gap.sample(rng, nodes.size)
+                won = first_receipts(flat_t, nodes, arrival)
+                pulled = nodes[won]
+                flat_hops[pulled] = flat_hops[peer[won]] + 1
+                if pulled.size:
+                    last = max(last, arrival[won].max())
+                    if self.mode == 'push-pull':
+                        # Pulled messages are pushed on as well
+                        last = max(last, self._push(t, hops, pulled))
+            pull_round += 1
+        return t
+
+
+def simulate(scenario, num_nodes, trials, data_dir=DATA_DIR, fit='empirical', seed=None, **options):
+    """Fits the scenario and returns (summary of propagation times, mean coverage)."""
+    model = HopModel.from_scenario(scenario, data_dir, fit)
+    times, coverage = Simulator(model, num_nodes, seed=seed, **options).run(trials)
+    return summarize(times[np.isfinite(times)]), float(coverage.mean())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Simulate gossip propagation at large N from recorded per-hop latencies.")
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), default='default', help="Recorded runs to fit")
+    parser.add_argument('--data_dir', default=DATA_DIR, help="Repository root holding the test CSVs")
+    parser.add_argument('--cache_dir', default=None, help="Cache the parsed CSVs here (see analysis.py)")
+    parser.add_argument('--num_nodes', type=int, nargs='+', default=[10000], help="Node counts to simulate")
+    parser.add_argument('--trials', type=int, default=1000, help="Independent trials per node count")
+    parser.add_argument('--mode', choices=GOSSIP_MODES, default='direct', help="GOSSIP_MODE to simulate")
+    parser.add_argument('--fanout', type=int, default=3, help="GOSSIP_FANOUT")
+    parser.add_argument('--ttl', type=int, default=5, help="GOSSIP_TTL")
+    parser.add_argument('--round_ms', type=float, default=100.0, help="GOSSIP_ROUND_MS")
+    parser.add_argument('--fit', choices=FITS, default='empirical', help="Resample observations or fit a log-normal")
+    parser.add_argument('--seed', type=int, default=None, help="Random seed")
+    parser.add_argument('--no_setup_cost', action='store_true',
+                        help="direct mode: drop the N-dependent delay before the initiator's fan-out seen in "
+                             "the recorded runs")
+    parser.add_argument('--validate', action='store_true',
+                        help="Also simulate the recorded node counts and print them next to the observed statistics")
+    args = parser.parse_args()
+
+    data = load_events(scenario_paths(args.scenario, args.data_dir), cache_dir=args.cache_dir)
+    model = HopModel.from_events(data, args.fit)
+    print(json.dumps({'scenario': args.scenario, 'fit': args.fit, 'model': model.describe()}), flush=True)
+    options = dict(mode=args.mode, fanout=args.fanout, ttl=args.ttl, round_ms=args.round_ms, seed=args.seed,
+                   setup_cost=not args.no_setup_cost)
+
+    runs = [(n, None) for n in args.num_nodes]
+    if args.validate:
+        runs = [(n, observed) for n, observed in observed_stats(data).items()] + runs
+    for num_nodes, observed in runs:
+        start = time.perf_counter()
+        times, coverage = Simulator(model, num_nodes, **options).run(args.trials)
+        result = {
+            'scenario': args.scenario,
+            'mode': args.mode,
+            'num_nodes': num_nodes,
+            'trials': args.trials,
+            'coverage': float(coverage.mean()),
+            'simulated': summarize(times[np.isfinite(times)]),
+            'elapsed_s': round(time.perf_counter() - start, 3),
+        }
+        if observed is not None:
+            result['observed'] = summarize(observed)
+        print(json.dumps(result), flush=True)
@@ -1,12 +1,20 @@
 import grpc
 import argparse
+import json
+import os
 import gossip_pb2
 import gossip_pb2_grpc
+from payloads import content_hash, make_payload, parse_size
 import socket
 import time
 
-def send_message_to_self(message):
-    """Sends a message to the current pod (itself)."""
+def send_message_to_self(message, wait_convergence=0.0, payload_size=0):
+    """
+    Sends a message to the current pod (itself), carrying a random payload
+    of payload_size bytes if given. With wait_convergence > 0, then waits up
+    to that many seconds for every node's receipt and prints the
+    convergence report (time, coverage, stragglers).
+    """
     host_ip = socket.gethostbyname(socket.gethostname())
     print(f"host_ip={host_ip}", flush=True)
     target = f"{host_ip}:5050"
@@ -15,15 +23,76 @@ def send_message_to_self(message):
     with grpc.insecure_channel(target) as channel:
         stub = gossip_pb2_grpc.GossipServiceStub(channel)
         print(f"Sending message to self ({host_ip}): '{message}'", flush=True)
-        response = stub.SendMessage(gossip_pb2.GossipMessage(
+        request = gossip_pb2.GossipMessage(
             message=message,
             sender_id=host_ip,
             timestamp=time.time_ns()
-        ))
+        )
+        if payload_size > 0:
+            request.payload = make_payload(payload_size)
+            request.payload_hash = content_hash(request.payload)
+            request.payload_size = payload_size
+            print(f"Payload: {payload_size} bytes, hash {request.payload_hash}", flush=True)
+        response = stub.SendMessage(request)
         print(f"Received acknowledgment: {response.details}", flush=True)
 
+    if wait_convergence > 0:
+        # The receipts go to the initiator (this pod) unless an aggregator collects them
+        tracker = os.getenv('RECEIPT_AGGREGATOR') or target
+        if ':' not in tracker:
+            tracker = f"{tracker}:5050"
+        with grpc.insecure_channel(tracker) as channel:
+            stub = gossip_pb2_grpc.GossipServiceStub(channel)
+            report = stub.GetConvergence(gossip_pb2.ConvergenceRequest(message=message,
+                                                                      wait_ms=int(wait_convergence * 1e3)),
+                                         timeout=wait_convergence + 5.0)
+        print(json.dumps({
+            'event': 'convergence',
+            'message': report.message,
+            'known': report.known,
+            'expected': report.expected,
+            'covered': report.covered,
+            'coverage': report.coverage,
+            'convergence_ms': report.convergence_ms,
+            'complete': report.complete,
+            'stragglers': list(report.stragglers),
+        }), flush=True)
+
+def stream_messages_to_self(message, count=1):
+    """
+    Sends the message(s) to the current pod (itself) as one GossipBatch over StreamMessages.
+    With count > 1 the messages are numbered '<message>.<i>'.
+    """
+    host_ip = socket.gethostbyname(socket.gethostname())
+    print(f"host_ip={host_ip}", flush=True)
+    target = f"{host_ip}:5050"
+    print(f"target={target}", flush=True)
+
+    messages = [message] if count == 1 else [f"{message}.{i}" for i in range(count)]
+    with grpc.insecure_channel(target) as channel:
+        stub = gossip_pb2_grpc.GossipServiceStub(channel)
+        print(f"Streaming {len(messages)} message(s) to self ({host_ip}): '{message}'", flush=True)
+        batch = gossip_pb2.GossipBatch(messages=[
+            gossip_pb2.GossipMessage(message=m, sender_id=host_ip, timestamp=time.time_ns())
+            for m in messages
+        ])
+        for ack in stub.StreamMessages(iter([batch])):
+            print(f"Received acknowledgment: initiated={ack.initiated} accepted={ack.accepted} "
+                  f"duplicates={ack.duplicates}", flush=True)
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Initiate gossip protocol by sending a message to self.")
     parser.add_argument('--message', required=True, help="Message to send to self")
+    parser.add_argument('--transport', choices=['unary', 'stream'], default='unary',
+                        help="Use the unary SendMessage RPC or the batched StreamMessages RPC")
+    parser.add_argument('--count', type=int, default=1, help="Number of messages to stream (stream transport only)")
+    parser.add_argument('--wait_convergence', type=float, default=0.0,
+                        help="Seconds to wait for every node's receipt, then print the convergence "
+                             "(unary only, needs receipts.enabled=on)")
+    parser.add_argument('--payload_size', type=parse_size, default=0,
+                        help="Random payload carried by the message, e.g. 100K or 10M (unary only)")
     args = parser.parse_args()
-    send_message_to_self(args.message)
\ No newline at end of file
+    if args.transport == 'stream':
+        stream_messages_to_self(args.message, args.count)
+    else:
+        send_message_to_self(args.message, args.wait_convergence, args.payload_size)
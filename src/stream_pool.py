@@ -0,0 +1,146 @@
+import collections
+import queue
+import threading
+import time
+from concurrent import futures
+import grpc
+import gossip_pb2
+
+# Sentinel that ends a PeerStream's request generator
+_CLOSE = object()
+
+
+class PeerStream:
+    """
+    One long-lived StreamMessages call to a peer. Messages passed to send()
+    are coalesced into a GossipBatch that is flushed once batch_size
+    messages are queued or flush_interval seconds after the first one.
+    Each send() returns a Future resolved with the AckBatch of its batch.
+    The stream closes itself after idle_timeout seconds without traffic so
+    it does not pin a receiver's server worker beyond the fan-out.
+    """
+
+    def __init__(self, stub, batch_size=64, flush_interval=0.005, idle_timeout=1.0):
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self.idle_timeout = idle_timeout
+        self.closed = False
+        self._queue = queue.Queue()
+        # Futures of the batches that have been sent and not acknowledged yet, in order
+        self._pending = collections.deque()
+        self._lock = threading.Lock()
+        self._call = stub.StreamMessages(self._batches())
+        self._ack_thread = threading.Thread(target=self._read_acks, name='stream-acks', daemon=True)
+        self._ack_thread.start()
+
+    def send(self, gossip_message):
+        future = futures.Future()
+        with self._lock:
+            if self.closed:
+                future.set_exception(RuntimeError('stream closed'))
+            else:
+                self._queue.put((gossip_message, future))
+        return future
+
+    def close(self):
+        self._queue.put(_CLOSE)
+
+    def _batches(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                # send() queues under the lock, so nothing can slip in between this check and closing
+                with self._lock:
+                    if self._queue.empty():
+                        self.closed = True
+                        return
+                continue
+            if item is _CLOSE:
+                self._mark_closed()
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            closing = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _CLOSE:
+                    closing = True
+                    break
+                batch.append(item)
+            with self._lock:
+                if self.closed:
+                    # The call ended while this batch was collected, after _read_acks failed what it could see
+                    for _, future in batch:
+                        future.set_exception(RuntimeError('stream closed'))
+                    return
+                self._pending.append([future for _, future in batch])
+            yield gossip_pb2.GossipBatch(messages=[gossip_message for gossip_message, _ in batch])
+            if closing:
+                self._mark_closed()
+                return
+
+    def _read_acks(self):
+        error = RuntimeError('stream closed')
+        try:
+            for ack in self._call:
+                for future in self._pending.popleft():
+                    future.set_result(ack)
+        except grpc.RpcError as e:
+            error = e
+        self._mark_closed()
+        # Fail whatever was still in flight or queued when the stream ended
+        while self._pending:
+            for future in self._pending.popleft():
+                future.set_exception(error)
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _CLOSE:
+                item[1].set_exception(error)
+
+    def _mark_closed(self):
+        with self._lock:
+            self.closed = True
+
+
+class StreamPool:
+    """Keeps one PeerStream per peer IP on top of a ChannelPool, reopening closed streams lazily."""
+
+    def __init__(self, channel_pool, batch_size=64, flush_interval=0.005, idle_timeout=1.0):
+        self.channel_pool = channel_pool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._streams = {}
+
+    def send(self, peer_ip, gossip_message):
+        """Queues the message on the peer's stream and returns the Future of its ack."""
+        with self._lock:
+            stream = self._streams.get(peer_ip)
+            if stream is None or stream.closed:
+                stream = PeerStream(self.channel_pool.get_stub(peer_ip), self.batch_size,
+                                    self.flush_interval, self.idle_timeout)
+                self._streams[peer_ip] = stream
+        return stream.send(gossip_message)
+
+    def retain(self, peer_ips):
+        keep = set(peer_ips)
+        with self._lock:
+            for peer_ip in [ip for ip in self._streams if ip not in keep]:
+                self._streams.pop(peer_ip).close()
+
+    def close(self):
+        with self._lock:
+            for stream in self._streams.values():
+                stream.close()
+            self._streams = {}
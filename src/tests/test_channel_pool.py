@@ -0,0 +1,78 @@
+import contextlib
+import os
+from concurrent import futures
+import grpc
+import pytest
+import gossip_pb2
+import gossip_pb2_grpc
+from channel_pool import ChannelPool, peer_target
+from harness import LocalCluster
+
+
+class StatusServicer(gossip_pb2_grpc.GossipServiceServicer):
+    def Status(self, request, context):
+        return gossip_pb2.NodeStatus(host='peer', ready=True)
+
+
+def serve(port):
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    gossip_pb2_grpc.add_GossipServiceServicer_to_server(StatusServicer(), server)
+    server.add_insecure_port(f'127.0.0.1:{port}')
+    server.start()
+    return server
+
+
+def test_peer_target():
+    assert peer_target('10.0.0.2', '5050') == '10.0.0.2:5050'
+    assert peer_target('127.0.0.1:7001', '5050') == '127.0.0.1:7001'
+
+
+def test_one_channel_per_peer():
+    pool = ChannelPool('5050')
+    stub = pool.get_stub('10.0.0.2')
+    assert pool.get_stub('10.0.0.2') is stub
+    pool.get_stub('10.0.0.3')
+    assert len(pool) == 2
+    pool.retain(['10.0.0.3'])
+    assert len(pool) == 1
+    pool.evict('10.0.0.3')
+    assert len(pool) == 0
+    # An evicted peer gets a new channel
+    assert pool.get_stub('10.0.0.3') is not stub
+    pool.close()
+
+
+def test_evicted_channel_reconnects_to_a_restarted_peer():
+    peer = '127.0.0.1:8951'
+    pool = ChannelPool()
+    server = serve(8951)
+    try:
+        assert pool.get_stub(peer).Status(gossip_pb2.StatusRequest(), timeout=2).ready
+    finally:
+        server.stop(None)
+    with pytest.raises(grpc.RpcError) as failure:
+        pool.get_stub(peer).Status(gossip_pb2.StatusRequest(), timeout=2)
+    assert failure.value.code() == grpc.StatusCode.UNAVAILABLE
+    pool.evict(peer)
+    server = serve(8951)
+    try:
+        assert pool.get_stub(peer).Status(gossip_pb2.StatusRequest(), timeout=2).ready
+    finally:
+        server.stop(None)
+        pool.close()
+
+
+def test_warm_up_connects_every_peer_before_ready():
+    # The warm-up Status poll is the pool's active health check
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        cluster = LocalCluster(3, base_port=8960, quiet=True, env={'NODES': '3'})
+    try:
+        assert cluster.wait_ready(20)
+        nodes = cluster.groups[0].nodes
+        for node in nodes:
+            assert len(node.channel_pool) == 2
+        warmups = [event for event in cluster.drain_events() if event.get('event') == 'warmup']
+        assert len(warmups) == 3
+        assert all(event['complete'] and event['warmed'] == 2 for event in warmups)
+    finally:
+        cluster.stop()
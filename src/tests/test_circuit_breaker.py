@@ -0,0 +1,71 @@
+import random
+from circuit_breaker import PeerCircuitBreaker, backoff_delay
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_opens_after_consecutive_failures():
+    breaker = PeerCircuitBreaker(failure_threshold=3, reset_timeout=10, clock=FakeClock())
+    assert breaker.record('p1', False) is None
+    assert breaker.record('p1', False) is None
+    assert breaker.record('p1', False) == 'open'
+    assert breaker.allow('p1') == (False, None)
+    assert breaker.open_peers() == ['p1']
+    # Other peers are not affected
+    assert breaker.allow('p2') == (True, None)
+
+
+def test_success_resets_the_failure_count():
+    breaker = PeerCircuitBreaker(failure_threshold=2, clock=FakeClock())
+    breaker.record('p1', False)
+    breaker.record('p1', True)
+    assert breaker.failures('p1') == 0
+    assert breaker.record('p1', False) is None
+    assert breaker.allow('p1') == (True, None)
+
+
+def test_half_open_trial_closes_or_reopens():
+    clock = FakeClock()
+    breaker = PeerCircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record('p1', False)
+    clock.now = 9.9
+    assert breaker.allow('p1') == (False, None)
+    clock.now = 10
+    assert breaker.allow('p1') == (True, 'half_open')
+    # Only one trial send at a time
+    assert breaker.allow('p1') == (False, None)
+    assert breaker.record('p1', False) == 'open'
+
+    clock.now = 20
+    assert breaker.allow('p1') == (True, 'half_open')
+    assert breaker.record('p1', True) == 'closed'
+    assert breaker.allow('p1') == (True, None)
+    assert breaker.open_peers() == []
+
+
+def test_disabled_breaker_always_allows():
+    breaker = PeerCircuitBreaker(failure_threshold=0)
+    for _ in range(10):
+        assert breaker.record('p1', False) is None
+    assert breaker.allow('p1') == (True, None)
+
+
+def test_retain_forgets_departed_peers():
+    breaker = PeerCircuitBreaker(failure_threshold=1, clock=FakeClock())
+    breaker.record('p1', False)
+    breaker.record('p2', False)
+    breaker.retain(['p2'])
+    assert breaker.open_peers() == ['p2']
+
+
+def test_backoff_is_capped_full_jitter():
+    rng = random.Random(1)
+    for attempt in range(8):
+        delay = backoff_delay(attempt, 0.05, 1.0, rng)
+        assert 0 <= delay <= min(1.0, 0.05 * 2 ** attempt)
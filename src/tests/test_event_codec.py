@@ -0,0 +1,63 @@
+import io
+import csv
+import base64
+import json
+from event_codec import CompactFileSink, decode_batch, decode_file, encode_events, write_csv
+
+EVENTS = [
+    {'sender_id': '10.0.0.1', 'receiver_id': '10.0.0.1', 'message': 'ab12-cubaan3-1', 'event_type': 'initiate',
+     'received_timestamp': 1_700_000_000_000_000_123, 'propagation_time': None,
+     'detail': 'Gossip initiated by node-1'},
+    {'sender_id': '10.0.0.1', 'receiver_id': '10.0.0.2', 'message': 'ab12-cubaan3-1', 'event_type': 'received',
+     'received_timestamp': 1_700_000_000_004_000_456, 'propagation_time': 3.5, 'round': 1, 'path_length': 0,
+     'corrected_propagation_time': 3.25, 'corrected_quality': 'good', 'clock_offset': 0.25,
+     'clock_uncertainty': 0.1, 'detail': 'received'},
+    {'sender_id': '10.0.0.2', 'receiver_id': '10.0.0.1', 'message': 'ab12-cubaan3-1', 'event_type': 'duplicate',
+     'received_timestamp': 1_700_000_000_006_000_789, 'propagation_time': None, 'detail': 'duplicate'},
+]
+
+
+def test_round_trip_keeps_every_column_but_detail():
+    batch, others = encode_events(EVENTS + [{'event': 'seen_cache_stats', 'size': 1}])
+    assert others == [{'event': 'seen_cache_stats', 'size': 1}]
+    decoded = decode_batch(batch.SerializeToString())
+    assert len(decoded) == len(EVENTS)
+    for event, original in zip(decoded, EVENTS):
+        for key, value in original.items():
+            if key != 'detail':
+                assert event[key] == value, key
+        assert event['detail'] == ''
+
+
+def test_nodes_and_messages_are_interned():
+    batch, _ = encode_events(EVENTS)
+    assert list(batch.nodes) == ['10.0.0.1', '10.0.0.2']
+    assert list(batch.messages) == ['ab12-cubaan3-1']
+    assert batch.base_timestamp == EVENTS[0]['received_timestamp']
+
+
+def test_file_frames_decode(tmp_path):
+    path = str(tmp_path / 'events.bin')
+    sink = CompactFileSink(path)
+    sink.write(EVENTS[:2])
+    sink.write(EVENTS[2:])
+    sink.close()
+    assert [event['event_type'] for event in decode_file(path)] == ['initiate', 'received', 'duplicate']
+
+
+def test_json_lines_decode(tmp_path):
+    batch, _ = encode_events(EVENTS)
+    path = tmp_path / 'events.jsonl'
+    path.write_text('not json\n' + json.dumps({'event': 'warmup'}) + '\n'
+                    + json.dumps({'jsonPayload': {'event_batch': base64.b64encode(batch.SerializeToString()).decode()}})
+                    + '\n')
+    assert len(decode_file(str(path))) == len(EVENTS)
+
+
+def test_write_csv_skips_records_without_event_type():
+    out = io.StringIO()
+    rows = write_csv(EVENTS + [{'event': 'warmup', 'peers': 2}], out)
+    assert rows == len(EVENTS)
+    written = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert [row['event_type'] for row in written] == ['initiate', 'received', 'duplicate']
+    assert 'round' in written[0] and 'corrected_quality' in written[0]
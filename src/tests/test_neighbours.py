@@ -0,0 +1,130 @@
+import queue
+import time
+from types import SimpleNamespace
+from kubernetes import client
+from neighbours import NeighbourRegistry
+from topology import REGION_LABEL, ZONE_LABEL, NodeTopology
+
+
+def pod(name, ip, node_name=None, resource_version='1', terminating=False):
+    return SimpleNamespace(
+        metadata=SimpleNamespace(name=name, deletion_timestamp=time.time() if terminating else None,
+                                 resource_version=resource_version),
+        status=SimpleNamespace(pod_ip=ip),
+        spec=SimpleNamespace(node_name=node_name),
+    )
+
+
+def node(name, zone):
+    return SimpleNamespace(metadata=SimpleNamespace(name=name, labels={REGION_LABEL: 'r1', ZONE_LABEL: zone}))
+
+
+class FakeWatch:
+    """List and watch sources: lists return the queued pod lists in turn, the watch streams queued events."""
+
+    def __init__(self, *lists):
+        self.lists = list(lists)
+        self.events = queue.Queue()
+        self.watched_from = []
+
+    def list_source(self):
+        pods = self.lists.pop(0) if len(self.lists) > 1 else self.lists[0]
+        return pods, '1'
+
+    def watch_source(self, resource_version):
+        self.watched_from.append(resource_version)
+        while True:
+            event = self.events.get()
+            if event is None:
+                return
+            if isinstance(event, Exception):
+                raise event
+            yield event
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def registry(fake, changes=None, topology=None):
+    return NeighbourRegistry('10.0.0.1', 'bcgossip', list_source=fake.list_source, watch_source=fake.watch_source,
+                             on_change=changes.append if changes is not None else None, retry_delay=0.01,
+                             topology=topology)
+
+
+def test_added_and_deleted_pods():
+    changes = []
+    neighbours = registry(FakeWatch([]), changes)
+    neighbours.apply_event({'type': 'ADDED', 'object': pod('self', '10.0.0.1')})
+    neighbours.apply_event({'type': 'ADDED', 'object': pod('p2', '10.0.0.2')})
+    # A pod without an IP yet is not a neighbour
+    neighbours.apply_event({'type': 'ADDED', 'object': pod('p3', None)})
+    assert neighbours.snapshot() == [('p2', '10.0.0.2')]
+
+    neighbours.apply_event({'type': 'DELETED', 'object': pod('p2', '10.0.0.2')})
+    assert neighbours.snapshot() == []
+    assert changes == [[], [('p2', '10.0.0.2')], []]
+
+
+def test_terminating_pod_is_dropped():
+    neighbours = registry(FakeWatch([]))
+    neighbours.apply_event({'type': 'ADDED', 'object': pod('p2', '10.0.0.2')})
+    neighbours.apply_event({'type': 'MODIFIED', 'object': pod('p2', '10.0.0.2', terminating=True)})
+    assert neighbours.snapshot() == []
+
+
+def test_ip_change_drops_the_old_node_name():
+    topology = NodeTopology(list_source=lambda: [node('n1', 'z1'), node('n2', 'z2')])
+    neighbours = registry(FakeWatch([]), topology=topology)
+    neighbours.apply_event({'type': 'ADDED', 'object': pod('p2', '10.0.0.2', 'n1')})
+    assert neighbours.location('10.0.0.2') == ('r1', 'z1')
+
+    neighbours.apply_event({'type': 'MODIFIED', 'object': pod('p2', '10.0.0.3', 'n2')})
+    assert neighbours.snapshot() == [('p2', '10.0.0.3')]
+    assert neighbours.location('10.0.0.3') == ('r1', 'z2')
+    assert neighbours.location('10.0.0.2') is None
+
+
+def test_bookmark_only_moves_the_resource_version():
+    neighbours = registry(FakeWatch([]))
+    assert neighbours.apply_event({'type': 'BOOKMARK', 'object': pod('', None, resource_version='7')}) == '7'
+    assert neighbours.snapshot() == []
+
+
+def test_watch_resumes_from_the_last_resource_version():
+    fake = FakeWatch([pod('p2', '10.0.0.2')])
+    neighbours = registry(fake)
+    neighbours.start()
+    try:
+        assert neighbours.wait_synced(5)
+        fake.events.put({'type': 'ADDED', 'object': pod('p3', '10.0.0.3', resource_version='5')})
+        # The stream ends; the registry watches again without relisting
+        fake.events.put(None)
+        assert wait_until(lambda: len(fake.watched_from) == 2)
+        assert fake.watched_from == ['1', '5']
+        assert sorted(neighbours.snapshot()) == [('p2', '10.0.0.2'), ('p3', '10.0.0.3')]
+    finally:
+        neighbours.stop()
+        fake.events.put(None)
+
+
+def test_expired_watch_resyncs_from_a_new_list():
+    fake = FakeWatch([pod('p2', '10.0.0.2')], [pod('p4', '10.0.0.4')])
+    changes = []
+    neighbours = registry(fake, changes)
+    neighbours.start()
+    try:
+        assert neighbours.wait_synced(5)
+        fake.events.put({'type': 'ADDED', 'object': pod('p3', '10.0.0.3', resource_version='2')})
+        fake.events.put(client.ApiException(status=410, reason='Gone'))
+        # The relist replaces the cache: p2 and p3 are gone
+        assert wait_until(lambda: neighbours.snapshot() == [('p4', '10.0.0.4')])
+        assert changes[-1] == [('p4', '10.0.0.4')]
+    finally:
+        neighbours.stop()
+        fake.events.put(None)
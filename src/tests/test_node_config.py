@@ -0,0 +1,28 @@
+import pytest
+from node_config import NodeConfig
+
+
+def test_defaults():
+    config = NodeConfig({})
+    assert config.gossip_mode == 'direct'
+    assert config.fanout_concurrency == 1
+    assert config.fanout_timeout is None
+    assert config.receipts_enabled is False
+    assert config.warmup_peers == 0
+
+
+def test_durations_in_seconds_and_derived_values():
+    config = NodeConfig({'STREAM_IDLE_MS': '250', 'GOSSIP_ROUND_MS': '20', 'NODES': '10', 'FANOUT_CONCURRENCY': '0',
+                         'RECEIPTS': 'on'})
+    assert config.stream_idle_timeout == 0.25
+    assert config.round_interval == 0.02
+    assert config.warmup_peers == 9
+    # At least one fan-out thread
+    assert config.fanout_concurrency == 1
+    assert config.receipts_enabled
+
+
+@pytest.mark.parametrize('name', ['GOSSIP_MODE', 'TOPOLOGY_MODE', 'PAYLOAD_COMPRESSION'])
+def test_unknown_mode_is_rejected(name):
+    with pytest.raises(ValueError, match=name):
+        NodeConfig({name: 'bogus'})
@@ -0,0 +1,94 @@
+import threading
+import time
+from pod_tracker import FakePodApi, PodTracker
+
+
+def tracker(api):
+    return PodTracker(namespace=api.namespace, list_source=api.list_source, watch_source=api.watch_source,
+                      retry_delay=0.01).start()
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_ready_transitions():
+    api = FakePodApi()
+    pods = tracker(api)
+    try:
+        api.add_pod('p1', ip='10.0.0.1')
+        assert wait_until(lambda: pods.counts() == (1, 0, 0))
+        assert pods.ready_pods() == []
+
+        api.set_ready('p1')
+        assert wait_until(lambda: pods.ready_pods() == ['p1'])
+        assert pods.pods()['p1']['ip'] == '10.0.0.1'
+
+        api.set_ready('p1', ready=False)
+        assert wait_until(lambda: pods.counts() == (1, 0, 0))
+
+        api.set_ready('p1')
+        api.terminate('p1')
+        # A terminating pod is no longer ready, but still counted until it is deleted
+        assert wait_until(lambda: pods.counts() == (1, 0, 1))
+        api.delete('p1')
+        assert wait_until(lambda: pods.counts() == (0, 0, 0))
+    finally:
+        pods.stop()
+        api.close()
+
+
+def test_initial_list_seeds_the_cache():
+    api = FakePodApi()
+    api.add_pod('p1', ready=True)
+    api.add_pod('p2')
+    pods = tracker(api)
+    try:
+        assert pods.synced.wait(5)
+        assert pods.counts() == (2, 1, 0)
+    finally:
+        pods.stop()
+        api.close()
+
+
+def test_wait_for_n_ready_pods():
+    api = FakePodApi()
+    pods = tracker(api)
+    progress = []
+    try:
+        for index in range(3):
+            api.add_pod(f'p{index}')
+
+        def make_ready():
+            for index in range(3):
+                time.sleep(0.02)
+                api.set_ready(f'p{index}')
+
+        threading.Thread(target=make_ready, daemon=True).start()
+        assert pods.wait_for(lambda tracker: tracker.counts()[1] >= 3, timeout=5,
+                             on_change=lambda tracker: progress.append(tracker.counts()[1]))
+        assert all(ready < 3 for ready in progress)
+    finally:
+        pods.stop()
+        api.close()
+
+
+def test_wait_for_times_out_and_stops():
+    api = FakePodApi()
+    api.add_pod('p1')
+    pods = tracker(api)
+    try:
+        start = time.monotonic()
+        assert not pods.wait_for(lambda tracker: tracker.counts()[1] >= 1, timeout=0.1)
+        assert time.monotonic() - start < 2
+
+        threading.Timer(0.05, pods.stop).start()
+        assert not pods.wait_for(lambda tracker: tracker.counts()[1] >= 1, timeout=5)
+    finally:
+        pods.stop()
+        api.close()
@@ -0,0 +1,63 @@
+import threading
+from seen_cache import SeenCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_add_reports_new_and_duplicate():
+    cache = SeenCache(max_size=10)
+    assert cache.add('m1')
+    assert not cache.add('m1')
+    assert 'm1' in cache
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0.5)
+
+
+def test_evicts_least_recently_seen():
+    cache = SeenCache(max_size=2)
+    cache.add('m1')
+    cache.add('m2')
+    # Seeing m1 again makes m2 the oldest
+    cache.add('m1')
+    cache.add('m3')
+    assert 'm1' in cache and 'm3' in cache
+    assert 'm2' not in cache
+    assert len(cache) == 2
+    assert cache.stats()['evictions'] == 1
+
+
+def test_expires_after_ttl():
+    clock = FakeClock()
+    cache = SeenCache(max_size=10, ttl=5, clock=clock)
+    cache.add('m1')
+    clock.now = 3
+    cache.add('m2')
+    clock.now = 5
+    assert 'm1' not in cache
+    assert 'm2' in cache
+    assert cache.stats()['expirations'] == 1
+    # An expired message is new again
+    assert cache.add('m1')
+
+
+def test_concurrent_deliveries_accept_once():
+    cache = SeenCache(max_size=100)
+    accepted = []
+    barrier = threading.Barrier(8)
+
+    def deliver():
+        barrier.wait()
+        accepted.append(cache.add('m1'))
+
+    threads = [threading.Thread(target=deliver) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert accepted.count(True) == 1
@@ -0,0 +1,68 @@
+import queue
+import threading
+import gossip_pb2
+from stream_pool import PeerStream
+
+
+class FakeStub:
+    """Answers every GossipBatch with an AckBatch; the stream is read only once `go` is set."""
+
+    def __init__(self):
+        self.go = threading.Event()
+
+    def StreamMessages(self, batches):
+        self.go.wait()
+        for batch in batches:
+            yield gossip_pb2.AckBatch(accepted=len(batch.messages))
+
+
+class LateQueue(queue.Queue):
+    """Times out on the first get, with a message queued right after the timeout fired."""
+
+    def __init__(self, late_item):
+        super().__init__()
+        self.late_item = late_item
+
+    def get(self, block=True, timeout=None):
+        if self.late_item is not None:
+            self.put(self.late_item)
+            self.late_item = None
+            raise queue.Empty
+        return super().get(block, timeout)
+
+
+def test_batches_and_acks():
+    stub = FakeStub()
+    stream = PeerStream(stub, batch_size=2, flush_interval=1, idle_timeout=1)
+    stub.go.set()
+    first = stream.send(gossip_pb2.GossipMessage(message='a'))
+    second = stream.send(gossip_pb2.GossipMessage(message='b'))
+    assert first.result(timeout=2).accepted == 2
+    assert second.result(timeout=2) is first.result()
+    stream.close()
+
+
+def test_message_queued_at_idle_timeout_is_still_sent():
+    stub = FakeStub()
+    stream = PeerStream(stub, batch_size=1, flush_interval=0, idle_timeout=0.05)
+    late = stream.send(gossip_pb2.GossipMessage(message='late'))
+    # Move the message into a queue that times out just before seeing it
+    stream._queue = LateQueue(stream._queue.get_nowait())
+    stub.go.set()
+    assert late.result(timeout=2).accepted == 1
+    # With nothing queued, the stream goes idle and closes
+    stream._ack_thread.join(timeout=2)
+    assert stream.closed
+    assert isinstance(stream.send(gossip_pb2.GossipMessage(message='x')).exception(), RuntimeError)
+
+
+def test_batch_collected_after_the_call_ended_fails():
+    stub = FakeStub()
+    stream = PeerStream(stub, batch_size=2, flush_interval=0, idle_timeout=0.05)
+    future = stream.send(gossip_pb2.GossipMessage(message='a'))
+    batches = stream._batches()
+    # The call ends (as _read_acks would mark it) while the batch is being collected
+    stream._mark_closed()
+    assert next(batches, None) is None
+    assert isinstance(future.exception(timeout=1), RuntimeError)
+    stub.go.set()
@@ -0,0 +1,58 @@
+from automate import SweepScheduler, parse_sweep
+from fake_cluster import FakeCluster
+
+
+def test_parse_sweep_is_the_cartesian_product():
+    assert parse_sweep(['totalNodes=10,50', 'testType=default,memory']) == [
+        {'totalNodes': '10', 'testType': 'default'},
+        {'totalNodes': '10', 'testType': 'memory'},
+        {'totalNodes': '50', 'testType': 'default'},
+        {'totalNodes': '50', 'testType': 'memory'},
+    ]
+    assert parse_sweep([]) == [{}]
+
+
+def test_lanes_group_scenarios_that_only_differ_in_size():
+    scenarios = parse_sweep(['totalNodes=50,10', 'testType=default,memory'])
+    scheduler = SweepScheduler(FakeCluster(), scenarios, num_tests=1)
+    lanes = [[values for _, values in lane] for lane in scheduler.lanes()]
+    assert lanes == [
+        [{'totalNodes': '10', 'testType': 'default'}, {'totalNodes': '50', 'testType': 'default'}],
+        [{'totalNodes': '10', 'testType': 'memory'}, {'totalNodes': '50', 'testType': 'memory'}],
+    ]
+
+
+def _scheduler(cluster, scenarios, **options):
+    return SweepScheduler(cluster, scenarios, num_tests=2, sweep_id='t1', ready_timeout=10,
+                          test_options={'quiesce_timeout': 1.0, 'settle_ms': 0}, **options)
+
+
+def test_installs_once_per_lane_and_scales_up():
+    cluster = FakeCluster(seed=1)
+    entries = _scheduler(cluster, parse_sweep(['totalNodes=3,5'])).run()
+    assert [entry['status'] for entry in entries] == ['completed', 'completed']
+    assert [entry['deploy'] for entry in entries] == ['install', 'scale']
+    assert [entry['tests'] for entry in entries] == [2, 2]
+    assert all(entry['deploy_ms'] >= 0 for entry in entries)
+    assert all(entry['namespace'] == 'cnsim-t1-0' for entry in entries)
+    assert [call[0] for call in cluster.calls] == ['install', 'scale', 'uninstall', 'delete_namespace']
+    assert cluster.calls[1][3] == 5
+    assert cluster.apis == {}
+
+
+def test_lanes_that_exceed_the_budget_are_skipped():
+    cluster = FakeCluster()
+    scenarios = parse_sweep(['totalNodes=3', 'testType=default']) + parse_sweep(['totalNodes=20', 'testType=memory'])
+    entries = _scheduler(cluster, scenarios, max_pods=10).run()
+    assert [entry['status'] for entry in entries] == ['completed', 'skipped']
+    assert 'budget' in entries[1]['error']
+    assert [call[3]['testType'] for call in cluster.calls if call[0] == 'install'] == ['default']
+
+
+def test_a_failed_install_fails_only_its_lane():
+    cluster = FakeCluster()
+    # The namespace of lane 0 already has a release
+    cluster.install('other', 'cnsim-t1-0', {'totalNodes': '1'})
+    scenarios = parse_sweep(['totalNodes=4', 'testType=default']) + parse_sweep(['totalNodes=3', 'testType=memory'])
+    entries = _scheduler(cluster, scenarios, max_releases=1).run()
+    assert [entry['status'] for entry in entries] == ['failed', 'completed']
@@ -0,0 +1,135 @@
+import random
+import threading
+from kubernetes import client, config
+
+# Well-known labels the cloud providers put on every Kubernetes node
+REGION_LABEL = 'topology.kubernetes.io/region'
+ZONE_LABEL = 'topology.kubernetes.io/zone'
+
+# Supported values of TOPOLOGY_MODE
+TOPOLOGY_MODES = ('off', 'aware', 'hierarchical')
+# Tier of a peer relative to this node, nearest first ('unknown': a node without labels)
+TIERS = ('zone', 'region', 'remote', 'unknown')
+
+
+def tier(local, peer):
+    """Topology tier of a peer at location `peer` ((region, zone) or None) seen from `local`."""
+    if local is None or peer is None:
+        return 'unknown'
+    if local[0] != peer[0]:
+        return 'remote'
+    if local[1] != peer[1]:
+        return 'region'
+    return 'zone'
+
+
+def nearest_first(local, peers, fanout=None, rng=random):
+    """
+    Topology-aware selection from peers [(peer_ip, location)].
+    Without a fanout (direct mail) every peer is returned, same-zone peers
+    first so they are contacted before the cross-zone ones. With a fanout
+    k, k - 1 peers are taken from the nearest tiers and one at random from
+    the others, so the epidemic still crosses zone boundaries.
+    """
+    rank = {name: i for i, name in enumerate(TIERS)}
+    shuffled = list(peers)
+    rng.shuffle(shuffled)
+    ranked = [peer_ip for peer_ip, _ in sorted(shuffled, key=lambda peer: rank[tier(local, peer[1])])]
+    if fanout is None or fanout >= len(ranked):
+        return ranked
+    if fanout < 1:
+        return []
+    selected = ranked[:fanout - 1]
+    rest = ranked[fanout - 1:]
+    return selected + [rng.choice(rest)]
+
+
+def hierarchical_targets(local, peers, sender_tier, fanout=None, avoid=(), rng=random):
+    """
+    Hierarchical selection from peers [(peer_ip, location)], given the tier
+    of the node the message came from ('self' on the initiator):
+
+    * the initiator sends to the peers in its zone, to one relay in every
+      other zone of its region and to one relay in every other region;
+    * a relay that received from another region sends to its zone and to
+      one relay in every other zone of its region;
+    * a relay that received from another zone of its region sends to its zone.
+
+    Cross-zone traffic is thus one message per zone instead of one per pod.
+    With a fanout (push modes) only `fanout` random zone peers are picked and
+    spreading inside the zone goes on epidemically; without one (direct mail)
+    a message that arrived from the same zone is not passed on. Peers without
+    labels are contacted directly by the initiator. Relays are picked at
+    random, preferring peers that are not in `avoid` (open circuits).
+    """
+    local_peers = []
+    unlabelled = []
+    groups = {}
+    for peer_ip, location in peers:
+        peer_tier = tier(local, location)
+        if peer_tier == 'zone':
+            local_peers.append(peer_ip)
+        elif peer_tier == 'unknown':
+            unlabelled.append(peer_ip)
+        elif peer_tier == 'region' and sender_tier in ('self', 'remote'):
+            groups.setdefault(location, []).append(peer_ip)
+        elif peer_tier == 'remote' and sender_tier == 'self':
+            # One relay per region, which then covers that region's zones
+            groups.setdefault((location[0], None), []).append(peer_ip)
+
+    targets = []
+    if fanout is not None:
+        targets.extend(local_peers if fanout >= len(local_peers) else rng.sample(local_peers, fanout))
+    elif sender_tier in ('self', 'remote', 'region'):
+        targets.extend(local_peers)
+    if sender_tier == 'self':
+        targets.extend(unlabelled)
+    avoid = set(avoid)
+    for _, candidates in sorted(groups.items(), key=lambda group: (group[0][0], group[0][1] or '')):
+        healthy = [peer_ip for peer_ip in candidates if peer_ip not in avoid]
+        targets.append(rng.choice(healthy or candidates))
+    return targets
+
+
+class NodeTopology:
+    """
+    Location (region, zone) of every Kubernetes node, read from the node
+    labels. refresh() lists the nodes and is called from the neighbour
+    watch thread, so lookups never wait on the API server. The list source
+    can be swapped for a fake.
+    """
+
+    def __init__(self, list_source=None):
+        # list_source() -> nodes
+        self._list_source = list_source or self._kubernetes_list
+        self._lock = threading.Lock()
+        # node name -> (region, zone)
+        self._nodes = {}
+        self._v1 = None
+
+    def location(self, node_name):
+        """(region, zone) of a node, or None when it is unknown or has no topology labels."""
+        with self._lock:
+            return self._nodes.get(node_name)
+
+    def knows(self, node_name):
+        with self._lock:
+            return node_name in self._nodes
+
+    def refresh(self):
+        """Re-reads the labels of every node."""
+        nodes = {}
+        for node in self._list_source():
+            labels = node.metadata.labels or {}
+            if ZONE_LABEL in labels or REGION_LABEL in labels:
+                nodes[node.metadata.name] = (labels.get(REGION_LABEL, ''), labels.get(ZONE_LABEL, ''))
+            else:
+                nodes[node.metadata.name] = None
+        with self._lock:
+            self._nodes = nodes
+
+    def _kubernetes_list(self):
+        if self._v1 is None:
+            config.load_incluster_config()
+            self._v1 = client.CoreV1Api()
+        return self._v1.list_node().items